@@ -0,0 +1,41 @@
+"""
+Script to add geohash fields to existing tickets in Firebase.
+
+New tickets get "geohash" and "geohash_<precision>" fields when they are
+created; this backfills them on older tickets so spatial queries
+(FirebaseService.query_tickets_in_bbox / query_tickets_near) can find them.
+
+Usage:
+    python backfill_geohash.py --dry-run
+    python backfill_geohash.py --yes
+"""
+
+from typing import Any, Dict
+
+from migration_runner import Migration, run_cli
+from services.geo_utils import geohash_fields, ticket_coordinates
+
+
+def add_geohash_fields(ticket_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compute missing or stale geohash fields for one ticket
+    """
+    # Web app tickets carry only location.lat / location.lng
+    coordinates = ticket_coordinates(ticket_data)
+    if coordinates is None:
+        return {}
+
+    fields = geohash_fields(*coordinates)
+
+    return {k: v for k, v in fields.items() if ticket_data.get(k) != v}
+
+
+MIGRATION = Migration(
+    name="backfill_geohash",
+    transform=add_geohash_fields,
+    description="Add geohash prefix fields to tickets that have coordinates",
+)
+
+
+if __name__ == "__main__":
+    run_cli(MIGRATION)
@@ -0,0 +1,37 @@
+"""
+Build the on-disk FAISS index for the CASE knowledge base.
+
+Run this whenever knowledge_base.md changes, then call
+POST /knowledge-base/reload on the RAG service (or restart it).
+An existing index is updated in place: only changed sections are embedded.
+
+Usage:
+    python build_knowledge_index.py           # incremental update
+    python build_knowledge_index.py --full    # rebuild from scratch
+"""
+
+import sys
+
+from services.knowledge_base_index import build_index
+from rag import vector_cache, EMBEDDING_MODEL, KNOWLEDGE_BASE_PATH, KNOWLEDGE_BASE_INDEX_DIR
+
+
+def main():
+    print(f"Building knowledge base index from {KNOWLEDGE_BASE_PATH}")
+    manifest = build_index(
+        KNOWLEDGE_BASE_PATH,
+        KNOWLEDGE_BASE_INDEX_DIR,
+        vector_cache.get_embeddings(),
+        EMBEDDING_MODEL,
+        incremental="--full" not in sys.argv
+    )
+    changes = manifest["changes"]
+    print(f"✓ Indexed {manifest['chunks']} chunks in {manifest['build_seconds']}s")
+    print(f"  Sections: {changes['changed_sections']} changed, {changes['unchanged_sections']} unchanged, "
+          f"{changes['removed_sections']} removed")
+    print(f"  Chunks: {changes['added_chunks']} added, {changes['deleted_chunks']} deleted")
+    print(f"✓ Saved to {KNOWLEDGE_BASE_INDEX_DIR}")
+
+
+if __name__ == "__main__":
+    main()
@@ -26,7 +26,90 @@ FIREBASE_CONFIG = {
 ISSUE_TYPES = ["Pothole", "Garbage", "Broken Pipe", "Other"]
 CONFIDENCE_THRESHOLD = 0.7
 
+# Ticket field values grouped by the statistics endpoint
+TICKET_STATUSES = [
+    "open", "pending", "submitted", "verified", "assigned", "accepted",
+    "in_progress", "completed", "resolved", "closed", "rejected",
+]
+CLOSED_TICKET_STATUSES = ["closed", "resolved", "completed", "rejected"]
+# Departments assigned by AI validation and the manual form
+AI_TICKET_DEPARTMENTS = ["Roads & Traffic", "Waste Management", "Water Supply", "General", "Other"]
+# Department IDs used by the web app, shared with it through one JSON file
+DEPARTMENTS_FILE = os.getenv(
+    "DEPARTMENTS_FILE",
+    os.path.join(os.path.dirname(__file__), "..", "web", "src", "lib", "constants", "departments.json")
+)
+
+
+def _load_department_ids(path):
+    try:
+        with open(path, "r") as f:
+            return [dept["id"] for dept in json.load(f)]
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"Could not load departments from {path}: {e}")
+        return []
+
+
+TICKET_DEPARTMENTS = AI_TICKET_DEPARTMENTS + _load_department_ids(DEPARTMENTS_FILE)
+
 # Server Configuration
 API_TITLE = "Citizen Reporting API"
 API_VERSION = "1.0.0"
 API_DESCRIPTION = "AI-powered citizen reporting system for infrastructure issues"
+
+# Duplicate Detection Configuration
+DEDUPE_RADIUS_M = float(os.getenv("DEDUPE_RADIUS_M", "50"))
+DEDUPE_WINDOW_HOURS = float(os.getenv("DEDUPE_WINDOW_HOURS", "72"))
+DEDUPE_IMAGE_HASH_MAX_DISTANCE = int(os.getenv("DEDUPE_IMAGE_HASH_MAX_DISTANCE", "6"))
+# Image-hash matches are only accepted within this distance of the new report
+DEDUPE_IMAGE_RADIUS_M = float(os.getenv("DEDUPE_IMAGE_RADIUS_M", "500"))
+
+# Idempotency Configuration
+# Keys are held in process memory: run one worker, or route retries to the same worker
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "900"))
+IDEMPOTENCY_MAX_KEYS = int(os.getenv("IDEMPOTENCY_MAX_KEYS", "10000"))
+
+# Ticket Outbox Configuration
+OUTBOX_DB_PATH = os.getenv("OUTBOX_DB_PATH", os.path.join(os.path.dirname(__file__), "outbox.db"))
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+OUTBOX_FLUSH_INTERVAL = float(os.getenv("OUTBOX_FLUSH_INTERVAL", "1.0"))
+OUTBOX_MAX_BACKOFF = float(os.getenv("OUTBOX_MAX_BACKOFF", "300"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "20"))  # failing rows are then dead-lettered
+OUTBOX_CLAIM_LEASE = float(os.getenv("OUTBOX_CLAIM_LEASE", "60"))  # seconds a flushing process owns a claimed row
+
+# Firestore Bulk Write Configuration
+BULK_FLUSH_SIZE = int(os.getenv("BULK_FLUSH_SIZE", "500"))
+BULK_MAX_RETRIES = int(os.getenv("BULK_MAX_RETRIES", "5"))
+BULK_INITIAL_OPS_PER_SECOND = int(os.getenv("BULK_INITIAL_OPS_PER_SECOND", "500"))
+BULK_MAX_OPS_PER_SECOND = int(os.getenv("BULK_MAX_OPS_PER_SECOND", "10000"))
+
+# Ticket Statistics Configuration
+STATS_CACHE_TTL = int(os.getenv("STATS_CACHE_TTL", "60"))
+STATS_QUERY_WORKERS = int(os.getenv("STATS_QUERY_WORKERS", "16"))
+STATS_QUERY_TIMEOUT = float(os.getenv("STATS_QUERY_TIMEOUT", "10"))
+STATS_CACHE_MAX_ENTRIES = int(os.getenv("STATS_CACHE_MAX_ENTRIES", "256"))
+
+# Ticket Change Stream Configuration
+STREAM_BUFFER_SIZE = int(os.getenv("STREAM_BUFFER_SIZE", "5000"))
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "1000"))
+STREAM_HEARTBEAT_SECONDS = float(os.getenv("STREAM_HEARTBEAT_SECONDS", "15"))
+
+# Batch Fetch Configuration
+BATCH_GET_MAX_IDS = int(os.getenv("BATCH_GET_MAX_IDS", "500"))
+
+# Ticket Read Cache Configuration
+TICKET_CACHE_TTL = float(os.getenv("TICKET_CACHE_TTL", "5"))
+TICKET_CACHE_MAX_ENTRIES = int(os.getenv("TICKET_CACHE_MAX_ENTRIES", "2000"))
+
+# Ticket Archive Configuration
+ARCHIVE_COLLECTION = os.getenv("ARCHIVE_COLLECTION", "tickets_archive")
+ARCHIVE_RETENTION_DAYS = float(os.getenv("ARCHIVE_RETENTION_DAYS", "30"))
+ARCHIVE_INTERVAL_HOURS = float(os.getenv("ARCHIVE_INTERVAL_HOURS", "24"))  # 0 disables the background job
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "200"))
+
+# Geo Query Configuration
+# Largest /within bounding box, in coarsest geohash cells (~20 x 37 km each; one Firestore query per 30)
+GEO_WITHIN_MAX_CELLS = int(os.getenv("GEO_WITHIN_MAX_CELLS", "120"))
+
+# Ward Boundaries Configuration
+WARD_KML_FILE = os.getenv("WARD_KML_FILE", os.path.join(os.path.dirname(__file__), "e7a671e2-1f71-4219-a83c-556334bc9021.kml"))
@@ -1,18 +1,44 @@
-from fastapi import FastAPI, APIRouter, File, UploadFile, Form, HTTPException, status
+from fastapi import FastAPI, APIRouter, File, UploadFile, Form, Header, HTTPException, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from contextlib import asynccontextmanager
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
+import asyncio
+import hashlib
 import os
 import uuid
 
-from config import API_TITLE, API_VERSION, API_DESCRIPTION
+from config import API_TITLE, API_VERSION, API_DESCRIPTION, STREAM_HEARTBEAT_SECONDS, BATCH_GET_MAX_IDS, GEO_WITHIN_MAX_CELLS
 from services.ai_services import ai_service
 from services.firebase_service import firebase_service
 from services.ward_service import ward_service
+from services.dedupe_service import dedupe_service, CLOSED_STATUSES
+from services.idempotency_service import idempotency_service
+from services.outbox_service import ticket_outbox
+from services.stats_service import stats_service, StatsUnavailableError
+from services.ticket_stream_service import ticket_stream_service
+from services.ticket_cache_service import ticket_cache_service
+from services.hotspot_service import hotspot_service
+from services.archive_service import archive_service
+from services.geo_utils import geohash_fields, geohash_cell_count
+from services.geo_query_service import geo_query_service
 # from models.ticket import AIValidationResponse, TicketResponse  # Uncomment when models are created
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the ticket outbox flush worker and archive job for the lifetime of the app"""
+    ticket_outbox.start()
+    archive_service.start()
+    yield
+    # stop() joins worker threads, so keep it off the event loop
+    await run_in_threadpool(archive_service.stop)
+    await run_in_threadpool(ticket_stream_service.stop)
+    await run_in_threadpool(ticket_outbox.stop)
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title=API_TITLE,
@@ -21,6 +47,7 @@ app = FastAPI(
     docs_url="/api/docs",
     redoc_url="/api/redoc",
     openapi_url="/api/openapi.json",
+    lifespan=lifespan,
 )
 
 # Configure CORS
@@ -32,6 +59,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Idempotent-Replayed"],
 )
 
 
@@ -51,7 +79,13 @@ async def root():
             "health": "/health",
             "validate_image": "/api/tickets/validate-image",
             "get_ticket": "/api/tickets/{ticket_id}",
+            "batch_get_tickets": "/api/tickets/batch-get",
             "list_tickets": "/api/tickets/",
+            "ticket_stats": "/api/tickets/stats",
+            "ticket_stream": "/api/tickets/stream",
+            "archived_tickets": "/api/tickets/archive",
+            "tickets_near": "/api/tickets/near",
+            "tickets_within": "/api/tickets/within",
             "update_ticket": "/api/tickets/{ticket_id}",
         }
     }
@@ -61,23 +95,35 @@ async def root():
 @app.get("/health", tags=["health"])
 async def health():
     """Health check endpoint"""
-    return {"status": "healthy", "version": API_VERSION}
+    return {
+        "status": "healthy",
+        "version": API_VERSION,
+        "outbox_pending": ticket_outbox.pending_count(),
+        "outbox_dead_lettered": ticket_outbox.dead_letter_count(),
+    }
 
 
 # Tickets Router
 router = APIRouter(prefix="/api/tickets", tags=["tickets"])
 
 
+class BatchGetRequest(BaseModel):
+    ids: List[str] = Field(..., description="Ticket document IDs or ticket_id values to fetch")
+    fields: Optional[List[str]] = Field(None, description="Optional fields to return (projection)")
+
+
 @router.post(
     "/validate-image",
     summary="Validate image and create ticket",
     description="Upload an image to validate for infrastructure issues (Pothole, Garbage, Broken Pipe)"
 )
 async def validate_image_and_create_ticket(
+    response: Response,
     file: UploadFile = File(..., description="Image file (JPG, PNG, etc.)"),
     latitude: float = Form(..., description="Latitude of the location"),
     longitude: float = Form(..., description="Longitude of the location"),
     description: Optional[str] = Form(None, description="Optional description from user"),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", description="Client-generated key to make retries safe"),
 ):
     """
     Validate an uploaded image for infrastructure issues and automatically create a ticket if detected.
@@ -86,9 +132,31 @@ async def validate_image_and_create_ticket(
     - **latitude**: GPS latitude coordinate
     - **longitude**: GPS longitude coordinate
     - **description**: Optional user description
+    - **Idempotency-Key**: Optional header; retries with the same key return the original response
     
     Returns validation result and ticket ID if detected
     """
+    # Fingerprint the image itself: a different photo under the same filename is a different request
+    image_digest = hashlib.sha256(await file.read()).hexdigest()
+    await file.seek(0)
+    result, replayed = await idempotency_service.run(
+        "validate-image",
+        idempotency_key,
+        idempotency_service.fingerprint(image_digest, latitude, longitude, description),
+        lambda: _validate_image_and_create_ticket(file, latitude, longitude, description),
+    )
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
+
+
+async def _validate_image_and_create_ticket(
+    file: UploadFile,
+    latitude: float,
+    longitude: float,
+    description: Optional[str],
+) -> dict:
+    """Validate the image and create (or merge) the ticket"""
     try:
         # Validate file
         if not file.filename:
@@ -126,9 +194,29 @@ async def validate_image_and_create_ticket(
         # Call AI validation service
         validation_result = ai_service.validate_image(file_content)
         
-        # If detected, save ticket to Firebase
+        # If detected, merge into an existing duplicate or save a new ticket to Firebase
         ticket_id = None
+        duplicate = None
         if validation_result.get("detected"):
+            # Hashing decodes the image, and the first lookup loads the index from Firestore
+            image_hash = await run_in_threadpool(dedupe_service.compute_image_hash, file_content)
+            duplicate = await run_in_threadpool(
+                dedupe_service.find_duplicate,
+                validation_result.get("issue_type"), latitude, longitude, image_hash
+            )
+            if duplicate and not await run_in_threadpool(dedupe_service.merge_report, duplicate, {
+                "latitude": latitude,
+                "longitude": longitude,
+                "description": description,
+                "image_url": file.filename,
+                "source": "validate-image",
+            }):
+                duplicate = None
+
+        if validation_result.get("detected") and duplicate:
+            ticket_id = duplicate["ref"]
+            ticket_cache_service.invalidate(ticket_id)
+        elif validation_result.get("detected"):
             # Generate ticket ID
             import uuid
             ticket_num = str(uuid.uuid4())[:8].upper()
@@ -147,6 +235,7 @@ async def validate_image_and_create_ticket(
                 "longitude": longitude,
                 "area_name": "Unknown",  # Can be enhanced with reverse geocoding
                 "ward": ward_code if ward_code else "Unknown",
+                **geohash_fields(latitude, longitude),
                 
                 "title": validation_result.get("title", "Infrastructure Issue Reported"),
                 "description": description or validation_result.get("description"),
@@ -156,13 +245,17 @@ async def validate_image_and_create_ticket(
                 "sub_department": validation_result.get("sub_department", "Other"),
                 
                 "image_url": [file.filename],
+                "image_hash": image_hash,
                 "ai_confidence_score": validation_result.get("confidence_score"),
+                "report_count": 1,
                 
                 "reported_by_user_id": "anonymous_user",
                 "anonymous": True,
             }
             
-            ticket_id = firebase_service.save_ticket(ticket_data)
+            # Recorded in the local outbox; the background worker writes it to Firestore
+            ticket_id = ticket_outbox.enqueue(ticket_data)
+            dedupe_service.register(ticket_id, ticket_data)
         
         return {
             "detected": validation_result.get("detected"),
@@ -175,6 +268,8 @@ async def validate_image_and_create_ticket(
             "sub_department": validation_result.get("sub_department"),
             "reasoning": validation_result.get("reasoning"),
             "ticket_id": ticket_id,
+            "duplicate_of_existing": duplicate is not None,
+            "report_count": duplicate["report_count"] if duplicate else (1 if ticket_id else None),
             "error": validation_result.get("error")
         }
     
@@ -302,69 +397,7 @@ async def get_ticket_hotspots(min_tickets: int = 2, radius_km: float = 0.5):
         List of hotspot locations with ticket counts and priority information
     """
     try:
-        all_tickets = firebase_service.list_tickets()
-        
-        hotspots = []
-        processed_coords = set()
-        
-        from math import radians, sin, cos, sqrt, atan2
-        
-        for ticket in all_tickets:
-            if ticket.get("status") == "closed":
-                continue
-            
-            ticket_lat = ticket.get("latitude")
-            ticket_lon = ticket.get("longitude")
-            
-            if not ticket_lat or not ticket_lon:
-                continue
-            
-            # Skip if already processed
-            coord_key = (round(ticket_lat, 4), round(ticket_lon, 4))
-            if coord_key in processed_coords:
-                continue
-            
-            # Count nearby tickets
-            R = 6371
-            nearby_count = 0
-            nearby_ticket_ids = []
-            
-            for other_ticket in all_tickets:
-                if other_ticket.get("status") == "closed":
-                    continue
-                
-                other_lat = other_ticket.get("latitude")
-                other_lon = other_ticket.get("longitude")
-                
-                if not other_lat or not other_lon:
-                    continue
-                
-                lat1, lon1 = radians(ticket_lat), radians(ticket_lon)
-                lat2, lon2 = radians(other_lat), radians(other_lon)
-                
-                dlat = lat2 - lat1
-                dlon = lon2 - lon1
-                
-                a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-                c = 2 * atan2(sqrt(a), sqrt(1-a))
-                distance = R * c
-                
-                if distance <= radius_km:
-                    nearby_count += 1
-                    nearby_ticket_ids.append(other_ticket.get("ticket_id"))
-            
-            # Add to hotspots if meets threshold
-            if nearby_count >= min_tickets:
-                hotspots.append({
-                    "latitude": ticket_lat,
-                    "longitude": ticket_lon,
-                    "ticket_count": nearby_count,
-                    "tickets": nearby_ticket_ids,
-                    "priority_level": "Critical" if nearby_count >= 5 else "High" if nearby_count >= 3 else "Medium",
-                    "ward": ticket.get("ward"),
-                    "search_radius_km": radius_km
-                })
-                processed_coords.add(coord_key)
+        hotspots = await run_in_threadpool(hotspot_service.get_hotspots, min_tickets, radius_km)
         
         return {
             "success": True,
@@ -380,29 +413,449 @@ async def get_ticket_hotspots(min_tickets: int = 2, radius_km: float = 0.5):
         )
 
 
+def _paginate(tickets: list, limit: int, offset: int) -> dict:
+    """
+    Slice a sorted ticket list into a page
+
+    Results are sorted by distance, so every match in the area is read before
+    slicing; the area limits on /near and /within are what bound that cost.
+    """
+    limit = max(1, min(limit, 500))
+    offset = max(0, offset)
+    page = tickets[offset:offset + limit]
+    return {
+        "success": True,
+        "total": len(tickets),
+        "count": len(page),
+        "offset": offset,
+        "limit": limit,
+        "next_offset": offset + limit if offset + limit < len(tickets) else None,
+        "tickets": page
+    }
+
+
+@router.get(
+    "/near",
+    summary="Get tickets near a point",
+    description="Tickets within a radius of a location, sorted by distance"
+)
+async def get_tickets_near(
+    latitude: float,
+    longitude: float,
+    radius_km: float = 1.0,
+    status_filter: Optional[str] = None,
+    issue_type: Optional[str] = None,
+    include_closed: bool = False,
+    limit: int = 100,
+    offset: int = 0
+):
+    """
+    Get tickets within a radius, nearest first
+    
+    - **latitude**, **longitude**: Center of the search
+    - **radius_km**: Search radius in kilometers (max 50)
+    - **status_filter**, **issue_type**: Optional filters
+    - **include_closed**: Also return closed/resolved tickets
+    - **limit**, **offset**: Pagination
+    """
+    if not (-90 <= latitude <= 90) or not (-180 <= longitude <= 180):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid latitude or longitude"
+        )
+    if not (0 < radius_km <= 50):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="radius_km must be between 0 and 50"
+        )
+    
+    try:
+        filters = {}
+        if status_filter:
+            filters["status"] = status_filter
+        if issue_type:
+            filters["issue_type"] = issue_type
+        
+        tickets = await run_in_threadpool(
+            geo_query_service.near, latitude, longitude, radius_km, filters, include_closed
+        )
+        return _paginate(tickets, limit, offset)
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Server error: {str(e)}"
+        )
+
+
+@router.get(
+    "/within",
+    summary="Get tickets inside an area",
+    description="Tickets inside a bounding box (south, west, north, east) or a ward boundary"
+)
+async def get_tickets_within(
+    ward: Optional[str] = None,
+    south: Optional[float] = None,
+    west: Optional[float] = None,
+    north: Optional[float] = None,
+    east: Optional[float] = None,
+    status_filter: Optional[str] = None,
+    issue_type: Optional[str] = None,
+    include_closed: bool = False,
+    limit: int = 100,
+    offset: int = 0
+):
+    """
+    Get tickets inside a map viewport or a ward, sorted by distance from the area center
+    
+    - **ward**: Ward code (e.g. K/E); uses the ward boundary polygon
+    - **south**, **west**, **north**, **east**: Bounding box, used when no ward is given
+      (at most GEO_WITHIN_MAX_CELLS coarse geohash cells, roughly a city-sized area)
+    - **status_filter**, **issue_type**: Optional filters
+    - **include_closed**: Also return closed/resolved tickets
+    - **limit**, **offset**: Pagination; every match in the area is read and
+      sorted before the page is sliced
+    """
+    filters = {}
+    if status_filter:
+        filters["status"] = status_filter
+    if issue_type:
+        filters["issue_type"] = issue_type
+    
+    if ward:
+        tickets = await run_in_threadpool(geo_query_service.within_ward, ward, filters, include_closed)
+        if tickets is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Unknown ward: {ward}"
+            )
+        return _paginate(tickets, limit, offset)
+    
+    if None in (south, west, north, east):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide either ward or all of south, west, north, east"
+        )
+    if not (-90 <= south <= north <= 90) or not (-180 <= west <= east <= 180):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid bounding box"
+        )
+    # Each 30 covering cells cost one Firestore query, so bound the area like /near bounds its radius
+    if geohash_cell_count(south, west, north, east) > GEO_WITHIN_MAX_CELLS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Bounding box too large. Maximum {GEO_WITHIN_MAX_CELLS} geohash cells; zoom in or use ward"
+        )
+    
+    try:
+        tickets = await run_in_threadpool(
+            geo_query_service.within_bbox, south, west, north, east, filters, include_closed
+        )
+        return _paginate(tickets, limit, offset)
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Server error: {str(e)}"
+        )
+
+
+@router.get(
+    "/stats",
+    summary="Get ticket statistics",
+    description="Ticket counts grouped by status, ward, department or issue type, computed with Firestore aggregation queries"
+)
+async def get_ticket_stats(
+    ward: Optional[str] = None,
+    status_filter: Optional[str] = None,
+    department: Optional[str] = None,
+    issue_type: Optional[str] = None,
+    group_by: str = "status",
+    refresh: bool = False
+):
+    """
+    Get grouped ticket counts without downloading ticket documents
+    
+    - **ward**, **status_filter**, **department**, **issue_type**: Optional filters applied to every count
+    - **group_by**: Comma-separated fields to group by (status, ward, department, issue_type);
+      each costs one count query per known value, so only request what is displayed
+    - **refresh**: Bypass the short-lived stats cache
+    """
+    filters = {}
+    if ward:
+        filters["ward"] = ward
+    if status_filter:
+        filters["status"] = status_filter
+    if department:
+        filters["department"] = department
+    if issue_type:
+        filters["issue_type"] = issue_type
+    fields = [f.strip() for f in group_by.split(",") if f.strip()]
+    
+    try:
+        stats = await run_in_threadpool(stats_service.get_stats, filters, not refresh, fields)
+        return {"success": True, **stats}
+    
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except StatsUnavailableError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Ticket statistics unavailable: {str(e)}"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error computing ticket statistics: {str(e)}"
+        )
+
+
+@router.get(
+    "/stream",
+    summary="Stream ticket changes",
+    description="Server-sent events feed of ticket changes, with optional ward/status/ticket_id filters"
+)
+async def stream_tickets(
+    request: Request,
+    ward: Optional[str] = None,
+    status_filter: Optional[str] = None,
+    ticket_id: Optional[str] = None,
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+):
+    """
+    Subscribe to ticket changes instead of polling
+    
+    - **ward**: Only changes for tickets in this ward
+    - **status_filter**: Only changes where the ticket has this status
+    - **ticket_id**: Only changes for this ticket (document ID or ticket_id field)
+    - **Last-Event-ID**: Resume after this event (sent automatically by EventSource on reconnect)
+    
+    Events are `added`, `modified` or `removed` with the ticket as JSON data;
+    a ticket that stops matching the ward/status filter arrives as `removed`.
+    A `reset` event means events were missed (or the server restarted) and
+    the client should refetch.
+    """
+    filters = {"ward": ward, "status": status_filter, "ticket_id": ticket_id}
+    filters = {k: v for k, v in filters.items() if v}
+    
+    try:
+        subscriber = ticket_stream_service.subscribe(filters, last_event_id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Ticket stream unavailable: {str(e)}"
+        )
+    
+    async def event_source():
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                if subscriber.overflowed and subscriber.queue.empty():
+                    break
+                try:
+                    event_id, event = await asyncio.wait_for(subscriber.queue.get(), STREAM_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield ticket_stream_service.format_event(event_id, event)
+        finally:
+            ticket_stream_service.unsubscribe(subscriber)
+    
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get(
+    "/archive",
+    summary="List archived tickets",
+    description="Query tickets that were closed past the retention window and moved out of the live collection"
+)
+async def list_archived_tickets(
+    ward: Optional[str] = None,
+    status_filter: Optional[str] = None,
+    issue_type: Optional[str] = None,
+    limit: int = 100,
+    start_after: Optional[str] = None
+):
+    """
+    List archived tickets, one page at a time
+    
+    - **ward**, **status_filter**, **issue_type**: Optional filters
+    - **limit**: Page size (max 500)
+    - **start_after**: `next_start_after` from the previous page
+    """
+    try:
+        filters = {}
+        if ward:
+            filters["ward"] = ward
+        if status_filter:
+            filters["status"] = status_filter
+        if issue_type:
+            filters["issue_type"] = issue_type
+        
+        limit = max(1, min(limit, 500))
+        tickets = await run_in_threadpool(firebase_service.list_archived_tickets, filters, limit, start_after)
+        return {
+            "success": True,
+            "count": len(tickets),
+            "tickets": tickets,
+            "next_start_after": tickets[-1]["id"] if len(tickets) == limit else None
+        }
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Server error: {str(e)}"
+        )
+
+
+@router.get(
+    "/archive/{ticket_id}",
+    summary="Get archived ticket",
+    description="Retrieve a ticket from the archive"
+)
+async def get_archived_ticket(ticket_id: str):
+    """
+    Get an archived ticket by ID
+    
+    - **ticket_id**: The ID of the archived ticket
+    """
+    ticket_data = await run_in_threadpool(firebase_service.get_archived_ticket, ticket_id)
+    if not ticket_data:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Archived ticket not found"
+        )
+    ticket_data["id"] = ticket_id
+    return ticket_data
+
+
+@router.post(
+    "/archive/run",
+    summary="Archive closed tickets",
+    description="Move tickets closed longer than the retention window into the archive collection"
+)
+async def run_ticket_archive(dry_run: bool = False):
+    """
+    Run the archive job now (it also runs periodically in the background)
+    
+    - **dry_run**: Only report how many tickets would be archived
+    """
+    try:
+        summary = await run_in_threadpool(archive_service.run_once, dry_run)
+        return {"success": True, **summary}
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error archiving tickets: {str(e)}"
+        )
+
+
 @router.get(
     "/{ticket_id}",
     summary="Get ticket details",
     description="Retrieve details of a specific ticket"
 )
-async def get_ticket(ticket_id: str):
+async def get_ticket(
+    ticket_id: str,
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+):
     """
     Get details of a specific ticket by ID
     
     - **ticket_id**: The ID of the ticket to retrieve
+    - **If-None-Match**: ETag from a previous response; returns 304 if the ticket is unchanged
     """
     try:
-        ticket_data = firebase_service.get_ticket(ticket_id)
+        # Recently served tickets are answered without touching Firestore
+        cached = ticket_cache_service.get_ticket(ticket_id)
         
-        if not ticket_data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Ticket not found"
-            )
+        if cached is None:
+            ticket_data = await run_in_threadpool(firebase_service.get_ticket, ticket_id)
+            
+            # Fall back to tickets accepted but not yet flushed to Firestore
+            if not ticket_data:
+                ticket_data = ticket_outbox.get_pending(ticket_id)
+            
+            # Then to tickets moved to the cold archive
+            if not ticket_data:
+                ticket_data = await run_in_threadpool(firebase_service.get_archived_ticket, ticket_id)
+                if ticket_data:
+                    ticket_data["archived"] = True
+            
+            if not ticket_data:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Ticket not found"
+                )
+            
+            # Add ID to response
+            ticket_data["id"] = ticket_id
+            cached = ticket_cache_service.put_ticket(ticket_id, ticket_data)
         
-        # Add ID to response
-        ticket_data["id"] = ticket_id
-        return ticket_data
+        headers = {"ETag": cached["etag"], "Cache-Control": "no-cache"}
+        if ticket_cache_service.etag_matches(if_none_match, cached["etag"]):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(content=cached["body"], media_type="application/json", headers=headers)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Server error: {str(e)}"
+        )
+
+
+@router.post(
+    "/batch-get",
+    summary="Get many tickets",
+    description="Fetch a list of tickets in a single Firestore round-trip"
+)
+async def batch_get_tickets(request: BatchGetRequest):
+    """
+    Fetch several tickets by ID at once (e.g. a hotspot's ticket list)
+    
+    - **ids**: Ticket document IDs or ticket_id values ("TKT-..."), in the order they should be returned
+    - **fields**: Optional projection; only these fields are returned
+    
+    Returns the found tickets in request order and the IDs that were not found
+    (including IDs that are not valid ticket references)
+    """
+    ticket_ids = list(dict.fromkeys(t for t in request.ids if t))
+    if len(ticket_ids) > BATCH_GET_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many IDs. Maximum {BATCH_GET_MAX_IDS} per request"
+        )
+    
+    try:
+        found = await run_in_threadpool(firebase_service.get_tickets, ticket_ids, request.fields)
+        if found is None:
+            raise Exception("Firestore fetch failed")
+        
+        tickets = []
+        missing = []
+        for ticket_id in ticket_ids:
+            ticket_data = found.get(ticket_id)
+            # Fall back to tickets accepted but not yet flushed to Firestore
+            if ticket_data is None:
+                ticket_data = ticket_outbox.get_pending(ticket_id)
+                if ticket_data is not None and request.fields:
+                    ticket_data = {k: v for k, v in ticket_data.items() if k in request.fields or k == "id"}
+            if ticket_data is None:
+                missing.append(ticket_id)
+                continue
+            tickets.append(ticket_data)
+        
+        return {"success": True, "count": len(tickets), "tickets": tickets, "missing": missing}
     
     except HTTPException:
         raise
@@ -420,13 +873,15 @@ async def get_ticket(ticket_id: str):
 )
 async def list_tickets(
     status_filter: Optional[str] = None,
-    issue_type: Optional[str] = None
+    issue_type: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
 ):
     """
     List all tickets with optional filtering
     
     - **status_filter**: Filter by status (pending, resolved, etc.)
     - **issue_type**: Filter by issue type (Pothole, Garbage, Broken Pipe)
+    - **If-None-Match**: ETag from a previous response; returns 304 if no ticket changed
     """
     try:
         filters = {}
@@ -435,8 +890,29 @@ async def list_tickets(
         if issue_type:
             filters["issue_type"] = issue_type
         
-        tickets = firebase_service.list_tickets(filters)
-        return {"success": True, "count": len(tickets), "tickets": tickets}
+        # Derive the ETag from a count plus the newest updated_at, so an
+        # unchanged list is answered with 304 before any ticket is read
+        version = await run_in_threadpool(firebase_service.get_tickets_version, filters)
+        if version is not None:
+            etag = ticket_cache_service.compute_etag([], sorted(filters.items()), version)
+            headers = {"ETag": etag, "Cache-Control": "no-cache"}
+            if ticket_cache_service.etag_matches(if_none_match, etag):
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        
+        tickets = await run_in_threadpool(firebase_service.list_tickets, filters)
+        
+        if version is None:
+            etag = ticket_cache_service.compute_etag(
+                ((t["id"], t.get("updated_at")) for t in tickets), sorted(filters.items())
+            )
+            headers = {"ETag": etag, "Cache-Control": "no-cache"}
+            if ticket_cache_service.etag_matches(if_none_match, etag):
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        
+        body = ticket_cache_service.get_body(
+            etag, lambda: {"success": True, "count": len(tickets), "tickets": tickets}
+        )
+        return Response(content=body, media_type="application/json", headers=headers)
     
     except Exception as e:
         raise HTTPException(
@@ -483,6 +959,12 @@ async def update_ticket(
                 detail="Ticket not found or update failed"
             )
         
+        ticket_cache_service.invalidate(ticket_id)
+        
+        # Closed tickets should no longer absorb new reports
+        if update_data.get("status") in CLOSED_STATUSES:
+            dedupe_service.discard(ticket_id)
+        
         return {"success": True, "message": "Ticket updated successfully"}
     
     except HTTPException:
@@ -525,38 +1007,9 @@ def _calculate_location_priority(latitude: float, longitude: float, radius_km: f
         dict with nearby_ticket_count, priority_boost, and highlighted status
     """
     try:
-        # Get all tickets from Firebase
-        all_tickets = firebase_service.list_tickets(limit=1000)
-        
-        # Calculate distance to other tickets using Haversine formula
-        from math import radians, sin, cos, sqrt, atan2
-        
-        nearby_tickets = 0
-        
-        for ticket in all_tickets:
-            if ticket.get("status") == "closed":
-                continue  # Skip closed tickets
-            
-            ticket_lat = ticket.get("latitude")
-            ticket_lon = ticket.get("longitude")
-            
-            if not ticket_lat or not ticket_lon:
-                continue
-            
-            # Haversine formula to calculate distance
-            R = 6371  # Earth's radius in km
-            lat1, lon1 = radians(latitude), radians(longitude)
-            lat2, lon2 = radians(ticket_lat), radians(ticket_lon)
-            
-            dlat = lat2 - lat1
-            dlon = lon2 - lon1
-            
-            a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-            c = 2 * atan2(sqrt(a), sqrt(1-a))
-            distance = R * c
-            
-            if distance <= radius_km:
-                nearby_tickets += 1
+        # Read only the geohash cells around the location instead of the whole collection
+        nearby = firebase_service.query_tickets_near(latitude, longitude, radius_km)
+        nearby_tickets = sum(1 for ticket in nearby if ticket.get("status") != "closed")
         
         # Calculate priority boost based on ticket density
         priority_boost = min(nearby_tickets * 0.15, 0.5)  # Max 50% boost
@@ -584,6 +1037,7 @@ def _calculate_location_priority(latitude: float, longitude: float, radius_km: f
     description="Create a ticket manually with automatic priority scoring based on location density"
 )
 async def create_manual_ticket(
+    response: Response,
     issue_type: str = Form(..., description="Type of issue: pothole, garbage, broken_pipe, etc."),
     title: str = Form(..., description="Ticket title"),
     description: str = Form(..., description="Detailed description"),
@@ -591,14 +1045,41 @@ async def create_manual_ticket(
     longitude: float = Form(..., description="Longitude of the location"),
     severity_level: Optional[str] = Form("moderate", description="Severity: low, moderate, high, critical"),
     department: Optional[str] = Form(None, description="Department responsible"),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", description="Client-generated key to make retries safe"),
 ):
     """
     Create a manual ticket and calculate priority based on location density.
     If multiple tickets exist at the same location, priority is increased.
+    Retries carrying the same Idempotency-Key header return the original response.
     
     Returns:
         Ticket object with priority_score and is_highlighted fields
     """
+    result, replayed = await idempotency_service.run(
+        "create-manual",
+        idempotency_key,
+        idempotency_service.fingerprint(
+            issue_type, title, description, latitude, longitude, severity_level, department
+        ),
+        lambda: _create_manual_ticket(
+            issue_type, title, description, latitude, longitude, severity_level, department
+        ),
+    )
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
+
+
+async def _create_manual_ticket(
+    issue_type: str,
+    title: str,
+    description: str,
+    latitude: float,
+    longitude: float,
+    severity_level: Optional[str],
+    department: Optional[str],
+) -> dict:
+    """Create (or merge) the manual ticket"""
     try:
         # Validate coordinates
         if not (-90 <= latitude <= 90) or not (-180 <= longitude <= 180):
@@ -615,6 +1096,29 @@ async def create_manual_ticket(
                 detail=f"Invalid severity level. Allowed: {', '.join(valid_severities)}"
             )
         
+        # Merge into an existing open ticket for the same issue at this spot
+        duplicate = await run_in_threadpool(dedupe_service.find_duplicate, issue_type, latitude, longitude)
+        if duplicate and await run_in_threadpool(dedupe_service.merge_report, duplicate, {
+            "latitude": latitude,
+            "longitude": longitude,
+            "title": title,
+            "description": description,
+            "source": "web-form",
+        }):
+            ticket_cache_service.invalidate(duplicate["ref"])
+            return {
+                "success": True,
+                "ticket_id": duplicate.get("ticket_id") or duplicate["ref"],
+                "message": "Report merged into existing ticket",
+                "duplicate_of_existing": True,
+                "data": {
+                    "ticket_id": duplicate.get("ticket_id") or duplicate["ref"],
+                    "report_count": duplicate["report_count"],
+                    "latitude": duplicate["latitude"],
+                    "longitude": duplicate["longitude"]
+                }
+            }
+        
         # Generate ticket ID
         import uuid
         ticket_num = str(uuid.uuid4())[:8].upper()
@@ -651,6 +1155,7 @@ async def create_manual_ticket(
             "latitude": latitude,
             "longitude": longitude,
             "ward": ward_code if ward_code else "Unknown",
+            **geohash_fields(latitude, longitude),
             
             "title": title,
             "description": description,
@@ -663,17 +1168,20 @@ async def create_manual_ticket(
                 "search_radius_km": location_priority["search_radius_km"]
             },
             
+            "report_count": 1,
             "created_by": "manual",
             "source": "web-form"
         }
         
-        # Save ticket to Firebase
-        firebase_service.save_ticket(ticket_data)
+        # Save ticket via the outbox; the background worker writes it to Firestore
+        doc_id = ticket_outbox.enqueue(ticket_data)
+        dedupe_service.register(doc_id, ticket_data)
         
         return {
             "success": True,
             "ticket_id": generated_ticket_id,
             "message": "Ticket created successfully",
+            "duplicate_of_existing": False,
             "data": {
                 "ticket_id": generated_ticket_id,
                 "title": title,
@@ -0,0 +1,240 @@
+"""
+Resumable bulk-migration runner for Firestore collections.
+
+A migration is a named per-document transform: it receives the document data
+and returns the fields to update (or an empty dict / None to leave it alone).
+The runner scans the collection in pages ordered by document ID, writes each
+page back to the same collection through FirebaseService.update_documents_bulk
+on a small thread pool, and checkpoints the cursor after every contiguous run
+of completed pages so an interrupted migration resumes where it stopped.
+"""
+
+import argparse
+import json
+import os
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+from google.cloud.firestore_v1.field_path import FieldPath
+
+from services.firebase_service import firebase_service
+
+
+CHECKPOINT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".migration_state")
+
+
+@dataclass
+class Migration:
+    """A named, declarative per-document transform"""
+    name: str
+    transform: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]
+    collection: str = "tickets"
+    description: str = ""
+
+
+class MigrationRunner:
+    """Runs a Migration over a collection with paging, checkpoints and parallel writes"""
+
+    def __init__(self, migration: Migration, page_size: int = 500, workers: int = 4, dry_run: bool = False):
+        self.migration = migration
+        self.page_size = page_size
+        self.workers = workers
+        self.dry_run = dry_run
+        self.checkpoint_path = os.path.join(CHECKPOINT_DIR, f"{migration.name}.json")
+
+    def run(self, reset: bool = False) -> Dict[str, Any]:
+        """
+        Run the migration to completion
+
+        Args:
+            reset: Ignore any saved checkpoint and start from the beginning
+
+        Returns:
+            Summary with scanned/changed/written/failed counts and per-field diff counts
+        """
+        db = firebase_service.db
+        if db is None:
+            raise Exception("Firebase not initialized")
+        collection = db.collection(self.migration.collection)
+
+        state = {} if (reset or self.dry_run) else self._load_checkpoint()
+        # Counts up to the checkpointed cursor; pages still being written are added as they complete
+        stats = {
+            "scanned": state.get("scanned", 0),
+            "changed": state.get("changed", 0),
+            "written": state.get("written", 0),
+            "failed": state.get("failed", 0),
+        }
+        field_diffs = Counter(state.get("field_diffs", {}))
+        last_doc_id = state.get("last_doc_id")
+        # Progress including pages scanned but not yet written, for reporting only
+        progress = {"scanned": stats["scanned"], "changed": stats["changed"]}
+
+        total = self._count(collection)
+        if last_doc_id:
+            print(f"Resuming '{self.migration.name}' after document {last_doc_id} ({stats['scanned']} already scanned)")
+
+        query = collection.order_by(FieldPath.document_id()).limit(self.page_size)
+        cursor = collection.document(last_doc_id).get() if last_doc_id else None
+
+        started = time.monotonic()
+        scanned_this_run = 0
+        pending = deque()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while True:
+                page_query = query.start_after(cursor) if cursor is not None else query
+                docs = list(page_query.stream())
+                if not docs:
+                    break
+
+                updates = {}
+                page_diffs = Counter()
+                for doc in docs:
+                    changes = self.migration.transform(doc.to_dict() or {})
+                    if changes:
+                        updates[doc.id] = changes
+                        page_diffs.update(changes.keys())
+
+                progress["scanned"] += len(docs)
+                progress["changed"] += len(updates)
+                scanned_this_run += len(docs)
+                cursor = docs[-1]
+                page = {"scanned": len(docs), "changed": len(updates), "field_diffs": page_diffs}
+
+                if self.dry_run:
+                    self._add_page(stats, field_diffs, page, {"written": [], "failed": {}})
+                else:
+                    future = executor.submit(
+                        firebase_service.update_documents_bulk, self.migration.collection, updates
+                    ) if updates else None
+                    pending.append((future, cursor.id, page))
+                    self._drain(pending, stats, field_diffs, block=len(pending) > self.workers)
+
+                self._report(progress, stats, scanned_this_run, total, started)
+
+                if len(docs) < self.page_size:
+                    break
+
+            if not self.dry_run:
+                self._drain(pending, stats, field_diffs, block=True)
+
+        elapsed = time.monotonic() - started
+        summary = dict(stats, field_diffs=dict(field_diffs), dry_run=self.dry_run, elapsed_seconds=round(elapsed, 1))
+        if not self.dry_run:
+            self._save_checkpoint(dict(summary, last_doc_id=None, completed=True))
+        return summary
+
+    def _drain(self, pending: deque, stats: Dict[str, int], field_diffs: Counter, block: bool) -> None:
+        """Collect finished page writes in scan order and checkpoint after each one"""
+        while pending:
+            future, last_doc_id, page = pending[0]
+            if future is not None and not future.done() and not block:
+                return
+            result = future.result() if future is not None else {"written": [], "failed": {}}
+            pending.popleft()
+            self._add_page(stats, field_diffs, page, result)
+            for doc_id, error in result["failed"].items():
+                print(f"Failed to update {doc_id}: {error}")
+            self._save_checkpoint(dict(stats, field_diffs=dict(field_diffs), last_doc_id=last_doc_id))
+            if block and len(pending) <= self.workers:
+                block = False
+
+    @staticmethod
+    def _add_page(stats: Dict[str, int], field_diffs: Counter, page: Dict[str, Any], result: Dict[str, Any]) -> None:
+        """Count a completed page into the checkpointed totals"""
+        stats["scanned"] += page["scanned"]
+        stats["changed"] += page["changed"]
+        stats["written"] += len(result["written"])
+        stats["failed"] += len(result["failed"])
+        field_diffs.update(page["field_diffs"])
+
+    def _report(
+        self,
+        progress: Dict[str, int],
+        stats: Dict[str, int],
+        scanned_this_run: int,
+        total: Optional[int],
+        started: float
+    ) -> None:
+        elapsed = max(time.monotonic() - started, 1e-6)
+        rate = scanned_this_run / elapsed
+        line = f"[{self.migration.name}] scanned {progress['scanned']}"
+        if total:
+            remaining = max(total - progress["scanned"], 0)
+            eta = remaining / rate if rate else 0
+            line += f"/{total} ({progress['scanned'] * 100 // total}%)"
+            line += f", {rate:.0f} docs/s, ETA {eta:.0f}s"
+        else:
+            line += f", {rate:.0f} docs/s"
+        line += f", changed {progress['changed']}"
+        if not self.dry_run:
+            line += f", written {stats['written']}, failed {stats['failed']}"
+        print(line)
+
+    @staticmethod
+    def _count(collection) -> Optional[int]:
+        """Total documents via an aggregation query (no document reads)"""
+        try:
+            return collection.count().get()[0][0].value
+        except Exception as e:
+            print(f"Could not count collection, ETA unavailable: {e}")
+            return None
+
+    def _load_checkpoint(self) -> Dict[str, Any]:
+        if not os.path.exists(self.checkpoint_path):
+            return {}
+        with open(self.checkpoint_path, "r") as f:
+            state = json.load(f)
+        # A completed run starts over so the migration can be re-applied safely
+        return {} if state.get("completed") else state
+
+    def _save_checkpoint(self, state: Dict[str, Any]) -> None:
+        os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, self.checkpoint_path)
+
+
+def build_arg_parser(description: str) -> argparse.ArgumentParser:
+    """Common command-line options for migration scripts"""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--dry-run", action="store_true", help="Compute changes and diff counts without writing")
+    parser.add_argument("--yes", "-y", action="store_true", help="Do not ask for confirmation")
+    parser.add_argument("--reset", action="store_true", help="Ignore the saved checkpoint and start over")
+    parser.add_argument("--page-size", type=int, default=500, help="Documents read per page")
+    parser.add_argument("--workers", type=int, default=4, help="Pages written in parallel")
+    return parser
+
+
+def run_cli(migration: Migration) -> None:
+    """Parse command-line options and run a migration"""
+    args = build_arg_parser(migration.description or migration.name).parse_args()
+
+    print("=" * 60)
+    print(f"Migration: {migration.name}")
+    if migration.description:
+        print(migration.description)
+    print("=" * 60)
+
+    if not args.dry_run and not args.yes:
+        response = input("\nDo you want to proceed? (yes/no): ").strip().lower()
+        if response not in ["yes", "y"]:
+            print("\n❌ Migration cancelled by user")
+            return
+
+    runner = MigrationRunner(migration, page_size=args.page_size, workers=args.workers, dry_run=args.dry_run)
+    summary = runner.run(reset=args.reset)
+
+    print("=" * 60)
+    print("Dry run complete (no writes)" if args.dry_run else "Migration complete!")
+    print(f"Scanned: {summary['scanned']}  Changed: {summary['changed']}", end="")
+    if not args.dry_run:
+        print(f"  Written: {summary['written']}  Failed: {summary['failed']}", end="")
+    print(f"  Time: {summary['elapsed_seconds']}s")
+    for field, count in sorted(summary["field_diffs"].items()):
+        print(f"  {field}: {count} documents")
+    print("=" * 60)
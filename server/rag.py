@@ -1,5 +1,5 @@
 import os
-from typing import Optional, List, Any, Dict
+from typing import Optional, List, Any, Dict, Callable
 from dotenv import load_dotenv
 
 # Load environment variables FIRST before any imports
@@ -11,58 +11,258 @@ if not os.getenv("USER_AGENT"):
 
 from fastapi import FastAPI, HTTPException, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field, create_model
+from contextlib import asynccontextmanager
 import aiofiles
 import json
+import asyncio
+import inspect
+import hashlib
 import tempfile
+import threading
+import time
+from collections import OrderedDict
 from functools import lru_cache
 
 # LangChain & Groq
 from langchain_groq import ChatGroq
 from langchain_huggingface import HuggingFaceEndpointEmbeddings
 from langchain_community.vectorstores import FAISS
-from langchain_community.document_loaders import AsyncHtmlLoader, TextLoader
-from langchain_community.document_transformers import Html2TextTransformer
+from langchain_community.document_loaders import TextLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.documents import Document
+import faiss
+import numpy as np
 
-app = FastAPI(title="Groq Universal RAG API", version="1.0.0")
+from services.knowledge_base_index import index_exists, load_index, source_hash
+from services.embedding_cache import EmbeddingCache, CachedEmbeddings
+from services.embedding_executor import BatchedEmbeddings
+from services.bm25_index import BM25Index, is_lexical_query, reciprocal_rank_fusion
+from services.answer_cache import AnswerCache
+from services.vector_collections import VectorCollection
+from services.url_fetch_cache import UrlFetchCache
+from services.context_builder import build_context
+from services.markdown_sections import split_markdown_documents, section_matches
+from services.document_extraction import ExtractionError, iter_pages, shutdown_executor
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load the prebuilt knowledge base index once at startup and stop the extraction pool on shutdown"""
+    try:
+        get_knowledge_base()
+    except HTTPException as e:
+        print(f"⚠ Knowledge base index not loaded: {e.detail}")
+    yield
+    shutdown_executor()
+
+
+app = FastAPI(title="Groq Universal RAG API", version="1.0.0", lifespan=lifespan)
+
+# --- CONFIGURATION ---
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+KNOWLEDGE_BASE_CACHE_KEY = "knowledge_base_faiss"
+FILE_CACHE_TTL = int(os.getenv("FILE_CACHE_TTL", "3600"))  # Cache file-based vector stores for 1 hour
+VECTOR_CACHE_MAX_BYTES = int(os.getenv("VECTOR_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+EMBEDDING_CACHE_DIR = os.getenv(
+    "EMBEDDING_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "embedding_cache")
+)
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+EMBEDDING_CONCURRENCY = int(os.getenv("EMBEDDING_CONCURRENCY", "4"))
+EMBEDDING_MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES", "3"))
+CHUNK_SIZE = 1200
+CHUNK_OVERLAP = 200
+RETRIEVAL_K = 5
+RETRIEVAL_FETCH_K = 20  # Candidates taken from each retriever before rank fusion
+RETRIEVAL_MODES = ("auto", "hybrid", "vector", "keyword")
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))
+ANSWER_CACHE_TTL = int(os.getenv("ANSWER_CACHE_TTL", "3600"))
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.92"))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1000"))
+URL_CACHE_DIR = os.getenv(
+    "URL_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "url_cache")
+)
+URL_CACHE_MAX_STALENESS = int(os.getenv("URL_CACHE_MAX_STALENESS", "900"))
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", str(max((os.cpu_count() or 2) // 2, 1))))
+EXTRACTION_TIMEOUT = float(os.getenv("EXTRACTION_TIMEOUT", "120"))
+KNOWLEDGE_BASE_PATH = os.getenv(
+    "KNOWLEDGE_BASE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "knowledge_base.md")
+)
+KNOWLEDGE_BASE_INDEX_DIR = os.getenv(
+    "KNOWLEDGE_BASE_INDEX_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "kb_index")
+)
+LLM_MODEL = "openai/gpt-oss-120b"
 
 # --- CACHING LAYER ---
 class VectorStoreCache:
-    """In-memory cache for embeddings and vector stores"""
-    def __init__(self):
-        self.cache = {}
+    """
+    In-memory LRU cache for embeddings and vector stores.
+
+    Entries are keyed by a hash of the source content and chunking parameters,
+    expire after a TTL, and are evicted least-recently-used first once their
+    estimated size exceeds the byte budget. Pinned entries (the knowledge base
+    index) never expire and are not evicted.
+    """
+    def __init__(self, max_bytes: int = VECTOR_CACHE_MAX_BYTES, ttl: int = FILE_CACHE_TTL):
+        self.cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
         self.embeddings_instance = None
+        self.embedding_executor = None
+        self.embedding_cache = EmbeddingCache(EMBEDDING_CACHE_DIR, EMBEDDING_MODEL)
+        self.knowledge_base_manifest = None
     
     def get_embeddings(self):
-        """Singleton pattern for embeddings instance"""
+        """Singleton pattern for embeddings instance: chunk cache in front of the batched executor"""
         if self.embeddings_instance is None:
-            self.embeddings_instance = HuggingFaceEndpointEmbeddings(
-                model="sentence-transformers/all-MiniLM-L6-v2",
-                huggingfacehub_api_token=os.getenv("HUGGINGFACE_API_KEY")
+            self.embedding_executor = BatchedEmbeddings(
+                HuggingFaceEndpointEmbeddings(
+                    model=EMBEDDING_MODEL,
+                    huggingfacehub_api_token=os.getenv("HUGGINGFACE_API_KEY")
+                ),
+                batch_size=EMBEDDING_BATCH_SIZE,
+                concurrency=EMBEDDING_CONCURRENCY,
+                max_retries=EMBEDDING_MAX_RETRIES
             )
+            self.embeddings_instance = CachedEmbeddings(self.embedding_executor, self.embedding_cache)
         return self.embeddings_instance
+
+    @staticmethod
+    def content_key(content, chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP) -> str:
+        """
+        Build a cache key from source content and the parameters used to index it
+
+        Args:
+            content: Source bytes or text
+            chunk_size: Splitter chunk size
+            chunk_overlap: Splitter chunk overlap
+
+        Returns:
+            Hex digest identifying the vector store
+        """
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        digest = hashlib.sha256(content)
+        digest.update(f"|{chunk_size}|{chunk_overlap}|{EMBEDDING_MODEL}".encode("utf-8"))
+        return digest.hexdigest()
+
+    @staticmethod
+    def estimate_size(vectorstore) -> int:
+        """Approximate memory held by a FAISS vector store in bytes"""
+        index = vectorstore.index
+        size = index.ntotal * index.d * 4
+        for doc in getattr(vectorstore.docstore, "_dict", {}).values():
+            size += len(doc.page_content.encode("utf-8")) + len(json.dumps(doc.metadata, default=str))
+        return size
     
     def get_vectorstore(self, key: str):
-        """Retrieve cached vector store by key"""
-        return self.cache.get(key)
+        """Retrieve cached vector store by key, or None if missing or expired"""
+        with self._lock:
+            entry = self.cache.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry["expires_at"] is not None and entry["expires_at"] <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self.cache.move_to_end(key)
+            self.hits += 1
+            return entry["vectorstore"]
     
-    def set_vectorstore(self, key: str, vectorstore):
-        """Cache a vector store with expiry consideration"""
-        self.cache[key] = vectorstore
+    def set_vectorstore(self, key: str, vectorstore, label: Optional[str] = None, pinned: bool = False):
+        """
+        Cache a vector store, evicting least recently used entries over the byte budget
+
+        Args:
+            key: Cache key, normally from content_key
+            vectorstore: FAISS vector store
+            label: Human readable name shown in cache status (e.g. filename)
+            pinned: Keep the entry regardless of TTL and byte budget
+        """
+        bm25 = BM25Index.from_vectorstore(vectorstore)
+        size = self.estimate_size(vectorstore) + bm25.size_bytes()
+        with self._lock:
+            self._remove(key)
+            self.cache[key] = {
+                "vectorstore": vectorstore,
+                "bm25": bm25,
+                "label": label or key[:12],
+                "size_bytes": size,
+                "pinned": pinned,
+                "expires_at": None if pinned else time.monotonic() + self.ttl,
+            }
+            self.total_bytes += size
+            for old_key in [k for k, e in self.cache.items() if not e["pinned"]]:
+                if self.total_bytes <= self.max_bytes or old_key == key:
+                    break
+                self._remove(old_key)
+                self.evictions += 1
+
+    def get_bm25(self, key: str) -> Optional[BM25Index]:
+        """Get the keyword index built alongside a cached vector store"""
+        with self._lock:
+            entry = self.cache.get(key)
+            return entry["bm25"] if entry else None
+
+    def remove(self, key: str):
+        """Drop a cached vector store"""
+        with self._lock:
+            self._remove(key)
     
-    def clear_cache(self):
-        """Clear all cached vector stores"""
-        self.cache.clear()
+    def clear_cache(self) -> int:
+        """
+        Clear cached vector stores, keeping pinned ones (the prebuilt knowledge base)
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            unpinned = [k for k, e in self.cache.items() if not e["pinned"]]
+            for key in unpinned:
+                self._remove(key)
+            return len(unpinned)
     
     def cache_size(self):
         """Get number of cached vector stores"""
         return len(self.cache)
 
+    def stats(self) -> Dict[str, Any]:
+        """Get cache usage counters"""
+        with self._lock:
+            return {
+                "entries": len(self.cache),
+                "total_bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "keys": [
+                    {"key": k, "label": e["label"], "size_bytes": e["size_bytes"], "pinned": e["pinned"]}
+                    for k, e in self.cache.items()
+                ],
+            }
+
+    def _remove(self, key: str):
+        entry = self.cache.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry["size_bytes"]
+
 # Initialize global cache
 vector_cache = VectorStoreCache()
+answer_cache = AnswerCache(ANSWER_CACHE_TTL, ANSWER_CACHE_SIMILARITY, ANSWER_CACHE_MAX_ENTRIES)
+url_cache = UrlFetchCache(URL_CACHE_DIR, URL_CACHE_MAX_STALENESS)
+# Incrementally updated vector stores, keyed by document ID
+collections: Dict[str, VectorCollection] = {}
 
 # Enable CORS for all origins
 app.add_middleware(
@@ -73,16 +273,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# --- CONFIGURATION ---
-EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
-KNOWLEDGE_BASE_CACHE_KEY = "knowledge_base_faiss"
-FILE_CACHE_TTL = 3600  # Cache file-based vector stores for 1 hour
 
 # --- DATA MODELS ---
 
 class RAGRequest(BaseModel):
     source_url: Optional[str] = Field(None, description="URL to scrape")
     source_text: Optional[str] = Field(None, description="Raw text content")
+    source_max_age: Optional[int] = Field(
+        None,
+        description="Seconds a cached copy of source_url may be used without revalidation (0 always revalidates)"
+    )
     query: str = Field(..., description="User question")
     system_prompt: str = Field(
         "You are a helpful AI. Answer based strictly on the context provided.",
@@ -92,24 +292,78 @@ class RAGRequest(BaseModel):
         None, 
         description="JSON Schema as string for structured output. If None, returns string."
     )
+    retrieval_mode: str = Field(
+        "auto",
+        description="auto, hybrid (BM25 + vector), vector or keyword. auto skips embedding for lexical queries."
+    )
+    stream: bool = Field(
+        False,
+        description="Stream the answer as server-sent events (sources first, then tokens)"
+    )
+    use_answer_cache: bool = Field(
+        True,
+        description="Serve repeated or near-identical questions from the answer cache"
+    )
+    section_filter: Optional[str] = Field(
+        None,
+        description="Only search markdown sections whose heading path matches, e.g. 'User Roles > Officer'"
+    )
 
 class RAGResponse(BaseModel):
     result: Any
     used_sources: List[str]
+    cached: bool = False
+    context_stats: Optional[Dict[str, int]] = None
+
+class KnowledgeBaseQuery(BaseModel):
+    query: str = Field(..., description="User question")
+    system_prompt: str = Field(
+        "You are a helpful AI. Answer based strictly on the context provided.",
+        description="System instructions"
+    )
+    response_schema: Optional[str] = Field(
+        None,
+        description="JSON Schema as string for structured output. If None, returns string."
+    )
+    retrieval_mode: str = Field(
+        "auto",
+        description="auto, hybrid (BM25 + vector), vector or keyword. auto skips embedding for lexical queries."
+    )
+    stream: bool = Field(
+        False,
+        description="Stream the answer as server-sent events (sources first, then tokens)"
+    )
+    use_answer_cache: bool = Field(
+        True,
+        description="Serve repeated or near-identical questions from the answer cache"
+    )
+    section_filter: Optional[str] = Field(
+        None,
+        description="Only search markdown sections whose heading path matches, e.g. 'User Roles > Officer'"
+    )
+
+class SectionInput(BaseModel):
+    section_id: str = Field(..., description="Stable ID of the section within the document")
+    text: str = Field(..., description="Section content")
+    metadata: Optional[Dict[str, Any]] = Field(None, description="Extra metadata stored on each chunk")
+
+class UpsertRequest(BaseModel):
+    sections: List[SectionInput] = Field(default_factory=list, description="Sections to add or replace")
+    delete_section_ids: List[str] = Field(default_factory=list, description="Sections to remove")
+    delete_missing: bool = Field(
+        False,
+        description="Remove stored sections not included in this request (full document sync)"
+    )
 
 # --- HELPER FUNCTIONS ---
 
-def load_and_process_data(url: str = None, text: str = None) -> List[Document]:
+def load_documents(url: str = None, text: str = None, max_staleness: Optional[int] = None) -> List[Document]:
     docs = []
     
-    # 1. Scrape URL (if provided)
+    # 1. Scrape URL (if provided), served from the fetch cache while fresh
     if url:
         try:
-            loader = AsyncHtmlLoader([url])
-            raw_docs = loader.load()
-            # Convert HTML to clean Markdown
-            html2text = Html2TextTransformer()
-            docs.extend(html2text.transform_documents(raw_docs))
+            docs.append(url_cache.fetch(url, max_staleness))
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Scraping failed: {str(e)}")
 
@@ -119,172 +373,402 @@ def load_and_process_data(url: str = None, text: str = None) -> List[Document]:
 
     if not docs:
         raise HTTPException(status_code=400, detail="No source provided.")
+    return docs
 
-    # 3. Split Text
-    splitter = RecursiveCharacterTextSplitter(chunk_size=1200, chunk_overlap=200)
-    return splitter.split_documents(docs)
+def split_documents(docs: List[Document]) -> List[Document]:
+    """Split documents into chunks; markdown is first split at headings so chunks carry their section_path"""
+    markdown = [d for d in docs if is_markdown(d)]
+    other = [d for d in docs if not is_markdown(d)]
+    # start_index lets the context builder merge overlapping neighbours
+    splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP, add_start_index=True)
+    return splitter.split_documents(split_markdown_documents(markdown) + other)
 
-# --- CORE ENDPOINT ---
+def is_markdown(doc: Document) -> bool:
+    if "section_path" in doc.metadata:
+        return False  # Already a section
+    source = str(doc.metadata.get("source", "")).lower()
+    return doc.metadata.get("format") == "markdown" or source.endswith((".md", ".markdown"))
 
-@app.post("/generate", response_model=RAGResponse)
-async def generate_rag(request: RAGRequest):
-    # 1. Check API Key
-    if not os.getenv("GROQ_API_KEY"):
-        raise HTTPException(status_code=500, detail="GROQ_API_KEY is missing.")
+def get_or_build_vectorstore(cache_key: str, docs: List[Document], label: str, use_cache: bool = True, split: bool = True):
+    """
+    Get a cached vector store for the content key, or split and embed the documents
+
+    Pass split=False when docs are already chunks.
+
+    Returns:
+        Tuple of (vector store, whether it came from the cache)
+    """
+    if use_cache:
+        vectorstore = vector_cache.get_vectorstore(cache_key)
+        if vectorstore is not None:
+            print(f"✓ Using cached vector store for {label}")
+            return vectorstore, True
+
+    vectorstore = FAISS.from_documents(split_documents(docs) if split else docs, vector_cache.get_embeddings())
+    if use_cache:
+        vector_cache.set_vectorstore(cache_key, vectorstore, label=label)
+        print(f"✓ Cached vector store for {label}. Total cached: {vector_cache.cache_size()}")
+    return vectorstore, False
+
+def get_bm25_index(cache_key: str, vectorstore) -> BM25Index:
+    """Get the cached keyword index for a vector store, building one if it is not cached"""
+    return vector_cache.get_bm25(cache_key) or BM25Index.from_vectorstore(vectorstore)
+
+def uses_query_embedding(query: str, mode: str) -> bool:
+    """Whether retrieval in this mode will embed the query"""
+    return mode in ("vector", "hybrid") or (mode == "auto" and not is_lexical_query(query))
+
+
+def filtered_similarity_search(vectorstore, query_embedding: List[float], positions: List[int], k: int) -> List[Document]:
+    """
+    Vector search restricted to the given FAISS positions
+
+    Searches only the selected slice of the index with a FAISS ID selector,
+    falling back to post-filtering a wider search on FAISS builds without
+    search parameters.
+    """
+    if not positions:
+        return []
+    vector = np.asarray([query_embedding], dtype=np.float32)
+    if getattr(vectorstore, "_normalize_L2", False):
+        faiss.normalize_L2(vector)
+    try:
+        selector = faiss.IDSelectorBatch(np.asarray(positions, dtype=np.int64))
+        _, indices = vectorstore.index.search(vector, min(k, len(positions)), params=faiss.SearchParameters(sel=selector))
+        found = [int(i) for i in indices[0] if i != -1]
+    except (AttributeError, TypeError, RuntimeError) as e:
+        print(f"⚠ FAISS ID selector unavailable ({e}); post-filtering a wider search")
+        allowed = set(positions)
+        _, indices = vectorstore.index.search(vector, min(max(k * 20, 200), vectorstore.index.ntotal))
+        found = [int(i) for i in indices[0] if i in allowed][:k]
+    return [vectorstore.docstore.search(vectorstore.index_to_docstore_id[i]) for i in found]
+
+
+def retrieve_documents(
+    vectorstore,
+    bm25: BM25Index,
+    query: str,
+    mode: str = "auto",
+    k: int = RETRIEVAL_K,
+    query_embedding: Optional[List[float]] = None,
+    section_filter: Optional[str] = None
+) -> List[Document]:
+    """
+    Retrieve context chunks for a query
+
+    Args:
+        vectorstore: FAISS vector store
+        bm25: Keyword index over the same chunks
+        query: User question
+        mode: "vector", "keyword", "hybrid" (BM25 and vector fused by reciprocal
+            rank fusion) or "auto" (keyword only for short lexical queries such as
+            ward codes or ticket IDs, hybrid otherwise)
+        k: Number of chunks to return
+        query_embedding: Precomputed query embedding, saving a remote call
+        section_filter: Only search chunks whose section path matches, e.g.
+            "User Roles > Officer" (see section_matches)
+
+    Returns:
+        Retrieved documents, best first
+    """
+    if mode not in RETRIEVAL_MODES:
+        raise HTTPException(status_code=400, detail=f"retrieval_mode must be one of {', '.join(RETRIEVAL_MODES)}")
 
-    # 2. Ingest & Split
-    splits = load_and_process_data(request.source_url, request.source_text)
+    allowed = None
+    if section_filter:
+        allowed = bm25.matching(lambda doc: section_matches(doc.metadata.get("section_path"), section_filter))
+        if not allowed:
+            raise HTTPException(status_code=400, detail=f"section_filter '{section_filter}' matches no sections")
 
-    # 3. Embed & Index (Ephemeral / In-Memory with Caching)
-    # Reuse embeddings instance to avoid reinitialization
-    embeddings = vector_cache.get_embeddings()
-    vectorstore = FAISS.from_documents(splits, embeddings)
-    retriever = vectorstore.as_retriever(search_kwargs={"k": 5})
+    def vector_search(fetch_k: int) -> List[Document]:
+        if allowed is not None:
+            embedding = query_embedding or vector_cache.get_embeddings().embed_query(query)
+            return filtered_similarity_search(vectorstore, embedding, [bm25.positions[i] for i in allowed], fetch_k)
+        if query_embedding is not None:
+            return vectorstore.similarity_search_by_vector(query_embedding, k=fetch_k)
+        return vectorstore.similarity_search(query, k=fetch_k)
 
-    # 4. Retrieve Context
-    retrieved_docs = retriever.invoke(request.query)
-    context_text = "\n\n".join([d.page_content for d in retrieved_docs])
+    if mode == "vector":
+        return vector_search(k)
 
-    # 5. Initialize Groq LLM
-    # 'mixtral-8x7b-32768' or 'llama3-70b-8192' are great free options on Groq
-    llm = ChatGroq(
+    keyword_docs = [doc for doc, _ in bm25.search(query, k=RETRIEVAL_FETCH_K, allowed=allowed)]
+    if mode == "keyword" or (mode == "auto" and keyword_docs and is_lexical_query(query)):
+        # No query embedding round-trip
+        return keyword_docs[:k]
+
+    vector_docs = vector_search(RETRIEVAL_FETCH_K)
+    return reciprocal_rank_fusion([vector_docs, keyword_docs], k=k)
+
+RAG_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "{system_prompt}"),
+    ("human", "Context: {context}\n\nQuestion: {query}")
+])
+
+def get_llm():
+    return ChatGroq(
         temperature=0,
-        model_name="openai/gpt-oss-120b", 
+        model_name=LLM_MODEL,
         api_key=os.getenv("GROQ_API_KEY")
     )
 
-    # 6. Generate Response
-    
-    if request.response_schema:
-        # --- STRUCTURED MODE (JSON) ---
+def parse_response_schema(response_schema) -> Dict[str, Any]:
+    schema = json.loads(response_schema) if isinstance(response_schema, str) else response_schema
+    if not isinstance(schema, dict) or 'title' not in schema or 'properties' not in schema:
+        raise ValueError("Schema must have 'title' and 'properties' fields")
+    return schema
+
+def generate_response(query: str, context_text: str, system_prompt: str, response_schema: Optional[str] = None) -> Any:
+    """Answer a query from retrieved context, optionally as structured JSON"""
+    llm = get_llm()
+    inputs = {
+        "system_prompt": system_prompt,
+        "context": context_text,
+        "query": query
+    }
+
+    if response_schema:
         try:
-            # Parse schema if it's a JSON string
-            if isinstance(request.response_schema, str):
-                schema = json.loads(request.response_schema)
+            chain = RAG_PROMPT | llm.with_structured_output(parse_response_schema(response_schema))
+            return chain.invoke(inputs)
+        except Exception as e:
+            # Fallback to text if structured fails
+            response_msg = (RAG_PROMPT | llm).invoke(inputs)
+            return f"Note: Structured output failed ({str(e)}). Plain text response:\n{response_msg.content}"
+
+    return (RAG_PROMPT | llm).invoke(inputs).content
+
+def format_sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+def stream_rag_response(
+    query: str,
+    context_text: str,
+    system_prompt: str,
+    used_sources: List[str],
+    response_schema: Optional[str] = None,
+    on_complete: Optional[Callable[[Any], None]] = None,
+    context_stats: Optional[Dict[str, int]] = None
+) -> StreamingResponse:
+    """
+    Stream an answer as server-sent events
+
+    Events, in order: "sources" (list of sources, sent before the LLM is
+    called) and "context" (context packing stats, if given), then "token" per
+    text chunk as it arrives from Groq, or a single "result" for structured
+    output, then "done". Failures are sent as "error".
+    on_complete receives the full answer once generation finishes.
+    """
+    async def event_source():
+        yield format_sse("sources", used_sources)
+        if context_stats:
+            yield format_sse("context", context_stats)
+        try:
+            if response_schema:
+                # Structured output is only valid once complete, so it is sent whole
+                result = await run_in_threadpool(generate_response, query, context_text, system_prompt, response_schema)
+                yield format_sse("result", result)
             else:
-                schema = request.response_schema
-            
-            # Validate schema has required fields
-            if not isinstance(schema, dict) or 'title' not in schema or 'properties' not in schema:
-                raise ValueError("Schema must have 'title' and 'properties' fields")
-            
-            prompt = ChatPromptTemplate.from_messages([
-                ("system", "{system_prompt}"),
-                ("human", "Context: {context}\n\nQuestion: {query}")
-            ])
-            
-            # Bind the schema to the LLM
-            structured_llm = llm.with_structured_output(schema)
-            chain = prompt | structured_llm
-            
-            response = chain.invoke({
-                "system_prompt": request.system_prompt,
-                "context": context_text,
-                "query": request.query
-            })
+                inputs = {
+                    "system_prompt": system_prompt,
+                    "context": context_text,
+                    "query": query
+                }
+                parts = []
+                async for chunk in (RAG_PROMPT | get_llm()).astream(inputs):
+                    if chunk.content:
+                        parts.append(chunk.content)
+                        yield format_sse("token", chunk.content)
+                result = "".join(parts)
+            if on_complete:
+                on_complete(result)
+            yield format_sse("done", {})
         except Exception as e:
-            # Fallback to text mode if structured output fails
-            response = f"Error in structured mode: {str(e)}. Returning as text instead."
+            yield format_sse("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
+
+def stream_cached_response(entry: Dict[str, Any], response_schema: Optional[str] = None) -> StreamingResponse:
+    """Replay a cached answer with the same events as stream_rag_response"""
+    async def event_source():
+        yield format_sse("sources", entry["used_sources"])
+        yield format_sse("result" if response_schema else "token", entry["result"])
+        yield format_sse("done", {"cached": True})
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def answer_query(
+    source_key: str,
+    get_index: Callable[[], Any],
+    query: str,
+    system_prompt: str,
+    response_schema: Optional[str],
+    retrieval_mode: str,
+    sources_for: Callable[[List[Document]], List[str]],
+    stream: bool = False,
+    use_answer_cache: bool = True,
+    section_filter: Optional[str] = None
+):
+    """
+    Retrieve context and answer a query, serving repeated questions from the answer cache
+
+    Args:
+        source_key: Hash of the indexed source content; scopes cached answers
+        get_index: Returns (vector store, BM25 index) for the source; may be a
+            coroutine function. Only called on an answer cache miss, so a hit skips
+            extraction and embedding
+        query: User question
+        system_prompt: System instructions
+        response_schema: Optional JSON schema string for structured output
+        retrieval_mode: auto, hybrid, vector or keyword
+        sources_for: Builds used_sources from the retrieved documents
+        stream: Return a server-sent event stream instead of a RAGResponse
+        use_answer_cache: Look up and store answers in the answer cache
+        section_filter: Restrict retrieval to matching section paths
+
+    Returns:
+        RAGResponse, or StreamingResponse when stream is set
+    """
+    if retrieval_mode not in RETRIEVAL_MODES:
+        raise HTTPException(status_code=400, detail=f"retrieval_mode must be one of {', '.join(RETRIEVAL_MODES)}")
+
+    scope = answer_cache.scope(source_key, system_prompt, response_schema, retrieval_mode, section_filter)
+    query_embedding = None
+    if use_answer_cache:
+        # Only compare embeddings when retrieval would embed the query anyway; lexical
+        # lookups (ticket IDs, ward codes) must match exactly, not by similarity
+        embed_query = vector_cache.get_embeddings().embed_query if uses_query_embedding(query, retrieval_mode) else None
+        entry, query_embedding = await run_in_threadpool(answer_cache.lookup, scope, query, embed_query)
+        if entry is not None:
+            print(f"✓ Answer cache hit for: {query[:60]}")
+            if stream:
+                return stream_cached_response(entry, response_schema)
+            return RAGResponse(result=entry["result"], used_sources=entry["used_sources"], cached=True)
+
+    if inspect.iscoroutinefunction(get_index):
+        vectorstore, bm25 = await get_index()
     else:
-        # --- STANDARD TEXT MODE ---
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", "{system_prompt}"),
-            ("human", "Context: {context}\n\nQuestion: {query}")
-        ])
-        
-        chain = prompt | llm
-        response_msg = chain.invoke({
-            "system_prompt": request.system_prompt,
-            "context": context_text,
-            "query": request.query
-        })
-        response = response_msg.content
-
-    # Cleanup (note: embeddings instance is kept for reuse)
-    del vectorstore
-
-    return RAGResponse(
-        result=response,
-        used_sources=[d.metadata.get("source", "unknown") for d in retrieved_docs]
+        vectorstore, bm25 = await run_in_threadpool(get_index)
+    retrieved_docs = await run_in_threadpool(
+        retrieve_documents, vectorstore, bm25, query, retrieval_mode,
+        query_embedding=query_embedding, section_filter=section_filter
+    )
+    # Merge overlapping chunks and pack them into the token budget
+    context_text, context_stats = build_context(retrieved_docs, CONTEXT_TOKEN_BUDGET)
+    used_sources = sources_for(retrieved_docs)
+    if context_stats["tokens_saved"] or context_stats["tokens_truncated"]:
+        print(f"✓ Context packed: {context_stats['raw_tokens']} -> {context_stats['context_tokens']} tokens "
+              f"({context_stats['tokens_saved']} saved by merging, "
+              f"{context_stats['tokens_truncated']} cut to fit the budget)")
+
+    def remember(result: Any):
+        # Fallback text from a failed structured call is not worth caching
+        if use_answer_cache and not (response_schema and isinstance(result, str)):
+            answer_cache.put(scope, query, result, used_sources, query_embedding)
+
+    if stream:
+        return stream_rag_response(
+            query, context_text, system_prompt, used_sources, response_schema,
+            on_complete=remember, context_stats=context_stats
+        )
+
+    response = await run_in_threadpool(generate_response, query, context_text, system_prompt, response_schema)
+    remember(response)
+    return RAGResponse(result=response, used_sources=used_sources, context_stats=context_stats)
+
+def get_knowledge_base():
+    """Get the knowledge base vector store, memory-mapping the prebuilt index on first use"""
+    vectorstore = vector_cache.get_vectorstore(KNOWLEDGE_BASE_CACHE_KEY)
+    if vectorstore is not None:
+        return vectorstore
+
+    if not index_exists(KNOWLEDGE_BASE_INDEX_DIR):
+        raise HTTPException(
+            status_code=503,
+            detail="Knowledge base index not built. Run: python build_knowledge_index.py"
+        )
+
+    vectorstore, manifest = load_index(KNOWLEDGE_BASE_INDEX_DIR, vector_cache.get_embeddings())
+    if manifest.get("embedding_model") != EMBEDDING_MODEL:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Knowledge base index was built with {manifest.get('embedding_model')}, expected {EMBEDDING_MODEL}. Rebuild it."
+        )
+    if os.path.exists(KNOWLEDGE_BASE_PATH) and source_hash(KNOWLEDGE_BASE_PATH) != manifest.get("source_sha256"):
+        print("⚠ knowledge_base.md changed since the index was built. Run: python build_knowledge_index.py")
+
+    vector_cache.set_vectorstore(KNOWLEDGE_BASE_CACHE_KEY, vectorstore, label="knowledge_base.md", pinned=True)
+    vector_cache.knowledge_base_manifest = {k: v for k, v in manifest.items() if k != "sections"}
+    print(f"✓ Loaded knowledge base index ({manifest.get('chunks')} chunks, {manifest['load_mode']})")
+    return vectorstore
+
+def knowledge_base_source_key() -> str:
+    """Answer cache source key for the loaded knowledge base index"""
+    manifest = vector_cache.knowledge_base_manifest or {}
+    return f"knowledge_base:{manifest.get('source_sha256', '')}"
+
+# --- CORE ENDPOINT ---
+
+@app.post("/generate", response_model=RAGResponse)
+async def generate_rag(request: RAGRequest):
+    # 1. Check API Key
+    if not os.getenv("GROQ_API_KEY"):
+        raise HTTPException(status_code=500, detail="GROQ_API_KEY is missing.")
+
+    # 2. Ingest
+    docs = await run_in_threadpool(load_documents, request.source_url, request.source_text, request.source_max_age)
+
+    # 3. Embed & Index, reusing the cached index for identical content
+    cache_key = vector_cache.content_key("\x1e".join(d.page_content for d in docs))
+
+    def get_index():
+        vectorstore, _ = get_or_build_vectorstore(cache_key, docs, label=request.source_url or "raw_input")
+        return vectorstore, get_bm25_index(cache_key, vectorstore)
+
+    # 4. Retrieve Context & Generate Response
+    return await answer_query(
+        cache_key,
+        get_index,
+        request.query,
+        request.system_prompt,
+        request.response_schema,
+        request.retrieval_mode,
+        sources_for=lambda docs: [d.metadata.get("source", "unknown") for d in docs],
+        stream=request.stream,
+        use_answer_cache=request.use_answer_cache,
+        section_filter=request.section_filter
     )
 
 # --- HELPER FUNCTION FOR FILE PROCESSING ---
 
-def extract_text_from_file(file_path: str, filename: str) -> str:
-    """Extract text from various file types"""
-    file_ext = os.path.splitext(filename)[1].lower()
-    
-    # Text-based files
-    if file_ext in ['.txt', '.md', '.csv', '.json', '.xml', '.html', '.log']:
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return f.read()
-        except UnicodeDecodeError:
-            with open(file_path, 'r', encoding='latin-1') as f:
-                return f.read()
-    
-    # PDF files
-    elif file_ext == '.pdf':
-        try:
-            from PyPDF2 import PdfReader
-            reader = PdfReader(file_path)
-            return "\n".join(page.extract_text() for page in reader.pages)
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=f"PDF extraction failed: {str(e)}. Install PyPDF2: pip install PyPDF2")
-    
-    # Word documents
-    elif file_ext in ['.docx', '.doc']:
-        try:
-            import docx
-            doc = docx.Document(file_path)
-            return "\n".join(paragraph.text for paragraph in doc.paragraphs)
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=f"DOCX extraction failed: {str(e)}. Install python-docx: pip install python-docx")
-    
-    # Images (OCR)
-    elif file_ext in ['.png', '.jpg', '.jpeg', '.tiff', '.bmp']:
-        try:
-            from PIL import Image
-            import pytesseract
-            img = Image.open(file_path)
-            text = pytesseract.image_to_string(img)
-            if not text.strip():
-                raise ValueError("No text found in image")
-            return text
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=f"Image OCR failed: {str(e)}. Install: pip install pillow pytesseract")
-    
-    # PowerPoint
-    elif file_ext in ['.pptx', '.ppt']:
-        try:
-            from pptx import Presentation
-            prs = Presentation(file_path)
-            text = []
-            for slide in prs.slides:
-                for shape in slide.shapes:
-                    if hasattr(shape, "text"):
-                        text.append(shape.text)
-            return "\n".join(text)
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=f"PowerPoint extraction failed: {str(e)}. Install: pip install python-pptx")
-    
-    # Excel
-    elif file_ext in ['.xlsx', '.xls']:
-        try:
-            import pandas as pd
-            df = pd.read_excel(file_path)
-            return df.to_string()
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=f"Excel extraction failed: {str(e)}. Install: pip install pandas openpyxl")
-    
-    else:
-        # Try to read as text anyway
-        try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                return f.read()
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=f"Unsupported file type: {file_ext}")
+async def extract_and_split_file(file_path: str, filename: str) -> List[Document]:
+    """
+    Extract a file in the process pool and split it page by page as pages arrive
+
+    Raises:
+        HTTPException: 400 if nothing can be extracted, 504 past EXTRACTION_TIMEOUT
+    """
+    splits = []
+    try:
+        async for page, text in iter_pages(file_path, filename, EXTRACTION_TIMEOUT, EXTRACTION_WORKERS):
+            if text.strip():
+                splits.extend(split_documents([Document(page_content=text, metadata={"source": filename, "page": page})]))
+    except ExtractionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail=f"Extraction of {filename} exceeded {EXTRACTION_TIMEOUT}s")
+
+    if not splits:
+        raise HTTPException(status_code=400, detail="No text could be extracted from file")
+    return splits
 
 @app.post("/upload-and-query")
 async def upload_and_query(
@@ -295,7 +779,11 @@ async def upload_and_query(
         description="Custom system instructions"
     ),
     response_schema: Optional[str] = Form(None, description="JSON Schema as string for structured output"),
-    use_cache: Optional[bool] = Form(True, description="Whether to use cached vector store")
+    use_cache: Optional[bool] = Form(True, description="Whether to use cached vector store"),
+    retrieval_mode: str = Form("auto", description="auto, hybrid, vector or keyword"),
+    stream: bool = Form(False, description="Stream the answer as server-sent events"),
+    use_answer_cache: bool = Form(True, description="Serve repeated questions from the answer cache"),
+    section_filter: Optional[str] = Form(None, description="Only search markdown sections whose heading path matches")
 ):
     """
     Upload ANY file type and query its contents with optional caching.
@@ -307,189 +795,194 @@ async def upload_and_query(
     - Presentations: PPTX
     - Code/Data: JSON, XML, HTML, LOG
     
-    Caching: For frequently queried files (e.g., knowledge_base.md), set use_cache=true
-    to reuse the vector store across multiple requests.
+    Caching: With use_cache=true the vector store is cached by a hash of the file
+    contents, so re-uploading an identical file skips extraction and embedding.
+    For the CASE knowledge base use /knowledge-base/query instead.
+
+    Streaming: With stream=true the answer is sent as server-sent events,
+    with the sources first and tokens as they are generated.
     """
     if not os.getenv("GROQ_API_KEY"):
         raise HTTPException(status_code=500, detail="GROQ_API_KEY is missing.")
     
-    # Generate cache key based on filename
-    cache_key = f"{file.filename}_faiss"
-    
-    # Check cache first (if enabled)
-    if use_cache:
-        cached_vectorstore = vector_cache.get_vectorstore(cache_key)
-        if cached_vectorstore:
-            print(f"✓ Using cached vector store for {file.filename}")
-            retriever = cached_vectorstore.as_retriever(search_kwargs={"k": 5})
-            retrieved_docs = retriever.invoke(query)
-            context_text = "\n\n".join([d.page_content for d in retrieved_docs])
-            
-            # Generate response using cached index
-            llm = ChatGroq(
-                temperature=0,
-                model_name="openai/gpt-oss-120b",
-                api_key=os.getenv("GROQ_API_KEY")
-            )
-            
-            # Generate Response
-            if response_schema:
-                try:
-                    schema = json.loads(response_schema) if isinstance(response_schema, str) else response_schema
-                    if not isinstance(schema, dict) or 'title' not in schema or 'properties' not in schema:
-                        raise ValueError("Schema must have 'title' and 'properties' fields")
-                    
-                    structured_llm = llm.with_structured_output(schema)
-                    prompt = ChatPromptTemplate.from_messages([
-                        ("system", "{system_prompt}"),
-                        ("human", "Context: {context}\n\nQuestion: {query}")
-                    ])
-                    chain = prompt | structured_llm
-                    response = chain.invoke({
-                        "system_prompt": system_prompt,
-                        "context": context_text,
-                        "query": query
-                    })
-                except Exception as e:
-                    prompt = ChatPromptTemplate.from_messages([
-                        ("system", "{system_prompt}"),
-                        ("human", "Context: {context}\n\nQuestion: {query}")
-                    ])
-                    chain = prompt | llm
-                    response_msg = chain.invoke({
-                        "system_prompt": system_prompt,
-                        "context": context_text,
-                        "query": query
-                    })
-                    response = f"Note: Structured output failed ({str(e)}). Plain text response:\n{response_msg.content}"
-            else:
-                prompt = ChatPromptTemplate.from_messages([
-                    ("system", "{system_prompt}"),
-                    ("human", "Context: {context}\n\nQuestion: {query}")
-                ])
-                chain = prompt | llm
-                response_msg = chain.invoke({
-                    "system_prompt": system_prompt,
-                    "context": context_text,
-                    "query": query
-                })
-                response = response_msg.content
-            
-            return RAGResponse(
-                result=response,
-                used_sources=[f"{file.filename} (cached)"]
-            )
-    
-    # If not cached, process file normally
-    print(f"⏳ Processing {file.filename} (not cached)")
-    
     # Check file size (max 25MB)
     content = await file.read()
     if len(content) > 25 * 1024 * 1024:
         raise HTTPException(status_code=413, detail="File too large (max 25MB)")
-    
-    temp_file = None
-    try:
+
+    # Key the cache on the file bytes, so an edited file with the same name is re-indexed
+    cache_key = vector_cache.content_key(content)
+
+    cached = False
+    temp_file_path = None
+
+    async def get_index():
+        nonlocal cached, temp_file_path
+        # Check cache first (if enabled); a hit skips text extraction and embedding
+        vectorstore = vector_cache.get_vectorstore(cache_key) if use_cache else None
+        if vectorstore is not None:
+            cached = True
+            print(f"✓ Using cached vector store for {file.filename}")
+            return vectorstore, get_bm25_index(cache_key, vectorstore)
+
+        print(f"⏳ Processing {file.filename} (not cached)")
         # Save file temporarily
         with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file.filename)[1]) as temp_file:
             temp_file.write(content)
             temp_file_path = temp_file.name
-        
-        # Extract text
-        text = extract_text_from_file(temp_file_path, file.filename)
-        
-        if not text.strip():
-            raise HTTPException(status_code=400, detail="No text could be extracted from file")
-        
-        # Create document
-        docs = [Document(page_content=text, metadata={"source": file.filename})]
-        
-        # Split text
-        splitter = RecursiveCharacterTextSplitter(chunk_size=1200, chunk_overlap=200)
-        splits = splitter.split_documents(docs)
-        
+
+        # Extract and split off the event loop
+        splits = await extract_and_split_file(temp_file_path, file.filename)
+
         # Embed & Index with cached embeddings instance
-        embeddings = vector_cache.get_embeddings()
-        vectorstore = FAISS.from_documents(splits, embeddings)
-        
-        # Cache the vector store if enabled
-        if use_cache:
-            vector_cache.set_vectorstore(cache_key, vectorstore)
-            print(f"✓ Cached vector store for {file.filename}. Total cached: {vector_cache.cache_size()}")
-        
-        retriever = vectorstore.as_retriever(search_kwargs={"k": 5})
-        
-        # Retrieve Context
-        retrieved_docs = retriever.invoke(query)
-        context_text = "\n\n".join([d.page_content for d in retrieved_docs])
-        
-        # Initialize LLM
-        llm = ChatGroq(
-            temperature=0,
-            model_name="openai/gpt-oss-120b",
-            api_key=os.getenv("GROQ_API_KEY")
+        vectorstore, _ = await run_in_threadpool(
+            get_or_build_vectorstore, cache_key, splits, file.filename, use_cache, False
         )
-        
-        # Generate Response
-        if response_schema:
-            try:
-                schema = json.loads(response_schema) if isinstance(response_schema, str) else response_schema
-                if not isinstance(schema, dict) or 'title' not in schema or 'properties' not in schema:
-                    raise ValueError("Schema must have 'title' and 'properties' fields")
-                
-                structured_llm = llm.with_structured_output(schema)
-                prompt = ChatPromptTemplate.from_messages([
-                    ("system", "{system_prompt}"),
-                    ("human", "Context: {context}\n\nQuestion: {query}")
-                ])
-                chain = prompt | structured_llm
-                response = chain.invoke({
-                    "system_prompt": system_prompt,
-                    "context": context_text,
-                    "query": query
-                })
-            except Exception as e:
-                # Fallback to text if structured fails
-                prompt = ChatPromptTemplate.from_messages([
-                    ("system", "{system_prompt}"),
-                    ("human", "Context: {context}\n\nQuestion: {query}")
-                ])
-                chain = prompt | llm
-                response_msg = chain.invoke({
-                    "system_prompt": system_prompt,
-                    "context": context_text,
-                    "query": query
-                })
-                response = f"Note: Structured output failed ({str(e)}). Plain text response:\n{response_msg.content}"
-        else:
-            prompt = ChatPromptTemplate.from_messages([
-                ("system", "{system_prompt}"),
-                ("human", "Context: {context}\n\nQuestion: {query}")
-            ])
-            chain = prompt | llm
-            response_msg = chain.invoke({
-                "system_prompt": system_prompt,
-                "context": context_text,
-                "query": query
-            })
-            response = response_msg.content
-        
-        # Cleanup temporary file
-        if not use_cache:
-            del vectorstore  # Only delete if not caching
-        os.remove(temp_file_path)
-        
-        return RAGResponse(
-            result=response,
-            used_sources=[file.filename]
+        return vectorstore, get_bm25_index(cache_key, vectorstore)
+
+    try:
+        return await answer_query(
+            cache_key,
+            get_index,
+            query,
+            system_prompt,
+            response_schema,
+            retrieval_mode,
+            sources_for=lambda docs: [f"{file.filename} (cached)" if cached else file.filename],
+            stream=stream,
+            use_answer_cache=use_answer_cache,
+            section_filter=section_filter
         )
-        
+
     except HTTPException:
         raise
     except Exception as e:
-        if temp_file and os.path.exists(temp_file.name):
-            os.remove(temp_file.name)
         raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
+    finally:
+        # Cleanup temporary file
+        if temp_file_path and os.path.exists(temp_file_path):
+            os.remove(temp_file_path)
+
+@app.post("/knowledge-base/query", response_model=RAGResponse)
+async def query_knowledge_base(request: KnowledgeBaseQuery):
+    """
+    Answer a question from the CASE knowledge base.
+
+    Uses the FAISS index built offline by build_knowledge_index.py, so only
+    the query itself is embedded at request time.
+    """
+    if not os.getenv("GROQ_API_KEY"):
+        raise HTTPException(status_code=500, detail="GROQ_API_KEY is missing.")
+
+    vectorstore = get_knowledge_base()
+
+    return await answer_query(
+        knowledge_base_source_key(),
+        lambda: (vectorstore, get_bm25_index(KNOWLEDGE_BASE_CACHE_KEY, vectorstore)),
+        request.query,
+        request.system_prompt,
+        request.response_schema,
+        request.retrieval_mode,
+        sources_for=lambda docs: list(dict.fromkeys(d.metadata.get("source", "unknown") for d in docs)),
+        stream=request.stream,
+        use_answer_cache=request.use_answer_cache,
+        section_filter=request.section_filter
+    )
+
+@app.post("/knowledge-base/reload")
+def reload_knowledge_base():
+    """Reload the knowledge base index from disk after rebuilding it"""
+    previous_key = knowledge_base_source_key()
+    vector_cache.remove(KNOWLEDGE_BASE_CACHE_KEY)
+    get_knowledge_base()
+    invalidated = 0
+    if knowledge_base_source_key() != previous_key:
+        invalidated = answer_cache.invalidate_source(previous_key)
+    return {
+        "status": "success",
+        "manifest": vector_cache.knowledge_base_manifest,
+        "answers_invalidated": invalidated
+    }
+
+def get_collection(document_id: str) -> VectorCollection:
+    collection = collections.get(document_id)
+    if collection is None or collection.vectorstore is None:
+        raise HTTPException(status_code=404, detail=f"Document {document_id} has not been indexed")
+    return collection
+
+@app.post("/documents/{document_id}/upsert")
+async def upsert_document(document_id: str, request: UpsertRequest):
+    """
+    Add, replace or remove sections of an indexed document.
+
+    Sections are compared with the stored copy by content hash; only new or
+    changed chunks are embedded and removed chunks are deleted from the
+    existing index.
+    """
+    collection = collections.setdefault(document_id, VectorCollection())
+    sections = [
+        {
+            "section_id": section.section_id,
+            "text": section.text,
+            "metadata": dict(section.metadata or {}, source=(section.metadata or {}).get("source", document_id)),
+        }
+        for section in request.sections
+    ]
+    changes = await run_in_threadpool(
+        collection.upsert,
+        sections,
+        vector_cache.get_embeddings(),
+        split_documents,
+        request.delete_section_ids,
+        request.delete_missing
+    )
+    if changes["added_chunks"] or changes["deleted_chunks"]:
+        answer_cache.invalidate_source(f"document:{document_id}")
+
+    return {
+        "document_id": document_id,
+        "changes": changes,
+        "sections": len(collection.sections),
+        "chunks": collection.chunk_count()
+    }
+
+@app.post("/documents/{document_id}/query", response_model=RAGResponse)
+async def query_document(document_id: str, request: KnowledgeBaseQuery):
+    """Answer a question from a document indexed with the upsert API"""
+    if not os.getenv("GROQ_API_KEY"):
+        raise HTTPException(status_code=500, detail="GROQ_API_KEY is missing.")
+
+    collection = get_collection(document_id)
+    return await answer_query(
+        f"document:{document_id}",
+        collection.snapshot,
+        request.query,
+        request.system_prompt,
+        request.response_schema,
+        request.retrieval_mode,
+        sources_for=lambda docs: list(dict.fromkeys(d.metadata.get("source", document_id) for d in docs)),
+        stream=request.stream,
+        use_answer_cache=request.use_answer_cache,
+        section_filter=request.section_filter
+    )
+
+@app.get("/documents/{document_id}")
+def document_status(document_id: str):
+    """Get the sections and chunk counts of an indexed document"""
+    collection = get_collection(document_id)
+    return {
+        "document_id": document_id,
+        "sections": {section_id: len(section["chunk_ids"]) for section_id, section in collection.sections.items()},
+        "chunks": collection.chunk_count()
+    }
+
+@app.delete("/documents/{document_id}")
+def delete_document(document_id: str):
+    """Drop an indexed document"""
+    if collections.pop(document_id, None) is None:
+        raise HTTPException(status_code=404, detail=f"Document {document_id} has not been indexed")
+    answer_cache.invalidate_source(f"document:{document_id}")
+    return {"status": "success", "document_id": document_id}
 
 @app.get("/health")
 def health():
@@ -499,18 +992,20 @@ def health():
         "provider": "groq",
         "cache": {
             "cached_vectorstores": vector_cache.cache_size(),
+            "cached_bytes": vector_cache.total_bytes,
             "embeddings_initialized": vector_cache.embeddings_instance is not None
         }
     }
 
 @app.post("/cache/clear")
 def clear_cache():
-    """Clear all cached vector stores (use with caution)"""
-    vector_cache.clear_cache()
+    """Clear cached vector stores and answers; the pinned knowledge base index stays loaded"""
+    removed = vector_cache.clear_cache()
+    answer_cache.clear()
     return {
         "status": "success",
-        "message": "All cached vector stores cleared",
-        "cached_count": 0
+        "message": f"Cleared {removed} cached vector stores and all cached answers; pinned entries kept",
+        "cached_count": vector_cache.cache_size()
     }
 
 @app.get("/cache/status")
@@ -520,7 +1015,13 @@ def cache_status():
         "cached_vectorstores": vector_cache.cache_size(),
         "embeddings_model": EMBEDDING_MODEL,
         "embeddings_initialized": vector_cache.embeddings_instance is not None,
-        "cache_keys": list(vector_cache.cache.keys())
+        "cache": vector_cache.stats(),
+        "embedding_cache": vector_cache.embedding_cache.stats(),
+        "embedding_executor": vector_cache.embedding_executor.stats() if vector_cache.embedding_executor else None,
+        "answer_cache": answer_cache.stats(),
+        "url_cache": url_cache.stats(),
+        "documents": {document_id: c.chunk_count() for document_id, c in collections.items()},
+        "knowledge_base_index": vector_cache.knowledge_base_manifest
     }
 
 if __name__ == "__main__":
@@ -0,0 +1,205 @@
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class AnswerCache:
+    """
+    Cache of generated answers for repeated questions.
+
+    Answers are grouped by scope: the source content hash, system prompt,
+    response schema, retrieval mode and section filter. Within a scope a question hits the
+    cache if its normalized text was seen before, or if its embedding is
+    within the cosine similarity threshold of a cached question.
+    """
+
+    def __init__(self, ttl: int, similarity_threshold: float, max_entries: int):
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # (source_key, scope digest) -> OrderedDict[normalized query -> entry]
+        self._scopes: Dict[Tuple[str, str], "OrderedDict[str, Dict[str, Any]]"] = {}
+        self._size = 0
+
+    @staticmethod
+    def scope(
+        source_key: str,
+        system_prompt: str,
+        response_schema: Optional[str],
+        retrieval_mode: str,
+        section_filter: Optional[str] = None
+    ) -> Tuple[str, str]:
+        """
+        Build the scope a cached answer is valid for
+
+        Args:
+            source_key: Hash identifying the indexed source content
+            system_prompt: System instructions
+            response_schema: JSON schema string, if structured output was requested
+            retrieval_mode: Retrieval mode used to build the context
+            section_filter: Section path filter applied to retrieval
+        """
+        digest = hashlib.sha256()
+        for part in (system_prompt, response_schema or "", retrieval_mode, section_filter or ""):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\x1f")
+        return source_key, digest.hexdigest()
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        """Lowercase and collapse whitespace and trailing punctuation"""
+        return re.sub(r"\s+", " ", query.strip().lower()).rstrip("?.! ")
+
+    def lookup(
+        self,
+        scope: Tuple[str, str],
+        query: str,
+        embed_query: Optional[Callable[[str], List[float]]] = None
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[List[float]]]:
+        """
+        Find a cached answer for a question
+
+        The normalized question text is checked first, which needs no
+        embedding. Otherwise, if embed_query is given, the question is embedded
+        and compared against cached questions in the same scope.
+
+        Args:
+            scope: Scope from scope()
+            query: User question
+            embed_query: Function embedding the question; None skips the semantic lookup
+
+        Returns:
+            Tuple of (cached entry or None, query embedding if one was computed)
+        """
+        key = self.normalize(query)
+        with self._lock:
+            entries = self._scopes.get(scope)
+            entry = entries.get(key) if entries else None
+            if entry is not None and self._fresh(entries, key, entry):
+                entries.move_to_end(key)
+                self.hits += 1
+                return entry, None
+
+        if embed_query is None:
+            with self._lock:
+                self.misses += 1
+            return None, None
+
+        query_embedding = embed_query(query)
+        return self.get_similar(scope, query_embedding), query_embedding
+
+    def get_similar(self, scope: Tuple[str, str], query_embedding: List[float]) -> Optional[Dict[str, Any]]:
+        """
+        Look up an answer for a semantically equivalent question
+
+        Args:
+            scope: Scope from scope()
+            query_embedding: Embedding of the new question
+
+        Returns:
+            Cached entry, or None if no cached question is similar enough
+        """
+        vector = self._unit(query_embedding)
+        with self._lock:
+            entries = self._scopes.get(scope)
+            best_key, best_score = None, self.similarity_threshold
+            for key, entry in list((entries or {}).items()):
+                if not self._fresh(entries, key, entry) or entry["embedding"] is None:
+                    continue
+                score = float(np.dot(vector, entry["embedding"]))
+                if score >= best_score:
+                    best_key, best_score = key, score
+            if best_key is None:
+                self.misses += 1
+                return None
+            entries.move_to_end(best_key)
+            self.hits += 1
+            self.semantic_hits += 1
+            return entries[best_key]
+
+    def put(
+        self,
+        scope: Tuple[str, str],
+        query: str,
+        result: Any,
+        used_sources: List[str],
+        query_embedding: Optional[List[float]] = None
+    ) -> None:
+        """Cache an answer, evicting the least recently used beyond max_entries"""
+        key = self.normalize(query)
+        entry = {
+            "result": result,
+            "used_sources": used_sources,
+            "embedding": self._unit(query_embedding) if query_embedding is not None else None,
+            "expires_at": time.monotonic() + self.ttl,
+        }
+        with self._lock:
+            entries = self._scopes.setdefault(scope, OrderedDict())
+            if key not in entries:
+                self._size += 1
+            entries[key] = entry
+            entries.move_to_end(key)
+            while self._size > self.max_entries:
+                self._evict_oldest()
+
+    def invalidate_source(self, source_key: str) -> int:
+        """
+        Drop every answer generated from a source
+
+        Returns:
+            Number of answers removed
+        """
+        with self._lock:
+            removed = 0
+            for scope in [s for s in self._scopes if s[0] == source_key]:
+                removed += len(self._scopes.pop(scope))
+            self._size -= removed
+            return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._scopes.clear()
+            self._size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": self._size,
+            "ttl_seconds": self.ttl,
+            "similarity_threshold": self.similarity_threshold,
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+        }
+
+    def _fresh(self, entries, key: str, entry: Dict[str, Any]) -> bool:
+        if entry["expires_at"] > time.monotonic():
+            return True
+        del entries[key]
+        self._size -= 1
+        return False
+
+    def _evict_oldest(self) -> None:
+        # Each scope is in LRU order; evict the stalest head across scopes
+        scope = min(
+            (s for s, entries in self._scopes.items() if entries),
+            key=lambda s: next(iter(self._scopes[s].values()))["expires_at"]
+        )
+        self._scopes[scope].popitem(last=False)
+        self._size -= 1
+        if not self._scopes[scope]:
+            del self._scopes[scope]
+
+    @staticmethod
+    def _unit(vector: List[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        return array / norm if norm else array
@@ -0,0 +1,107 @@
+import os
+import socket
+import threading
+import time
+from typing import Dict, Any, Optional
+from config import (
+    CLOSED_TICKET_STATUSES,
+    ARCHIVE_RETENTION_DAYS,
+    ARCHIVE_INTERVAL_HOURS,
+    ARCHIVE_BATCH_SIZE,
+)
+from services.firebase_service import firebase_service
+from services.time_utils import to_timestamp
+
+
+class TicketArchiveService:
+    """Moves tickets closed past the retention window out of the live collection"""
+
+    def __init__(self):
+        self.retention_seconds = ARCHIVE_RETENTION_DAYS * 86400
+        self.interval_seconds = ARCHIVE_INTERVAL_HOURS * 3600
+        self.batch_size = min(ARCHIVE_BATCH_SIZE, 250)  # Two writes per ticket, 500 per batch
+        self._stop = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        # Identifies this process when claiming the shared archive lease
+        self._holder = f"{socket.gethostname()}:{os.getpid()}"
+        self.last_run: Optional[Dict[str, Any]] = None
+
+    def run_once(self, dry_run: bool = False) -> Dict[str, Any]:
+        """
+        Archive every closed ticket whose last update is older than the retention window
+
+        Args:
+            dry_run: Only report how many tickets would be archived
+
+        Returns:
+            Summary with candidate and archived counts
+        """
+        started = time.time()
+        cutoff = started - self.retention_seconds
+
+        # Only closed tickets are read, never the open working set
+        candidates = {}
+        for ticket in firebase_service.list_tickets_by_status(CLOSED_TICKET_STATUSES):
+            closed_ts = to_timestamp(ticket.get("updated_at")) or to_timestamp(ticket.get("created_at"))
+            if closed_ts is not None and closed_ts < cutoff:
+                candidates[ticket["id"]] = ticket
+
+        archived = 0
+        skipped = 0
+        failed = 0
+        if not dry_run:
+            doc_ids = list(candidates)
+            for i in range(0, len(doc_ids), self.batch_size):
+                chunk = {doc_id: candidates[doc_id] for doc_id in doc_ids[i:i + self.batch_size]}
+                try:
+                    result = firebase_service.archive_tickets(chunk)
+                    archived += result["archived"]
+                    skipped += result["skipped"]
+                except Exception as e:
+                    failed += len(chunk)
+                    print(f"Error archiving {len(chunk)} tickets: {e}")
+
+        summary = {
+            "candidates": len(candidates),
+            "archived": archived,
+            "skipped": skipped,
+            "failed": failed,
+            "dry_run": dry_run,
+            "retention_days": self.retention_seconds / 86400,
+            "elapsed_seconds": round(time.time() - started, 2),
+        }
+        if not dry_run:
+            self.last_run = dict(summary, finished_at=time.time())
+            print(f"Archived {archived} closed tickets ({skipped} changed since read, {failed} failed)")
+        return summary
+
+    def start(self) -> None:
+        """
+        Start the periodic archive job (disabled when ARCHIVE_INTERVAL_HOURS is 0)
+
+        Every server process starts the job, but each interval's run is
+        claimed through a Firestore lease, so only one process runs it.
+        """
+        if self.interval_seconds <= 0 or (self._worker is not None and self._worker.is_alive()):
+            return
+        self._stop.clear()
+        self._worker = threading.Thread(target=self._run, name="ticket-archive", daemon=True)
+        self._worker.start()
+
+    def stop(self) -> None:
+        """Stop the periodic archive job"""
+        self._stop.set()
+        self._worker = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                # Expire a little before the next tick so the holder can claim it again
+                if not firebase_service.acquire_lease("ticket-archive", self._holder, self.interval_seconds * 0.9):
+                    continue
+                self.run_once()
+            except Exception as e:
+                print(f"Archive job error: {e}")
+
+
+archive_service = TicketArchiveService()
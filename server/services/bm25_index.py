@@ -0,0 +1,143 @@
+import math
+import re
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from langchain_core.documents import Document
+
+
+# Keeps compound identifiers such as ward codes ("k/e") and ticket IDs ("ticket-123-abc") as single terms
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[/\-_.][a-z0-9]+)*")
+IDENTIFIER_PATTERN = re.compile(r"\d|[/\-_]|^[A-Z]{2,}$")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "i", "in", "is", "it",
+    "of", "on", "or", "the", "to", "was", "what", "when", "where", "which", "who", "why", "with",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into BM25 terms
+
+    Compound tokens are indexed whole and also as their parts, so "K/E"
+    matches both "k/e" and "k", "e".
+    """
+    terms = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        terms.append(token)
+        parts = re.split(r"[/\-_.]", token)
+        if len(parts) > 1:
+            terms.extend(part for part in parts if part and part not in STOPWORDS)
+    return terms
+
+
+def is_lexical_query(query: str, max_terms: int = 4) -> bool:
+    """
+    Check whether a query is a short lookup of exact terms (codes, IDs, names)
+
+    Such queries are answered from BM25 alone, skipping the remote query
+    embedding.
+    """
+    words = [w.strip("?.,!:;\"'()") for w in query.split()]
+    words = [w for w in words if w and w.lower() not in STOPWORDS]
+    if not words or len(words) > max_terms:
+        return False
+    return any(IDENTIFIER_PATTERN.search(w) for w in words)
+
+
+class BM25Index:
+    """In-memory inverted index over document chunks scored with Okapi BM25"""
+
+    def __init__(self, documents: List[Document], k1: float = 1.5, b: float = 0.75, positions: Optional[List[int]] = None):
+        self.documents = documents
+        # Position of each document in the FAISS index, for filtered vector search
+        self.positions = positions if positions is not None else list(range(len(documents)))
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        self.doc_lengths: List[int] = []
+
+        for doc_index, doc in enumerate(documents):
+            counts = Counter(tokenize(doc.page_content))
+            self.doc_lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self.postings.setdefault(term, []).append((doc_index, tf))
+
+        self.avg_length = (sum(self.doc_lengths) / len(self.doc_lengths)) if self.doc_lengths else 0.0
+
+    @classmethod
+    def from_vectorstore(cls, vectorstore) -> "BM25Index":
+        """Build an index over the chunks held by a FAISS vector store"""
+        documents, positions = [], []
+        for position, doc_id in sorted(vectorstore.index_to_docstore_id.items()):
+            doc = vectorstore.docstore.search(doc_id)
+            if isinstance(doc, Document):
+                documents.append(doc)
+                positions.append(position)
+        return cls(documents, positions=positions)
+
+    def matching(self, predicate: Callable[[Document], bool]) -> Set[int]:
+        """Indices of documents satisfying a metadata predicate"""
+        return {i for i, doc in enumerate(self.documents) if predicate(doc)}
+
+    def search(self, query: str, k: int = 5, allowed: Optional[Set[int]] = None) -> List[Tuple[Document, float]]:
+        """
+        Rank chunks against a query
+
+        Args:
+            query: Free text query
+            k: Number of results
+            allowed: Restrict scoring to these document indices (from matching())
+
+        Returns:
+            List of (document, score) pairs, best first; chunks without any
+            query term are not returned
+        """
+        n_docs = len(self.documents)
+        if n_docs == 0:
+            return []
+
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_index, tf in postings:
+                if allowed is not None and doc_index not in allowed:
+                    continue
+                norm = 1 - self.b + self.b * self.doc_lengths[doc_index] / (self.avg_length or 1)
+                scores[doc_index] = scores.get(doc_index, 0.0) + idf * tf * (self.k1 + 1) / (tf + self.k1 * norm)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [(self.documents[i], score) for i, score in ranked]
+
+    def size_bytes(self) -> int:
+        """Rough memory estimate of the postings"""
+        return sum(len(term) + 16 * len(postings) for term, postings in self.postings.items())
+
+
+def reciprocal_rank_fusion(result_lists: List[List[Document]], k: int = 5, rrf_k: int = 60) -> List[Document]:
+    """
+    Merge ranked result lists with reciprocal rank fusion
+
+    Args:
+        result_lists: Ranked document lists from different retrievers
+        k: Number of fused results
+        rrf_k: RRF damping constant
+
+    Returns:
+        Fused documents, best first
+    """
+    scores: Dict[str, float] = {}
+    docs: Dict[str, Document] = {}
+    for results in result_lists:
+        for rank, doc in enumerate(results):
+            key = doc.page_content
+            docs.setdefault(key, doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank + 1)
+
+    ranked = sorted(scores, key=scores.get, reverse=True)[:k]
+    return [docs[key] for key in ranked]
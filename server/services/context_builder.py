@@ -0,0 +1,156 @@
+"""
+Builds the context block of a RAG prompt from retrieved chunks.
+
+Retrieved chunks overlap (the splitter repeats chunk_overlap characters
+between neighbours) and are often adjacent in the source. build_context()
+merges overlapping or adjacent chunks from the same source, drops duplicate
+and contained spans, and packs the result into a token budget, keeping the
+retrieval ranking.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+
+CHARS_PER_TOKEN = 4
+MIN_TEXT_OVERLAP = 40  # Shortest suffix/prefix match treated as splitter overlap
+SEPARATOR = "\n\n"
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate LLM token count (about four characters per token for English)"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _group_key(doc: Document) -> Tuple[Any, ...]:
+    metadata = doc.metadata
+    return metadata.get("source"), metadata.get("page"), metadata.get("section_id")
+
+
+def _text_overlap(left: str, right: str) -> int:
+    """Length of the longest suffix of left that is a prefix of right"""
+    if len(left) < MIN_TEXT_OVERLAP or len(right) < MIN_TEXT_OVERLAP:
+        return 0
+    probe = right[:MIN_TEXT_OVERLAP]
+    pos = left.find(probe, max(len(left) - len(right), 0))
+    while pos != -1:
+        if right.startswith(left[pos:]):
+            return len(left) - pos
+        pos = left.find(probe, pos + 1)
+    return 0
+
+
+def _merge_by_offset(chunks: List[Tuple[int, Document]]) -> List[Tuple[int, str]]:
+    """Merge chunks carrying start_index metadata whose spans overlap or touch"""
+    blocks: List[Tuple[int, str]] = []
+    cur_rank, cur_text, cur_end = None, "", -1
+    for rank, doc in sorted(chunks, key=lambda item: item[1].metadata["start_index"]):
+        start = doc.metadata["start_index"]
+        text = doc.page_content
+        end = start + len(text)
+        if cur_rank is not None and start <= cur_end + 2:
+            if start > cur_end:
+                cur_text += "\n" + text
+            elif end > cur_end:
+                cur_text += text[cur_end - start:]
+            cur_end = max(cur_end, end)
+            cur_rank = min(cur_rank, rank)
+            continue
+        if cur_rank is not None:
+            blocks.append((cur_rank, cur_text))
+        cur_rank, cur_text, cur_end = rank, text, end
+    if cur_rank is not None:
+        blocks.append((cur_rank, cur_text))
+    return blocks
+
+
+def _merge_by_text(chunks: List[Tuple[int, Document]]) -> List[Tuple[int, str]]:
+    """Merge chunks without offsets by detecting duplicate, contained and overlapping text"""
+    blocks: List[List[Any]] = [[rank, doc.page_content] for rank, doc in chunks]
+    merged = True
+    while merged and len(blocks) > 1:
+        merged = False
+        for i in range(len(blocks)):
+            for j in range(len(blocks)):
+                if i == j:
+                    continue
+                a, b = blocks[i][1], blocks[j][1]
+                if b in a:
+                    combined = a
+                else:
+                    overlap = _text_overlap(a, b)
+                    if not overlap:
+                        continue
+                    combined = a + b[overlap:]
+                blocks[i] = [min(blocks[i][0], blocks[j][0]), combined]
+                del blocks[j]
+                merged = True
+                break
+            if merged:
+                break
+    return [(rank, text) for rank, text in blocks]
+
+
+def build_context(docs: List[Document], token_budget: Optional[int] = None) -> Tuple[str, Dict[str, int]]:
+    """
+    Merge and pack retrieved chunks into a prompt context
+
+    Args:
+        docs: Retrieved chunks, best first
+        token_budget: Maximum estimated tokens of context; None for no limit
+
+    Returns:
+        Tuple of (context text, stats with raw/packed token estimates, tokens
+        saved by merging and deduplication, tokens cut to fit the budget, and
+        chunk/block counts)
+    """
+    raw_tokens = estimate_tokens(SEPARATOR.join(d.page_content for d in docs))
+
+    groups: Dict[Tuple[Any, ...], List[Tuple[int, Document]]] = {}
+    for rank, doc in enumerate(docs):
+        groups.setdefault(_group_key(doc), []).append((rank, doc))
+
+    blocks: List[Tuple[int, str]] = []
+    for chunks in groups.values():
+        with_offsets = [c for c in chunks if isinstance(c[1].metadata.get("start_index"), int)]
+        without_offsets = [c for c in chunks if not isinstance(c[1].metadata.get("start_index"), int)]
+        blocks.extend(_merge_by_offset(with_offsets))
+        blocks.extend(_merge_by_text(without_offsets))
+
+    # Exact duplicates across sources (e.g. the same page under two URLs)
+    seen = set()
+    unique_blocks = []
+    for rank, text in sorted(blocks):
+        if text not in seen:
+            seen.add(text)
+            unique_blocks.append(text)
+    merged_tokens = estimate_tokens(SEPARATOR.join(unique_blocks))
+
+    packed: List[str] = []
+    used_tokens = 0
+    truncated = 0
+    for text in unique_blocks:
+        cost = estimate_tokens(text) + (estimate_tokens(SEPARATOR) if packed else 0)
+        if token_budget is not None and used_tokens + cost > token_budget:
+            remaining_chars = (token_budget - used_tokens) * CHARS_PER_TOKEN - len(SEPARATOR)
+            # Only keep a truncated block if a meaningful part of it fits
+            if remaining_chars >= 200:
+                packed.append(text[:remaining_chars])
+                truncated += 1
+            break
+        packed.append(text)
+        used_tokens += cost
+
+    context_text = SEPARATOR.join(packed)
+    packed_tokens = estimate_tokens(context_text)
+    return context_text, {
+        "chunks": len(docs),
+        "blocks": len(packed),
+        "truncated_blocks": truncated,
+        "dropped_blocks": len(unique_blocks) - len(packed),
+        "raw_tokens": raw_tokens,
+        "context_tokens": packed_tokens,
+        "tokens_saved": raw_tokens - merged_tokens,
+        "tokens_truncated": merged_tokens - packed_tokens,
+    }
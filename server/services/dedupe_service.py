@@ -0,0 +1,266 @@
+import io
+import threading
+import time
+from math import cos, radians, ceil
+from typing import Dict, Any, Optional, List, Tuple
+from PIL import Image
+from config import (
+    DEDUPE_RADIUS_M,
+    DEDUPE_WINDOW_HOURS,
+    DEDUPE_IMAGE_HASH_MAX_DISTANCE,
+    DEDUPE_IMAGE_RADIUS_M,
+    CLOSED_TICKET_STATUSES,
+)
+from services.firebase_service import firebase_service
+from services.outbox_service import ticket_outbox
+from services.geo_utils import haversine_km, ticket_coordinates
+from services.time_utils import to_timestamp
+
+
+METERS_PER_DEGREE = 111320
+CLOSED_STATUSES = set(CLOSED_TICKET_STATUSES)
+
+
+class DuplicateDetectionService:
+    """Service to detect duplicate ticket reports at creation time"""
+
+    def __init__(self):
+        self.radius_m = DEDUPE_RADIUS_M
+        self.window_seconds = DEDUPE_WINDOW_HOURS * 3600
+        self.image_hash_max_distance = DEDUPE_IMAGE_HASH_MAX_DISTANCE
+        self.image_radius_m = max(DEDUPE_IMAGE_RADIUS_M, self.radius_m)
+        # Grid cell edge in degrees of latitude, sized so a radius search touches few cells
+        self.cell_deg = self.radius_m / METERS_PER_DEGREE
+        self._cells: Dict[Tuple[str, int, int], List[Dict[str, Any]]] = {}
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._loaded = False
+        self._next_prune_ts = 0.0
+
+    def compute_image_hash(self, image_data: bytes) -> Optional[str]:
+        """
+        Compute a 64-bit difference hash (dHash) of an image
+
+        Args:
+            image_data: Image file in bytes
+
+        Returns:
+            Hex string of the hash, or None if the image cannot be decoded
+        """
+        try:
+            img = Image.open(io.BytesIO(image_data)).convert("L").resize((9, 8))
+            pixels = list(img.getdata())
+            bits = 0
+            for row in range(8):
+                for col in range(8):
+                    left = pixels[row * 9 + col]
+                    right = pixels[row * 9 + col + 1]
+                    bits = (bits << 1) | (1 if left > right else 0)
+            return f"{bits:016x}"
+        except Exception as e:
+            print(f"Error computing image hash: {e}")
+            return None
+
+    def find_duplicate(
+        self,
+        issue_type: Optional[str],
+        latitude: float,
+        longitude: float,
+        image_hash: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Find an existing open ticket that the new report duplicates.
+
+        A candidate must share the issue type and have been reported within the
+        time window. It matches if it lies within the dedupe radius, or if both
+        reports carry near-identical image hashes and it lies within the wider
+        image radius (GPS on phones can be off by a block or two).
+
+        Args:
+            issue_type: Issue type of the new report
+            latitude: GPS latitude coordinate
+            longitude: GPS longitude coordinate
+            image_hash: Optional image hash from compute_image_hash
+
+        Returns:
+            Matching index entry (with ref, ticket_id, report_count), or None
+        """
+        if not issue_type:
+            return None
+
+        self._ensure_loaded()
+        issue_key = issue_type.strip().lower()
+        now = time.time()
+
+        with self._lock:
+            best = None
+            best_distance = None
+            for entry in self._nearby_entries(issue_key, latitude, longitude):
+                if now - entry["last_reported_ts"] > self.window_seconds:
+                    continue
+                distance_m = haversine_km(latitude, longitude, entry["latitude"], entry["longitude"]) * 1000
+                if distance_m <= self.radius_m and (best is None or distance_m < best_distance):
+                    best, best_distance = entry, distance_m
+
+            if best is None and image_hash:
+                for entry in self._nearby_entries(issue_key, latitude, longitude, self.image_radius_m):
+                    if not entry.get("image_hash"):
+                        continue
+                    if now - entry["last_reported_ts"] > self.window_seconds:
+                        continue
+                    if self._hamming(image_hash, entry["image_hash"]) > self.image_hash_max_distance:
+                        continue
+                    distance_m = haversine_km(latitude, longitude, entry["latitude"], entry["longitude"]) * 1000
+                    if distance_m <= self.image_radius_m and (best is None or distance_m < best_distance):
+                        best, best_distance = entry, distance_m
+
+            return dict(best) if best else None
+
+    def register(self, ref: str, ticket_data: Dict[str, Any]) -> None:
+        """
+        Add a newly created ticket to the index
+
+        Args:
+            ref: Firestore document ID of the ticket
+            ticket_data: Ticket fields (issue_type, latitude, longitude, image_hash, ...)
+        """
+        if not ref or not ticket_data.get("issue_type"):
+            return
+        coordinates = ticket_coordinates(ticket_data)
+        if coordinates is None:
+            return
+        latitude, longitude = coordinates
+
+        created_ts = to_timestamp(ticket_data.get("created_at")) or time.time()
+        entry = {
+            "ref": ref,
+            "ticket_id": ticket_data.get("ticket_id"),
+            "issue_type": ticket_data["issue_type"].strip().lower(),
+            "latitude": latitude,
+            "longitude": longitude,
+            "image_hash": ticket_data.get("image_hash"),
+            "report_count": ticket_data.get("report_count", 1),
+            "last_reported_ts": to_timestamp(ticket_data.get("last_reported_at")) or created_ts,
+        }
+
+        with self._lock:
+            self._prune_expired()
+            self._remove(ref)
+            self._entries[ref] = entry
+            self._cells.setdefault(self._cell_key(entry["issue_type"], latitude, longitude), []).append(entry)
+
+    def merge_report(self, entry: Dict[str, Any], report: Dict[str, Any]) -> bool:
+        """
+        Attach a duplicate report to an existing ticket instead of creating a new one
+
+        If the ticket is still waiting in the outbox the report is queued there
+        and applied once the ticket has been written to Firestore.
+
+        Args:
+            entry: Index entry returned by find_duplicate
+            report: Summary of the duplicate report (location, source, description)
+
+        Returns:
+            True if the existing ticket was updated, False otherwise
+        """
+        if not ticket_outbox.merge_pending(entry["ref"], report):
+            if not firebase_service.add_duplicate_report(entry["ref"], report):
+                return False
+
+        with self._lock:
+            indexed = self._entries.get(entry["ref"])
+            if indexed:
+                indexed["report_count"] += 1
+                indexed["last_reported_ts"] = time.time()
+                entry["report_count"] = indexed["report_count"]
+            else:
+                entry["report_count"] = entry.get("report_count", 1) + 1
+        return True
+
+    def discard(self, ref: str) -> None:
+        """Remove a ticket from the index (e.g. once it is closed)"""
+        with self._lock:
+            self._remove(ref)
+
+    def index_size(self) -> int:
+        """Get number of tickets in the index"""
+        return len(self._entries)
+
+    def _ensure_loaded(self) -> None:
+        """
+        Warm the index from Firestore once per process
+
+        Concurrent callers wait for the load to finish, so no lookup runs
+        against a half-loaded index. A failed load is retried on the next call.
+        """
+        if self._loaded:
+            return
+        with self._load_lock:
+            if self._loaded:
+                return
+
+            cutoff = time.time() - self.window_seconds
+            for ticket in firebase_service.list_tickets():
+                if ticket.get("status") in CLOSED_STATUSES:
+                    continue
+                last_ts = (to_timestamp(ticket.get("last_reported_at"))
+                           or to_timestamp(ticket.get("created_at")))
+                if last_ts is None or last_ts < cutoff:
+                    continue
+                self.register(ticket.get("id"), ticket)
+            self._loaded = True
+        print(f"Duplicate index loaded with {self.index_size()} open tickets")
+
+    def _nearby_entries(
+        self,
+        issue_key: str,
+        latitude: float,
+        longitude: float,
+        radius_m: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """Collect entries from grid cells overlapping the search radius (defaults to the dedupe radius)"""
+        lat_cell = int(latitude // self.cell_deg)
+        lon_cell = int(longitude // self.cell_deg)
+        lat_span = ceil((radius_m or self.radius_m) / self.radius_m)
+        # Longitude degrees shrink with latitude, so widen the column span accordingly
+        lon_span = ceil(lat_span / max(cos(radians(latitude)), 0.01))
+
+        entries = []
+        for dlat in range(-lat_span, lat_span + 1):
+            for dlon in range(-lon_span, lon_span + 1):
+                entries.extend(self._cells.get((issue_key, lat_cell + dlat, lon_cell + dlon), []))
+        return entries
+
+    def _cell_key(self, issue_key: str, latitude: float, longitude: float) -> Tuple[str, int, int]:
+        return issue_key, int(latitude // self.cell_deg), int(longitude // self.cell_deg)
+
+    def _prune_expired(self) -> None:
+        """Drop entries older than the time window, at most once a minute (caller holds the lock)"""
+        now = time.time()
+        if now < self._next_prune_ts:
+            return
+        self._next_prune_ts = now + 60
+        cutoff = now - self.window_seconds
+        for ref in [ref for ref, entry in self._entries.items() if entry["last_reported_ts"] < cutoff]:
+            self._remove(ref)
+
+    def _remove(self, ref: str) -> None:
+        entry = self._entries.pop(ref, None)
+        if entry is None:
+            return
+        key = self._cell_key(entry["issue_type"], entry["latitude"], entry["longitude"])
+        bucket = self._cells.get(key, [])
+        self._cells[key] = [e for e in bucket if e["ref"] != ref]
+        if not self._cells[key]:
+            del self._cells[key]
+
+    @staticmethod
+    def _hamming(hash_a: str, hash_b: str) -> int:
+        try:
+            return bin(int(hash_a, 16) ^ int(hash_b, 16)).count("1")
+        except ValueError:
+            return 64
+
+
+dedupe_service = DuplicateDetectionService()
@@ -0,0 +1,231 @@
+"""
+Text extraction for uploaded documents, run in a process pool.
+
+PDFs and multi-frame images are split into page batches that are extracted
+or OCRed in parallel worker processes. iter_pages() yields pages in document
+order as their batch finishes, so callers can split and embed early pages
+while later ones are still being processed, and gives up once the request's
+time budget is spent.
+
+Workers are spawned rather than forked, so they do not inherit the server's
+threads and locks. The pool is shared by all requests, so a timed-out
+extraction only cancels its own batches that have not started; a batch
+already running finishes and its result is discarded.
+"""
+
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from typing import AsyncIterator, List, Optional, Tuple
+
+
+TEXT_EXTENSIONS = ['.txt', '.md', '.csv', '.json', '.xml', '.html', '.log']
+IMAGE_EXTENSIONS = ['.png', '.jpg', '.jpeg', '.tiff', '.bmp']
+PAGE_BATCH_SIZE = 8
+
+_executor: Optional[ProcessPoolExecutor] = None
+# Per worker process: the PDF reader of the last file it extracted, so a
+# worker handling several batches of one upload parses the file only once
+_pdf_reader: Optional[Tuple[str, float, object]] = None
+
+
+class ExtractionError(Exception):
+    """Raised when text cannot be extracted from a file"""
+
+
+def get_executor(max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """Get the shared extraction process pool, creating it on first use"""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=get_context("spawn"))
+    return _executor
+
+
+def shutdown_executor() -> None:
+    """Stop the extraction process pool"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def extract_text(file_path: str, filename: str) -> str:
+    """Extract text from various file types"""
+    file_ext = os.path.splitext(filename)[1].lower()
+
+    # Text-based files
+    if file_ext in TEXT_EXTENSIONS:
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                return f.read()
+        except UnicodeDecodeError:
+            with open(file_path, 'r', encoding='latin-1') as f:
+                return f.read()
+
+    # PDF files
+    elif file_ext == '.pdf':
+        return "\n".join(_extract_pdf_pages(file_path, 0, _pdf_page_count(file_path)))
+
+    # Word documents
+    elif file_ext in ['.docx', '.doc']:
+        try:
+            import docx
+            doc = docx.Document(file_path)
+            return "\n".join(paragraph.text for paragraph in doc.paragraphs)
+        except Exception as e:
+            raise ExtractionError(f"DOCX extraction failed: {str(e)}. Install python-docx: pip install python-docx")
+
+    # Images (OCR)
+    elif file_ext in IMAGE_EXTENSIONS:
+        text = "\n".join(_ocr_frames(file_path, 0, _image_frame_count(file_path)))
+        if not text.strip():
+            raise ExtractionError("Image OCR failed: No text found in image")
+        return text
+
+    # PowerPoint
+    elif file_ext in ['.pptx', '.ppt']:
+        try:
+            from pptx import Presentation
+            prs = Presentation(file_path)
+            text = []
+            for slide in prs.slides:
+                for shape in slide.shapes:
+                    if hasattr(shape, "text"):
+                        text.append(shape.text)
+            return "\n".join(text)
+        except Exception as e:
+            raise ExtractionError(f"PowerPoint extraction failed: {str(e)}. Install: pip install python-pptx")
+
+    # Excel
+    elif file_ext in ['.xlsx', '.xls']:
+        try:
+            import pandas as pd
+            df = pd.read_excel(file_path)
+            return df.to_string()
+        except Exception as e:
+            raise ExtractionError(f"Excel extraction failed: {str(e)}. Install: pip install pandas openpyxl")
+
+    else:
+        # Try to read as text anyway
+        try:
+            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                return f.read()
+        except Exception:
+            raise ExtractionError(f"Unsupported file type: {file_ext}")
+
+
+def _open_pdf(file_path: str):
+    """Get a PdfReader for the file, reusing this process's reader if the file is unchanged"""
+    global _pdf_reader
+    from PyPDF2 import PdfReader
+    mtime = os.path.getmtime(file_path)
+    if _pdf_reader is None or _pdf_reader[:2] != (file_path, mtime):
+        _pdf_reader = (file_path, mtime, PdfReader(file_path))
+    return _pdf_reader[2]
+
+
+def _pdf_page_count(file_path: str) -> int:
+    try:
+        return len(_open_pdf(file_path).pages)
+    except Exception as e:
+        raise ExtractionError(f"PDF extraction failed: {str(e)}. Install PyPDF2: pip install PyPDF2")
+
+
+def _extract_pdf_pages(file_path: str, start: int, end: int) -> List[str]:
+    try:
+        reader = _open_pdf(file_path)
+        return [reader.pages[i].extract_text() or "" for i in range(start, end)]
+    except Exception as e:
+        raise ExtractionError(f"PDF extraction failed: {str(e)}. Install PyPDF2: pip install PyPDF2")
+
+
+def _image_frame_count(file_path: str) -> int:
+    try:
+        from PIL import Image
+        with Image.open(file_path) as img:
+            return getattr(img, "n_frames", 1)
+    except Exception as e:
+        raise ExtractionError(f"Image OCR failed: {str(e)}. Install: pip install pillow pytesseract")
+
+
+def _ocr_frames(file_path: str, start: int, end: int) -> List[str]:
+    try:
+        from PIL import Image
+        import pytesseract
+        texts = []
+        with Image.open(file_path) as img:
+            for frame in range(start, end):
+                img.seek(frame)
+                texts.append(pytesseract.image_to_string(img))
+        return texts
+    except Exception as e:
+        raise ExtractionError(f"Image OCR failed: {str(e)}. Install: pip install pillow pytesseract")
+
+
+async def iter_pages(
+    file_path: str,
+    filename: str,
+    timeout: float,
+    max_workers: Optional[int] = None
+) -> AsyncIterator[Tuple[int, str]]:
+    """
+    Extract a file's text page by page in the process pool
+
+    Args:
+        file_path: Path of the saved upload
+        filename: Original filename, used to pick the extractor
+        timeout: Seconds allowed for the whole extraction
+        max_workers: Pool size if the pool has not been created yet
+
+    Yields:
+        (page number, text) pairs in document order; formats without pages
+        yield their whole text as page 1
+
+    Raises:
+        ExtractionError: If the file cannot be read, or a worker process died
+        asyncio.TimeoutError: If extraction exceeds the timeout; this
+            request's batches that have not started are cancelled
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    executor = get_executor(max_workers)
+
+    def remaining() -> float:
+        return max(deadline - loop.time(), 0)
+
+    file_ext = os.path.splitext(filename)[1].lower()
+    batches = []
+    try:
+        if file_ext == '.pdf':
+            count_fn, batch_fn = _pdf_page_count, _extract_pdf_pages
+        elif file_ext in IMAGE_EXTENSIONS:
+            count_fn, batch_fn = _image_frame_count, _ocr_frames
+        else:
+            text = await asyncio.wait_for(loop.run_in_executor(executor, extract_text, file_path, filename), remaining())
+            yield 1, text
+            return
+
+        page_count = await asyncio.wait_for(loop.run_in_executor(executor, count_fn, file_path), remaining())
+        batches = [
+            loop.run_in_executor(executor, batch_fn, file_path, start, min(start + PAGE_BATCH_SIZE, page_count))
+            for start in range(0, page_count, PAGE_BATCH_SIZE)
+        ]
+        page = 0
+        for batch in batches:
+            for text in await asyncio.wait_for(batch, remaining()):
+                page += 1
+                yield page, text
+    except asyncio.TimeoutError:
+        print(f"⚠ Extraction of {filename} timed out after {timeout}s; cancelling its remaining batches")
+        raise
+    except BrokenProcessPool:
+        # A worker died (e.g. out of memory); start a fresh pool for later requests
+        if _executor is executor:
+            shutdown_executor()
+        raise ExtractionError("Extraction failed because a worker process died; please retry")
+    finally:
+        # Drop batches that have not started yet (timeout, error or client gone)
+        for batch in batches:
+            batch.cancel()
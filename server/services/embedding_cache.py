@@ -0,0 +1,208 @@
+"""
+Persistent chunk-level embedding cache.
+
+Vectors are appended to a float32 file (vectors.f32) and their keys, one per
+line in the same order, to keys.txt. A key is the SHA-256 of the embedding
+model name and the chunk text, so re-indexing an edited document only sends
+the chunks that actually changed to the embedding backend.
+
+Appends take an exclusive flock on cache.lock and first pick up rows other
+processes have written, so several workers can share one cache directory.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking, one writer per cache directory
+    fcntl = None
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+VECTORS_FILE = "vectors.f32"
+KEYS_FILE = "keys.txt"
+META_FILE = "meta.json"
+LOCK_FILE = "cache.lock"
+
+
+class EmbeddingCache:
+    """Append-only on-disk store of chunk embeddings for one model"""
+
+    def __init__(self, cache_dir: str, model_name: str):
+        self.model_name = model_name
+        self.directory = os.path.join(cache_dir, re.sub(r"[^A-Za-z0-9_.-]", "_", model_name))
+        self.dimension: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self._rows: Dict[str, int] = {}
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def key(self, text: str) -> str:
+        """Cache key for a chunk of text"""
+        return hashlib.sha256(f"{self.model_name}\x1f{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """
+        Look up cached embeddings
+
+        Args:
+            texts: Chunk texts
+
+        Returns:
+            One vector per text, or None where the text is not cached
+        """
+        self._ensure_loaded()
+        results = []
+        with self._lock:
+            for text in texts:
+                row = self._rows.get(self.key(text))
+                if row is None:
+                    self.misses += 1
+                    results.append(None)
+                else:
+                    self.hits += 1
+                    results.append(self._vectors[row].tolist())
+        return results
+
+    def put_many(self, texts: List[str], vectors: List[List[float]]) -> None:
+        """
+        Append new embeddings to the cache files
+
+        Args:
+            texts: Chunk texts
+            vectors: Embeddings for texts, in the same order
+        """
+        self._ensure_loaded()
+        with self._lock, self._file_lock():
+            # Another process may have appended since we loaded; keep our rows aligned with the files
+            self._load_files()
+
+            new_keys = []
+            new_vectors = []
+            for text, vector in zip(texts, vectors):
+                key = self.key(text)
+                if key in self._rows:
+                    continue
+                if self.dimension is None:
+                    self.dimension = len(vector)
+                    self._vectors = np.zeros((0, self.dimension), dtype=np.float32)
+                if len(vector) != self.dimension:
+                    print(f"Skipping embedding cache write: dimension {len(vector)} != {self.dimension}")
+                    continue
+                self._rows[key] = len(self._rows)
+                new_keys.append(key)
+                new_vectors.append(vector)
+
+            if not new_keys:
+                return
+
+            block = np.asarray(new_vectors, dtype=np.float32)
+            self._vectors = np.vstack([self._vectors, block])
+            meta_path = os.path.join(self.directory, META_FILE)
+            if not os.path.exists(meta_path):
+                with open(meta_path, "w") as f:
+                    json.dump({"model": self.model_name, "dimension": self.dimension}, f)
+            # Vectors first: a crash between the two writes leaves an orphaned vector, never a dangling key
+            with open(os.path.join(self.directory, VECTORS_FILE), "ab") as f:
+                f.write(block.tobytes())
+            with open(os.path.join(self.directory, KEYS_FILE), "a") as f:
+                f.write("".join(f"{key}\n" for key in new_keys))
+
+    def size(self) -> int:
+        """Get number of cached embeddings"""
+        self._ensure_loaded()
+        return len(self._rows)
+
+    def stats(self) -> Dict[str, object]:
+        """Get cache usage counters"""
+        return {
+            "model": self.model_name,
+            "entries": self.size(),
+            "dimension": self.dimension,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def _ensure_loaded(self) -> None:
+        """Read the cache files once per process"""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            with self._file_lock():
+                self._load_files()
+            self._loaded = True
+            if self._rows:
+                print(f"✓ Loaded {len(self._rows)} cached embeddings for {self.model_name}")
+
+    def _load_files(self) -> None:
+        """Read keys and vectors from disk (caller holds both locks)"""
+        keys_path = os.path.join(self.directory, KEYS_FILE)
+        vectors_path = os.path.join(self.directory, VECTORS_FILE)
+        meta_path = os.path.join(self.directory, META_FILE)
+        if not all(os.path.exists(p) for p in (keys_path, vectors_path, meta_path)):
+            return
+
+        with open(meta_path, "r") as f:
+            dimension = json.load(f)["dimension"]
+        with open(keys_path, "r") as f:
+            keys = [line.strip() for line in f if line.strip()]
+        if (len(keys) == len(self._rows) and self.dimension == dimension
+                and os.path.getsize(vectors_path) == len(keys) * dimension * 4):
+            return
+        raw = np.fromfile(vectors_path, dtype=np.float32)
+
+        rows = min(len(keys), raw.size // dimension)
+        if raw.size != rows * dimension:
+            # Drop vectors orphaned by an interrupted write so later rows stay aligned with keys
+            with open(vectors_path, "r+b") as f:
+                f.truncate(rows * dimension * 4)
+        self.dimension = dimension
+        self._vectors = raw[:rows * dimension].reshape(rows, dimension)
+        self._rows = {key: i for i, key in enumerate(keys[:rows])}
+
+    @contextmanager
+    def _file_lock(self):
+        """Hold an exclusive lock on the cache directory across processes"""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, LOCK_FILE), "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that only sends uncached chunks to the backend"""
+
+    def __init__(self, underlying: Embeddings, cache: EmbeddingCache):
+        self.underlying = underlying
+        self.cache = cache
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = self.cache.get_many(texts)
+
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        if missing:
+            embedded = self.underlying.embed_documents(missing)
+            self.cache.put_many(missing, embedded)
+            by_text = dict(zip(missing, embedded))
+            vectors = [by_text[text] if vector is None else vector for text, vector in zip(texts, vectors)]
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.underlying.embed_query(text)
@@ -0,0 +1,115 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+from langchain_core.embeddings import Embeddings
+
+
+class BatchedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that sends documents in batches with bounded concurrency.
+
+    Chunks are grouped into batches capped by count and total characters,
+    batches are embedded in parallel, and a failed batch is retried on its
+    own with exponential backoff instead of restarting the whole document.
+    """
+
+    def __init__(
+        self,
+        underlying: Embeddings,
+        batch_size: int = 32,
+        max_batch_chars: int = 48000,
+        concurrency: int = 4,
+        max_retries: int = 3,
+        initial_backoff: float = 1.0
+    ):
+        self.underlying = underlying
+        self.batch_size = batch_size
+        self.max_batch_chars = max_batch_chars
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.initial_backoff = initial_backoff
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="embed")
+        self._lock = threading.Lock()
+        self._stats = {
+            "chunks": 0,
+            "batches": 0,
+            "retries": 0,
+            "seconds": 0.0,
+            "last_chunks": 0,
+            "last_seconds": 0.0,
+        }
+
+    def make_batches(self, texts: List[str]) -> List[List[int]]:
+        """Group text indices into batches bounded by batch_size and max_batch_chars"""
+        batches, current, chars = [], [], 0
+        for i, text in enumerate(texts):
+            if current and (len(current) >= self.batch_size or chars + len(text) > self.max_batch_chars):
+                batches.append(current)
+                current, chars = [], 0
+            current.append(i)
+            chars += len(text)
+        if current:
+            batches.append(current)
+        return batches
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+
+        started = time.perf_counter()
+        batches = self.make_batches(texts)
+        if len(batches) == 1:
+            results = [self._embed_batch([texts[i] for i in batches[0]])]
+        else:
+            futures = [self._executor.submit(self._embed_batch, [texts[i] for i in batch]) for batch in batches]
+            results = [future.result() for future in futures]
+
+        vectors: List[List[float]] = [None] * len(texts)
+        for batch, batch_vectors in zip(batches, results):
+            for i, vector in zip(batch, batch_vectors):
+                vectors[i] = vector
+
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._stats["chunks"] += len(texts)
+            self._stats["batches"] += len(batches)
+            self._stats["seconds"] += elapsed
+            self._stats["last_chunks"] = len(texts)
+            self._stats["last_seconds"] = elapsed
+        print(f"✓ Embedded {len(texts)} chunks in {len(batches)} batches, {len(texts) / max(elapsed, 1e-6):.1f} chunks/s")
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.underlying.embed_query(text)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get embedding throughput counters"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["chunks_per_second"] = round(stats["chunks"] / stats["seconds"], 2) if stats["seconds"] else None
+        stats["last_chunks_per_second"] = (
+            round(stats["last_chunks"] / stats["last_seconds"], 2) if stats["last_seconds"] else None
+        )
+        stats["batch_size"] = self.batch_size
+        stats["concurrency"] = self.concurrency
+        return stats
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Embed one batch, retrying just this batch on failure"""
+        backoff = self.initial_backoff
+        for attempt in range(self.max_retries + 1):
+            try:
+                vectors = self.underlying.embed_documents(texts)
+                if len(vectors) != len(texts):
+                    raise ValueError(f"Expected {len(texts)} embeddings, got {len(vectors)}")
+                return vectors
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                with self._lock:
+                    self._stats["retries"] += 1
+                print(f"Embedding batch of {len(texts)} failed ({e}); retrying in {backoff:.1f}s")
+                time.sleep(backoff)
+                backoff *= 2
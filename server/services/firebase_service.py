@@ -1,10 +1,46 @@
 import firebase_admin
 from firebase_admin import credentials, firestore
-from typing import Dict, Any, Optional
-from datetime import datetime
+from google.api_core.exceptions import FailedPrecondition
+from google.cloud.firestore_v1.bulk_writer import BulkWriterOptions, SendMode
+from typing import Dict, Any, Optional, List, Tuple
+from datetime import datetime, timedelta
 import json
 import os
-from config import FIREBASE_CONFIG
+import secrets
+import string
+import threading
+from services.single_flight import SingleFlight
+from services.geo_utils import haversine_km, geohash_cells_for_bbox, bbox_for_radius, ticket_coordinates
+from services.time_utils import to_timestamp
+from config import (
+    FIREBASE_CONFIG,
+    BULK_FLUSH_SIZE,
+    BULK_MAX_RETRIES,
+    BULK_INITIAL_OPS_PER_SECOND,
+    BULK_MAX_OPS_PER_SECOND,
+    ARCHIVE_COLLECTION,
+)
+
+# gRPC status codes that will not succeed on retry (INVALID_ARGUMENT, NOT_FOUND,
+# ALREADY_EXISTS, PERMISSION_DENIED, FAILED_PRECONDITION)
+NON_RETRYABLE_CODES = {3, 5, 6, 7, 9}
+ALREADY_EXISTS_CODE = 6
+
+
+def is_valid_document_id(doc_id: str) -> bool:
+    """
+    Check whether a string can be used as a Firestore document ID
+
+    IDs containing "/" would address a subcollection path and make
+    collection.document() raise, so they are rejected up front.
+    """
+    return (
+        bool(doc_id)
+        and "/" not in doc_id
+        and doc_id not in (".", "..")
+        and not (doc_id.startswith("__") and doc_id.endswith("__"))
+        and len(doc_id.encode("utf-8")) <= 1500
+    )
 
 
 class FirebaseService:
@@ -12,6 +48,8 @@ class FirebaseService:
     
     _instance = None
     _db = None
+    # Concurrent identical reads share one Firestore operation
+    _flight = SingleFlight()
     
     def __new__(cls):
         if cls._instance is None:
@@ -38,6 +76,11 @@ class FirebaseService:
                 print(f"Firebase initialization error: {e}")
                 self._db = None
     
+    @property
+    def db(self):
+        """Firestore client, or None if Firebase failed to initialize (for scripts and listeners)"""
+        return self._db
+    
     def save_ticket(self, ticket_data: Dict[str, Any]) -> Optional[str]:
         """
         Save a ticket to Firestore
@@ -66,6 +109,151 @@ class FirebaseService:
             print(f"Error saving ticket to Firebase: {e}")
             return None
     
+    def new_ticket_id(self) -> str:
+        """
+        Allocate a Firestore document ID for a ticket without writing it
+
+        Returns:
+            A 20-character auto ID in the same format Firestore generates
+        """
+        if self._db is not None:
+            return self._db.collection("tickets").document().id
+        alphabet = string.ascii_letters + string.digits
+        return "".join(secrets.choice(alphabet) for _ in range(20))
+    
+    def save_tickets(
+        self,
+        tickets: Dict[str, Dict[str, Any]],
+        flush_size: int = BULK_FLUSH_SIZE
+    ) -> Dict[str, Any]:
+        """
+        Create many tickets through a Firestore BulkWriter.
+
+        Writes use create() on pre-allocated IDs (see new_ticket_id). A ticket
+        that already exists counts as written, so replaying a batch whose
+        commit succeeded is harmless and never overwrites later updates.
+
+        Args:
+            tickets: Mapping of document ID to ticket data
+            flush_size: Number of queued writes after which the writer is flushed
+
+        Returns:
+            Dict with "written" (list of IDs) and "failed" (ID -> error message)
+        """
+        now = datetime.utcnow()
+        operations = []
+        for doc_id, ticket_data in tickets.items():
+            ticket_data.setdefault("created_at", now)
+            ticket_data.setdefault("updated_at", now)
+            operations.append(("create", doc_id, ticket_data))
+        return self._bulk_write(operations, flush_size)
+
+    def update_tickets_bulk(
+        self,
+        updates: Dict[str, Dict[str, Any]],
+        flush_size: int = BULK_FLUSH_SIZE
+    ) -> Dict[str, Any]:
+        """
+        Update many tickets through a Firestore BulkWriter
+
+        Args:
+            updates: Mapping of document ID to fields to update
+            flush_size: Number of queued writes after which the writer is flushed
+
+        Returns:
+            Dict with "written" (list of IDs) and "failed" (ID -> error message)
+        """
+        return self.update_documents_bulk("tickets", updates, flush_size)
+
+    def update_documents_bulk(
+        self,
+        collection: str,
+        updates: Dict[str, Dict[str, Any]],
+        flush_size: int = BULK_FLUSH_SIZE
+    ) -> Dict[str, Any]:
+        """
+        Update many documents of any collection through a Firestore BulkWriter
+
+        Args:
+            collection: Collection the documents belong to
+            updates: Mapping of document ID to fields to update
+            flush_size: Number of queued writes after which the writer is flushed
+
+        Returns:
+            Dict with "written" (list of IDs) and "failed" (ID -> error message)
+        """
+        now = datetime.utcnow()
+        operations = []
+        for doc_id, update_data in updates.items():
+            update_data.setdefault("updated_at", now)
+            operations.append(("update", doc_id, update_data))
+        return self._bulk_write(operations, flush_size, collection)
+
+    def _bulk_write(
+        self,
+        operations: List[Tuple[str, str, Dict[str, Any]]],
+        flush_size: int,
+        collection_name: str = "tickets"
+    ) -> Dict[str, Any]:
+        """
+        Run create/set/update operations through a BulkWriter.
+
+        The writer ramps its rate up from BULK_INITIAL_OPS_PER_SECOND towards
+        BULK_MAX_OPS_PER_SECOND and retries transient failures with backoff
+        up to BULK_MAX_RETRIES attempts. A create that finds the document
+        already there is reported as written.
+        """
+        result = {"written": [], "failed": {}}
+        if not operations:
+            return result
+        if self._db is None:
+            result["failed"] = {doc_id: "Firebase not initialized" for _, doc_id, _ in operations}
+            return result
+
+        lock = threading.Lock()
+        create_ids = {doc_id for op, doc_id, _ in operations if op == "create"}
+
+        def on_result(reference, write_result, bulk_writer):
+            with lock:
+                result["written"].append(reference.id)
+
+        def on_error(error, bulk_writer) -> bool:
+            doc_id = error.operation.reference.id
+            if error.code == ALREADY_EXISTS_CODE and doc_id in create_ids:
+                with lock:
+                    result["written"].append(doc_id)
+                return False
+            if error.code not in NON_RETRYABLE_CODES and error.attempts < BULK_MAX_RETRIES:
+                return True
+            with lock:
+                result["failed"][doc_id] = error.message
+            return False
+
+        writer = self._db.bulk_writer(options=BulkWriterOptions(
+            initial_ops_per_second=BULK_INITIAL_OPS_PER_SECOND,
+            max_ops_per_second=BULK_MAX_OPS_PER_SECOND,
+            mode=SendMode.parallel,
+        ))
+        writer.on_write_result(on_result)
+        writer.on_write_error(on_error)
+
+        collection = self._db.collection(collection_name)
+        try:
+            for count, (op, doc_id, data) in enumerate(operations, start=1):
+                if op == "create":
+                    writer.create(collection.document(doc_id), data)
+                elif op == "set":
+                    writer.set(collection.document(doc_id), data)
+                else:
+                    writer.update(collection.document(doc_id), data)
+                if count % flush_size == 0:
+                    writer.flush()
+        finally:
+            writer.close()
+
+        print(f"Bulk write complete: {len(result['written'])} written, {len(result['failed'])} failed")
+        return result
+    
     def get_ticket(self, ticket_id: str) -> Optional[Dict[str, Any]]:
         """
         Get a ticket from Firestore
@@ -76,6 +264,9 @@ class FirebaseService:
         Returns:
             Ticket data if found, None otherwise
         """
+        return self._flight.do(("get_ticket", ticket_id), self._get_ticket, ticket_id)
+    
+    def _get_ticket(self, ticket_id: str) -> Optional[Dict[str, Any]]:
         try:
             if self._db is None:
                 raise Exception("Firebase not initialized")
@@ -88,6 +279,56 @@ class FirebaseService:
             print(f"Error fetching ticket from Firebase: {e}")
             return None
     
+    def get_tickets(
+        self,
+        ticket_ids: List[str],
+        fields: Optional[List[str]] = None
+    ) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Get many tickets in as few round-trips as possible
+        
+        IDs may be Firestore document IDs or "ticket_id" field values
+        ("TKT-..."), which is what hotspot ticket lists hold. Document IDs are
+        fetched with a single get_all; the rest are resolved with "in"
+        queries on ticket_id, 30 values per query.
+        
+        Args:
+            ticket_ids: Document IDs or ticket_id values
+            fields: Optional field paths to return (projection)
+            
+        Returns:
+            Mapping of requested ID to ticket data (with "id" set to the
+            document ID) for the tickets that exist, None on error
+        """
+        try:
+            if self._db is None:
+                raise Exception("Firebase not initialized")
+            
+            collection = self._db.collection("tickets")
+            tickets = {}
+            refs = [collection.document(ticket_id) for ticket_id in ticket_ids if is_valid_document_id(ticket_id)]
+            if refs:
+                for doc in self._db.get_all(refs, field_paths=fields or None):
+                    if doc.exists:
+                        tickets[doc.id] = dict(doc.to_dict(), id=doc.id)
+            
+            unresolved = [ticket_id for ticket_id in ticket_ids if ticket_id not in tickets]
+            projection = list(dict.fromkeys(list(fields) + ["ticket_id"])) if fields else None
+            for i in range(0, len(unresolved), 30):
+                query = collection.where("ticket_id", "in", unresolved[i:i + 30])
+                if projection:
+                    query = query.select(projection)
+                for doc in query.stream():
+                    ticket = doc.to_dict()
+                    key = ticket.get("ticket_id")
+                    if fields and "ticket_id" not in fields:
+                        ticket.pop("ticket_id", None)
+                    tickets.setdefault(key, dict(ticket, id=doc.id))
+            return tickets
+        except Exception as e:
+            print(f"Error fetching tickets from Firebase: {e}")
+            return None
+    
     def update_ticket(self, ticket_id: str, update_data: Dict[str, Any]) -> bool:
         """
         Update a ticket in Firestore
@@ -110,7 +351,413 @@ class FirebaseService:
         except Exception as e:
             print(f"Error updating ticket: {e}")
             return False
+
+    def add_duplicate_report(self, ticket_id: str, report: Dict[str, Any], merge_id: Optional[str] = None) -> bool:
+        """
+        Attach a duplicate report to an existing ticket
+
+        Args:
+            ticket_id: ID of the existing ticket
+            report: Summary of the duplicate report
+            merge_id: Unique ID of a queued report; if set, the report is
+                applied in a transaction and skipped when a report with the
+                same ID is already on the ticket, so retries never count it twice
+
+        Returns:
+            True if successful (or already applied), False otherwise
+        """
+        try:
+            if self._db is None:
+                raise Exception("Firebase not initialized")
+
+            now = datetime.utcnow()
+            report.setdefault("reported_at", now)
+            ticket_ref = self._db.collection("tickets").document(ticket_id)
+            fields = {
+                "report_count": firestore.Increment(1),
+                "duplicate_reports": firestore.ArrayUnion([report]),
+                "last_reported_at": now,
+                "updated_at": now,
+            }
+            if merge_id is None:
+                ticket_ref.update(fields)
+            else:
+                report["merge_id"] = merge_id
+
+                @firestore.transactional
+                def apply(transaction) -> bool:
+                    snapshot = ticket_ref.get(transaction=transaction)
+                    applied = (snapshot.to_dict() or {}).get("duplicate_reports") or []
+                    if any(r.get("merge_id") == merge_id for r in applied if isinstance(r, dict)):
+                        return False
+                    transaction.update(ticket_ref, fields)
+                    return True
+
+                if not apply(self._db.transaction()):
+                    print(f"Duplicate report {merge_id} already merged into ticket {ticket_id}")
+                    return True
+            print(f"Duplicate report merged into ticket {ticket_id}")
+            return True
+        except Exception as e:
+            print(f"Error merging duplicate report: {e}")
+            return False
+
+    def list_tickets_by_status(self, statuses: List[str]) -> list:
+        """
+        List tickets whose status is one of the given values
+        
+        Args:
+            statuses: Status values to match (at most 30)
+            
+        Returns:
+            List of tickets; each carries the document's "_update_time", which
+            archive_tickets uses as a write precondition
+        """
+        try:
+            if self._db is None:
+                raise Exception("Firebase not initialized")
+            
+            docs = self._db.collection("tickets").where("status", "in", statuses).stream()
+            tickets = []
+            for doc in docs:
+                ticket = doc.to_dict()
+                ticket["id"] = doc.id
+                ticket["_update_time"] = doc.update_time
+                tickets.append(ticket)
+            
+            return tickets
+        except Exception as e:
+            print(f"Error listing tickets by status: {e}")
+            return []
+    
+    def archive_tickets(self, tickets: Dict[str, Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Move tickets from the live collection to the archive collection.
+        
+        Each ticket is copied and deleted in the same atomic batch, so a
+        ticket is never lost or present in neither collection. The delete is
+        conditional on the document's update time when it was read, so a
+        ticket reopened or updated since then is left in place rather than
+        archived with stale data.
+        
+        Args:
+            tickets: Mapping of document ID to ticket data from list_tickets_by_status
+                (at most 250 entries)
+            
+        Returns:
+            Dict with "archived" and "skipped" (changed since read) counts
+        """
+        if self._db is None:
+            raise Exception("Firebase not initialized")
+        
+        items = list(tickets.items())
+        try:
+            self._commit_archive(items)
+            return {"archived": len(items), "skipped": 0}
+        except FailedPrecondition:
+            pass
+        
+        # Some ticket changed since it was read; move the rest one at a time
+        archived = 0
+        for item in items:
+            try:
+                self._commit_archive([item])
+                archived += 1
+            except FailedPrecondition:
+                print(f"Ticket {item[0]} changed since it was read; not archived")
+        return {"archived": archived, "skipped": len(items) - archived}
+    
+    def _commit_archive(self, items: List[Tuple[str, Dict[str, Any]]]) -> None:
+        now = datetime.utcnow()
+        batch = self._db.batch()
+        live = self._db.collection("tickets")
+        archive = self._db.collection(ARCHIVE_COLLECTION)
+        for doc_id, ticket_data in items:
+            archived = {k: v for k, v in ticket_data.items() if k not in ("id", "_update_time")}
+            archived["archived_at"] = now
+            batch.set(archive.document(doc_id), archived)
+            update_time = ticket_data.get("_update_time")
+            option = self._db.write_option(last_update_time=update_time) if update_time else None
+            batch.delete(live.document(doc_id), option=option)
+        batch.commit()
+    
+    def acquire_lease(self, name: str, holder: str, ttl_seconds: float) -> bool:
+        """
+        Claim a named lease shared by every server process
+        
+        Used so that periodic jobs run once per interval across all workers
+        instead of once per process. The lease is not released; it expires.
+        
+        Args:
+            name: Lease name (document ID in the "_leases" collection)
+            holder: Identifier of the claiming process
+            ttl_seconds: How long the lease is held
+            
+        Returns:
+            True if this holder now holds the lease, False if another holder does
+        """
+        if self._db is None:
+            raise Exception("Firebase not initialized")
+        
+        ref = self._db.collection("_leases").document(name)
+        
+        @firestore.transactional
+        def claim(transaction) -> bool:
+            snapshot = ref.get(transaction=transaction)
+            lease = snapshot.to_dict() if snapshot.exists else {}
+            now = datetime.utcnow()
+            expires_at = to_timestamp(lease.get("expires_at"))
+            if lease.get("holder") not in (None, holder) and expires_at and expires_at > now.timestamp():
+                return False
+            transaction.set(ref, {
+                "holder": holder,
+                "acquired_at": now,
+                "expires_at": now + timedelta(seconds=ttl_seconds),
+            })
+            return True
+        
+        return claim(self._db.transaction())
+    
+    def get_archived_ticket(self, ticket_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a ticket from the archive collection
+        
+        Args:
+            ticket_id: ID of the ticket
+            
+        Returns:
+            Ticket data if found, None otherwise
+        """
+        try:
+            if self._db is None:
+                raise Exception("Firebase not initialized")
+            
+            doc = self._db.collection(ARCHIVE_COLLECTION).document(ticket_id).get()
+            if doc.exists:
+                return doc.to_dict()
+            return None
+        except Exception as e:
+            print(f"Error fetching archived ticket: {e}")
+            return None
+    
+    def list_archived_tickets(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        limit: int = 100,
+        start_after: Optional[str] = None
+    ) -> list:
+        """
+        List tickets from the archive collection, one page at a time
+        
+        Args:
+            filters: Optional equality filters to apply
+            limit: Maximum number of tickets to return
+            start_after: Document ID of the last ticket of the previous page
+            
+        Returns:
+            List of archived tickets ordered by document ID
+        """
+        try:
+            if self._db is None:
+                raise Exception("Firebase not initialized")
+            
+            collection = self._db.collection(ARCHIVE_COLLECTION)
+            query = collection
+            if filters:
+                for key, value in filters.items():
+                    query = query.where(key, "==", value)
+            query = query.order_by("__name__").limit(limit)
+            if start_after:
+                query = query.start_after(collection.document(start_after).get())
+            
+            tickets = []
+            for doc in query.stream():
+                ticket = doc.to_dict()
+                ticket["id"] = doc.id
+                tickets.append(ticket)
+            return tickets
+        except Exception as e:
+            print(f"Error listing archived tickets: {e}")
+            return []
+    
+    def query_tickets_by_geohash_prefix(
+        self,
+        prefix: str,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> list:
+        """
+        List tickets whose geohash starts with a prefix (a single range query)
+        
+        Args:
+            prefix: Geohash prefix
+            filters: Optional equality filters to apply
+            
+        Returns:
+            List of tickets
+        """
+        try:
+            if self._db is None:
+                raise Exception("Firebase not initialized")
+            
+            query = self._db.collection("tickets")
+            if filters:
+                for key, value in filters.items():
+                    query = query.where(key, "==", value)
+            query = query.where("geohash", ">=", prefix).where("geohash", "<", prefix + "~")
+            
+            tickets = []
+            for doc in query.stream():
+                ticket = doc.to_dict()
+                ticket["id"] = doc.id
+                tickets.append(ticket)
+            return tickets
+        except Exception as e:
+            print(f"Error querying tickets by geohash: {e}")
+            return []
     
+    def query_tickets_in_bbox(
+        self,
+        south: float,
+        west: float,
+        north: float,
+        east: float,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> list:
+        """
+        List tickets inside a bounding box, reading only the covering geohash cells
+        
+        Args:
+            south, west, north, east: Bounding box in degrees
+            filters: Optional equality filters to apply
+            
+        Returns:
+            List of tickets inside the box
+        """
+        try:
+            if self._db is None:
+                raise Exception("Firebase not initialized")
+            
+            precision, cells = geohash_cells_for_bbox(south, west, north, east)
+            field = f"geohash_{precision}"
+            
+            tickets = []
+            # Firestore allows at most 30 values per "in" filter
+            for i in range(0, len(cells), 30):
+                query = self._db.collection("tickets").where(field, "in", cells[i:i + 30])
+                if filters:
+                    for key, value in filters.items():
+                        query = query.where(key, "==", value)
+                for doc in query.stream():
+                    ticket = doc.to_dict()
+                    coordinates = ticket_coordinates(ticket)
+                    if coordinates is None:
+                        continue
+                    lat, lon = coordinates
+                    # Covering cells overhang the box; keep exact matches only
+                    if south <= lat <= north and west <= lon <= east:
+                        ticket["id"] = doc.id
+                        tickets.append(ticket)
+            return tickets
+        except Exception as e:
+            print(f"Error querying tickets in bounding box: {e}")
+            return []
+    
+    def query_tickets_near(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> list:
+        """
+        List tickets within a radius, sorted by distance
+        
+        Args:
+            latitude: GPS latitude of the center
+            longitude: GPS longitude of the center
+            radius_km: Search radius in kilometers
+            filters: Optional equality filters to apply
+            
+        Returns:
+            List of tickets with a "distance_km" field, nearest first
+        """
+        south, west, north, east = bbox_for_radius(latitude, longitude, radius_km)
+        tickets = []
+        for ticket in self.query_tickets_in_bbox(south, west, north, east, filters):
+            distance = haversine_km(latitude, longitude, *ticket_coordinates(ticket))
+            if distance <= radius_km:
+                ticket["distance_km"] = round(distance, 4)
+                tickets.append(ticket)
+        tickets.sort(key=lambda t: t["distance_km"])
+        return tickets
+    
+    def count_tickets(self, filters: Optional[Dict[str, Any]] = None) -> Optional[int]:
+        """
+        Count tickets with a Firestore aggregation query (no documents are transferred)
+        
+        Args:
+            filters: Optional equality filters to apply
+            
+        Returns:
+            Number of matching tickets, None on error
+        """
+        try:
+            if self._db is None:
+                raise Exception("Firebase not initialized")
+            
+            query = self._db.collection("tickets")
+            
+            if filters:
+                for key, value in filters.items():
+                    query = query.where(key, "==", value)
+            
+            return query.count().get()[0][0].value
+        except Exception as e:
+            print(f"Error counting tickets: {e}")
+            return None
+    
+    def get_tickets_version(self, filters: Optional[Dict[str, Any]] = None) -> Optional[Tuple[Any, ...]]:
+        """
+        Cheap marker that changes whenever the tickets matching filters change
+
+        Combines a count aggregation (catches creates and deletes) with the
+        newest "updated_at" (catches edits). The server stores updated_at as a
+        timestamp and the web app as an ISO string; a range filter only
+        matches one type, so the newest of each is read separately. That is
+        three small reads instead of streaming every ticket. With filters
+        the updated_at lookups need a composite index on (filter field,
+        updated_at).
+
+        Args:
+            filters: Optional equality filters to apply
+
+        Returns:
+            Tuple of (count, newest timestamp, newest ISO string, newest IDs),
+            None on error
+        """
+        try:
+            if self._db is None:
+                raise Exception("Firebase not initialized")
+
+            query = self._db.collection("tickets")
+            if filters:
+                for key, value in filters.items():
+                    query = query.where(key, "==", value)
+
+            marker = [query.count().get()[0][0].value]
+            for lower_bound in (datetime(1970, 1, 1), ""):
+                newest = list(
+                    query.where("updated_at", ">=", lower_bound)
+                    .order_by("updated_at", direction=firestore.Query.DESCENDING)
+                    .limit(1)
+                    .stream()
+                )
+                marker.append((newest[0].id, newest[0].get("updated_at")) if newest else None)
+            return tuple(marker)
+        except Exception as e:
+            print(f"Error reading tickets version: {e}")
+            return None
+
     def list_tickets(self, filters: Optional[Dict[str, Any]] = None) -> list:
         """
         List tickets from Firestore
@@ -121,6 +768,10 @@ class FirebaseService:
         Returns:
             List of tickets
         """
+        key = ("list_tickets", tuple(sorted((filters or {}).items())))
+        return self._flight.do(key, self._list_tickets, filters)
+    
+    def _list_tickets(self, filters: Optional[Dict[str, Any]] = None) -> list:
         try:
             if self._db is None:
                 raise Exception("Firebase not initialized")
@@ -0,0 +1,99 @@
+from typing import Dict, Any, Optional, List
+from shapely.geometry import Point
+from shapely.prepared import prep
+from config import CLOSED_TICKET_STATUSES
+from services.firebase_service import firebase_service
+from services.geo_utils import haversine_km, ticket_coordinates
+from services.ward_service import ward_service
+
+
+class TicketGeoQueryService:
+    """Service to answer radius, bounding-box and ward-polygon ticket queries"""
+
+    def near(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        filters: Optional[Dict[str, Any]] = None,
+        include_closed: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Tickets within a radius, nearest first
+
+        Args:
+            latitude: GPS latitude of the center
+            longitude: GPS longitude of the center
+            radius_km: Search radius in kilometers
+            filters: Optional equality filters (status, issue_type, ...)
+            include_closed: Also return closed/resolved tickets
+
+        Returns:
+            List of tickets with "distance_km"
+        """
+        tickets = firebase_service.query_tickets_near(latitude, longitude, radius_km, filters)
+        return self._drop_closed(tickets, include_closed)
+
+    def within_bbox(
+        self,
+        south: float,
+        west: float,
+        north: float,
+        east: float,
+        filters: Optional[Dict[str, Any]] = None,
+        include_closed: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Tickets inside a bounding box, sorted by distance from its center
+
+        Returns:
+            List of tickets with "distance_km" from the box center
+        """
+        tickets = firebase_service.query_tickets_in_bbox(south, west, north, east, filters)
+        tickets = self._drop_closed(tickets, include_closed)
+        return self._sort_by_distance(tickets, (south + north) / 2, (west + east) / 2)
+
+    def within_ward(
+        self,
+        ward_code: str,
+        filters: Optional[Dict[str, Any]] = None,
+        include_closed: bool = False
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Tickets inside a ward boundary polygon, sorted by distance from its centroid
+
+        Returns:
+            List of tickets with "distance_km", or None if the ward is unknown
+        """
+        polygon = ward_service.get_ward_polygon(ward_code)
+        if polygon is None:
+            return None
+
+        # Polygons are (longitude, latitude); read the covering box, then test containment
+        west, south, east, north = polygon.bounds
+        prepared = prep(polygon)
+        tickets = [
+            t for t in firebase_service.query_tickets_in_bbox(south, west, north, east, filters)
+            if prepared.covers(Point(*reversed(ticket_coordinates(t))))
+        ]
+        tickets = self._drop_closed(tickets, include_closed)
+        centroid = polygon.centroid
+        return self._sort_by_distance(tickets, centroid.y, centroid.x)
+
+    @staticmethod
+    def _drop_closed(tickets: List[Dict[str, Any]], include_closed: bool) -> List[Dict[str, Any]]:
+        if include_closed:
+            return tickets
+        return [t for t in tickets if t.get("status") not in CLOSED_TICKET_STATUSES]
+
+    @staticmethod
+    def _sort_by_distance(tickets: List[Dict[str, Any]], latitude: float, longitude: float) -> List[Dict[str, Any]]:
+        for ticket in tickets:
+            ticket["distance_km"] = round(
+                haversine_km(latitude, longitude, *ticket_coordinates(ticket)), 4
+            )
+        tickets.sort(key=lambda t: t["distance_km"])
+        return tickets
+
+
+geo_query_service = TicketGeoQueryService()
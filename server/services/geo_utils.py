@@ -0,0 +1,184 @@
+from math import radians, sin, cos, sqrt, atan2
+from typing import Optional, Tuple
+
+
+EARTH_RADIUS_KM = 6371
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    Great-circle distance between two coordinates using the Haversine formula
+
+    Args:
+        lat1: Latitude of the first point
+        lon1: Longitude of the first point
+        lat2: Latitude of the second point
+        lon2: Longitude of the second point
+
+    Returns:
+        Distance in kilometers
+    """
+    rlat1, rlon1 = radians(lat1), radians(lon1)
+    rlat2, rlon2 = radians(lat2), radians(lon2)
+
+    dlat = rlat2 - rlat1
+    dlon = rlon2 - rlon1
+
+    a = sin(dlat/2)**2 + cos(rlat1) * cos(rlat2) * sin(dlon/2)**2
+    c = 2 * atan2(sqrt(a), sqrt(1-a))
+    return EARTH_RADIUS_KM * c
+
+
+def ticket_coordinates(ticket: dict) -> Optional[Tuple[float, float]]:
+    """
+    Read a ticket's coordinates
+
+    Tickets created by this server store top-level "latitude"/"longitude";
+    tickets created by the web app store only "location": {"lat", "lng"}.
+
+    Returns:
+        (latitude, longitude), or None if the ticket has no usable coordinates
+    """
+    latitude, longitude = ticket.get("latitude"), ticket.get("longitude")
+    if latitude is None or longitude is None:
+        location = ticket.get("location")
+        if not isinstance(location, dict):
+            return None
+        latitude, longitude = location.get("lat"), location.get("lng")
+    try:
+        latitude, longitude = float(latitude), float(longitude)
+    except (TypeError, ValueError):
+        return None
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return None
+    return latitude, longitude
+
+
+GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+# Precisions stored on every ticket as geohash_<p> fields for "in" queries
+GEOHASH_PRECISIONS = [4, 5, 6, 7]
+GEOHASH_FULL_PRECISION = 9
+
+
+def encode_geohash(latitude: float, longitude: float, precision: int = GEOHASH_FULL_PRECISION) -> str:
+    """
+    Encode a coordinate as a geohash string
+
+    Args:
+        latitude: GPS latitude coordinate
+        longitude: GPS longitude coordinate
+        precision: Number of base32 characters
+
+    Returns:
+        Geohash string
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True  # Geohash interleaves bits starting with longitude
+
+    while len(chars) < precision:
+        rng, value = (lon_range, longitude) if even else (lat_range, latitude)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits = bits << 1
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return "".join(chars)
+
+
+def geohash_fields(latitude: float, longitude: float) -> dict:
+    """
+    Geohash fields stored on a ticket document
+
+    Returns:
+        Dict with the full "geohash" and a "geohash_<p>" prefix per precision
+    """
+    full = encode_geohash(latitude, longitude, GEOHASH_FULL_PRECISION)
+    fields = {"geohash": full}
+    for precision in GEOHASH_PRECISIONS:
+        fields[f"geohash_{precision}"] = full[:precision]
+    return fields
+
+
+def geohash_cell_size(precision: int) -> tuple:
+    """Height and width in degrees of a geohash cell at a precision"""
+    total_bits = 5 * precision
+    lat_bits = total_bits // 2
+    lon_bits = total_bits - lat_bits
+    return 180.0 / (2 ** lat_bits), 360.0 / (2 ** lon_bits)
+
+
+def geohash_cell_count(south: float, west: float, north: float, east: float, precision: int = GEOHASH_PRECISIONS[0]) -> int:
+    """
+    Number of geohash cells needed to cover a bounding box
+
+    Defaults to the coarsest stored precision, which is what an oversized box
+    falls back to, so it bounds the number of Firestore queries a box costs
+    (one per 30 cells).
+    """
+    height, width = geohash_cell_size(precision)
+    rows = int((north + 90) // height) - int((south + 90) // height) + 1
+    cols = int((east + 180) // width) - int((west + 180) // width) + 1
+    return rows * cols
+
+
+def geohash_cells_for_bbox(south: float, west: float, north: float, east: float, max_cells: int = 30) -> tuple:
+    """
+    Find the geohash cells covering a bounding box.
+
+    Picks the finest stored precision whose covering fits in max_cells, so the
+    box can be answered with a single Firestore "in" query per 30 cells.
+
+    Args:
+        south, west, north, east: Bounding box in degrees
+        max_cells: Preferred upper bound on the number of cells
+
+    Returns:
+        Tuple of (precision, sorted list of geohash cells)
+    """
+    precision = GEOHASH_PRECISIONS[0]
+    for precision in sorted(GEOHASH_PRECISIONS, reverse=True):
+        if geohash_cell_count(south, west, north, east, precision) <= max_cells or precision == GEOHASH_PRECISIONS[0]:
+            break
+
+    height, width = geohash_cell_size(precision)
+    cells = set()
+    row = int((south + 90) // height)
+    while row * height - 90 <= north:
+        col = int((west + 180) // width)
+        while col * width - 180 <= east:
+            center_lat = min(row * height - 90 + height / 2, 90.0)
+            center_lon = min(col * width - 180 + width / 2, 180.0)
+            cells.add(encode_geohash(center_lat, center_lon, precision))
+            col += 1
+        row += 1
+    return precision, sorted(cells)
+
+
+def bbox_for_radius(latitude: float, longitude: float, radius_km: float) -> tuple:
+    """
+    Bounding box enclosing a circle
+
+    Returns:
+        Tuple of (south, west, north, east) in degrees
+    """
+    dlat = radius_km / 111.32
+    dlon = radius_km / max(111.32 * cos(radians(latitude)), 1e-6)
+    return (
+        max(latitude - dlat, -90.0),
+        max(longitude - dlon, -180.0),
+        min(latitude + dlat, 90.0),
+        min(longitude + dlon, 180.0),
+    )
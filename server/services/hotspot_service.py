@@ -0,0 +1,84 @@
+from typing import Dict, Any, List
+from services.firebase_service import firebase_service
+from services.geo_utils import haversine_km
+from services.single_flight import SingleFlight
+
+
+class HotspotService:
+    """Service to find locations with a high density of open tickets"""
+
+    def __init__(self):
+        self._flight = SingleFlight()
+
+    def get_hotspots(self, min_tickets: int = 2, radius_km: float = 0.5) -> List[Dict[str, Any]]:
+        """
+        Get all ticket hotspots where multiple tickets exist within a radius.
+        Concurrent requests with the same parameters share one computation.
+        
+        Args:
+            min_tickets: Minimum number of tickets to be considered a hotspot
+            radius_km: Search radius in kilometers
+        
+        Returns:
+            List of hotspot locations with ticket counts and priority information
+        """
+        return self._flight.do(("hotspots", min_tickets, radius_km), self._compute_hotspots, min_tickets, radius_km)
+
+    def _compute_hotspots(self, min_tickets: int, radius_km: float) -> List[Dict[str, Any]]:
+        all_tickets = firebase_service.list_tickets()
+        
+        hotspots = []
+        processed_coords = set()
+        
+        for ticket in all_tickets:
+            if ticket.get("status") == "closed":
+                continue
+            
+            ticket_lat = ticket.get("latitude")
+            ticket_lon = ticket.get("longitude")
+            
+            if not ticket_lat or not ticket_lon:
+                continue
+            
+            # Skip if already processed
+            coord_key = (round(ticket_lat, 4), round(ticket_lon, 4))
+            if coord_key in processed_coords:
+                continue
+            
+            # Count nearby tickets
+            nearby_count = 0
+            nearby_ticket_ids = []
+            
+            for other_ticket in all_tickets:
+                if other_ticket.get("status") == "closed":
+                    continue
+                
+                other_lat = other_ticket.get("latitude")
+                other_lon = other_ticket.get("longitude")
+                
+                if not other_lat or not other_lon:
+                    continue
+                
+                distance = haversine_km(ticket_lat, ticket_lon, other_lat, other_lon)
+                
+                if distance <= radius_km:
+                    nearby_count += 1
+                    nearby_ticket_ids.append(other_ticket.get("ticket_id"))
+            
+            # Add to hotspots if meets threshold
+            if nearby_count >= min_tickets:
+                hotspots.append({
+                    "latitude": ticket_lat,
+                    "longitude": ticket_lon,
+                    "ticket_count": nearby_count,
+                    "tickets": nearby_ticket_ids,
+                    "priority_level": "Critical" if nearby_count >= 5 else "High" if nearby_count >= 3 else "Medium",
+                    "ward": ticket.get("ward"),
+                    "search_radius_km": radius_km
+                })
+                processed_coords.add(coord_key)
+        
+        return hotspots
+
+
+hotspot_service = HotspotService()
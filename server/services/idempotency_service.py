@@ -0,0 +1,112 @@
+import asyncio
+import copy
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from fastapi import HTTPException, status
+from config import IDEMPOTENCY_TTL_SECONDS, IDEMPOTENCY_MAX_KEYS
+
+
+class IdempotencyService:
+    """
+    Short-TTL store that replays responses for retried requests carrying an Idempotency-Key
+
+    Records live in this process only; with several workers a retry routed to
+    another worker runs the request again.
+    """
+
+    def __init__(self):
+        self.ttl = IDEMPOTENCY_TTL_SECONDS
+        self.max_keys = IDEMPOTENCY_MAX_KEYS
+        # (scope, key) -> {"fingerprint", "expires_at", "future"}
+        self._records: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+
+    async def run(
+        self,
+        scope: str,
+        key: Optional[str],
+        fingerprint: str,
+        handler: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, bool]:
+        """
+        Run a request handler at most once per idempotency key.
+
+        A retry that arrives while the first attempt is still running waits for
+        it and shares its result. Failed attempts are not stored, so the client
+        can retry them with the same key. That includes handlers that report
+        failure as a dict with a non-empty "error" key (as ai_service does for
+        connection and auth errors) instead of raising.
+
+        Args:
+            scope: Endpoint the key belongs to (keys are not shared across endpoints)
+            key: Value of the Idempotency-Key header, or None to skip idempotency
+            fingerprint: Hash of the request parameters, used to reject key reuse
+            handler: Coroutine factory that performs the actual work
+
+        Returns:
+            Tuple of (response, replayed)
+        """
+        if not key:
+            return await handler(), False
+
+        self._evict_expired()
+        record_key = (scope, key)
+        record = self._records.get(record_key)
+
+        if record is not None:
+            if record["fingerprint"] != fingerprint:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail="Idempotency-Key was already used with different request parameters"
+                )
+            result = await asyncio.shield(record["future"])
+            return copy.deepcopy(result), True
+
+        future = asyncio.get_running_loop().create_future()
+        self._records[record_key] = {
+            "fingerprint": fingerprint,
+            "expires_at": time.monotonic() + self.ttl,
+            "future": future,
+        }
+        self._enforce_limit()
+
+        try:
+            result = await handler()
+        except BaseException as e:
+            self._records.pop(record_key, None)
+            future.set_exception(e)
+            # Mark the exception as retrieved when no retry is waiting on it
+            future.exception()
+            raise
+
+        future.set_result(copy.deepcopy(result))
+        if isinstance(result, dict) and result.get("error"):
+            # Reported failure: share it with waiting retries but let later ones run again
+            self._records.pop(record_key, None)
+        return result, False
+
+    def store_size(self) -> int:
+        """Get number of idempotency keys currently held"""
+        return len(self._records)
+
+    @staticmethod
+    def fingerprint(*parts: Any) -> str:
+        """Build a stable fingerprint from request parameters"""
+        return hashlib.sha256("\x1f".join(repr(p) for p in parts).encode("utf-8")).hexdigest()
+
+    def _evict_expired(self) -> None:
+        now = time.monotonic()
+        expired = [k for k, r in self._records.items() if r["expires_at"] <= now and r["future"].done()]
+        for k in expired:
+            del self._records[k]
+
+    def _enforce_limit(self) -> None:
+        while len(self._records) > self.max_keys:
+            oldest_key, oldest = next(iter(self._records.items()))
+            if not oldest["future"].done():
+                break
+            del self._records[oldest_key]
+
+
+idempotency_service = IdempotencyService()
@@ -0,0 +1,164 @@
+"""
+Offline FAISS index for the CASE knowledge base.
+
+build_index() embeds knowledge_base.md once and saves the FAISS index, the
+docstore and a manifest to disk. load_index() memory-maps the saved index at
+startup so the RAG service never re-embeds the knowledge base; only queries
+are embedded at request time.
+
+Chunks are tracked per markdown section and carry the section's heading path
+as metadata, so rebuilding after an edit only embeds the sections that
+changed, and queries can be restricted to part of the knowledge base.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import time
+from typing import Any, Dict, Tuple
+
+import faiss
+from langchain_community.vectorstores import FAISS
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from services.markdown_sections import split_markdown_sections
+from services.vector_collections import VectorCollection
+
+
+INDEX_FILE = "index.faiss"
+DOCSTORE_FILE = "index.pkl"
+MANIFEST_FILE = "manifest.json"
+
+
+def source_hash(source_path: str) -> str:
+    """SHA-256 of the knowledge base file"""
+    with open(source_path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def build_index(
+    source_path: str,
+    index_dir: str,
+    embeddings,
+    model_name: str,
+    chunk_size: int = 1200,
+    chunk_overlap: int = 200,
+    incremental: bool = True
+) -> Dict[str, Any]:
+    """
+    Embed the knowledge base and save the FAISS index to disk
+
+    Args:
+        source_path: Path to knowledge_base.md
+        index_dir: Directory to write index.faiss, index.pkl and manifest.json
+        embeddings: LangChain embeddings instance
+        model_name: Embedding model name, recorded in the manifest
+        chunk_size: Splitter chunk size
+        chunk_overlap: Splitter chunk overlap
+        incremental: Update an existing index built with the same model and
+            chunking, embedding only changed sections
+
+    Returns:
+        The manifest written alongside the index
+    """
+    started = time.time()
+    with open(source_path, "r", encoding="utf-8") as f:
+        text = f.read()
+
+    collection = VectorCollection()
+    if incremental and index_exists(index_dir):
+        vectorstore, previous = load_index(index_dir, embeddings, mmap=False)
+        if (previous.get("embedding_model") == model_name
+                and previous.get("chunk_size") == chunk_size
+                and previous.get("chunk_overlap") == chunk_overlap
+                and previous.get("sections")):
+            collection = VectorCollection(vectorstore, previous["sections"])
+
+    source = os.path.basename(source_path)
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap, add_start_index=True)
+    changes = collection.upsert(
+        [
+            {
+                "section_id": section["section_id"],
+                "text": section["text"],
+                "metadata": {"source": source, "section_path": section["section_path"]},
+            }
+            for section in split_markdown_sections(text)
+        ],
+        embeddings,
+        splitter.split_documents,
+        delete_missing=True
+    )
+    vectorstore = collection.vectorstore
+
+    os.makedirs(index_dir, exist_ok=True)
+    vectorstore.save_local(index_dir)
+
+    manifest = {
+        "source": os.path.basename(source_path),
+        "source_sha256": source_hash(source_path),
+        "embedding_model": model_name,
+        "chunk_size": chunk_size,
+        "chunk_overlap": chunk_overlap,
+        "chunks": collection.chunk_count(),
+        "dimension": vectorstore.index.d,
+        "built_at": time.time(),
+        "build_seconds": round(time.time() - started, 2),
+        "changes": changes,
+        "sections": collection.sections,
+    }
+    with open(os.path.join(index_dir, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def index_exists(index_dir: str) -> bool:
+    """Check whether a saved index is present"""
+    return all(
+        os.path.exists(os.path.join(index_dir, name))
+        for name in (INDEX_FILE, DOCSTORE_FILE, MANIFEST_FILE)
+    )
+
+
+def load_index(index_dir: str, embeddings, mmap: bool = True) -> Tuple[FAISS, Dict[str, Any]]:
+    """
+    Load a saved index, memory-mapping the FAISS file when the index type allows it
+
+    Args:
+        index_dir: Directory written by build_index
+        embeddings: LangChain embeddings instance used to embed queries
+        mmap: Memory-map the index read-only; pass False to modify it
+
+    Returns:
+        Tuple of (vector store, manifest); the manifest's "load_mode" is
+        "mmap" or "memory", depending on how the index was actually read
+    """
+    index_path = os.path.join(index_dir, INDEX_FILE)
+    index = None
+    load_mode = "memory"
+    if mmap:
+        try:
+            index = faiss.read_index(index_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+            load_mode = "mmap"
+        except RuntimeError as e:
+            # Not every index type supports mmap; fall back to reading it into memory
+            print(f"⚠ FAISS index at {index_path} cannot be memory-mapped ({e}); reading it into memory")
+    if index is None:
+        index = faiss.read_index(index_path)
+
+    # The docstore is produced locally by build_index, never from user uploads
+    with open(os.path.join(index_dir, DOCSTORE_FILE), "rb") as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+
+    with open(os.path.join(index_dir, MANIFEST_FILE), "r") as f:
+        manifest = json.load(f)
+    manifest["load_mode"] = load_mode
+
+    vectorstore = FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=docstore,
+        index_to_docstore_id=index_to_docstore_id,
+    )
+    return vectorstore, manifest
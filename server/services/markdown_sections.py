@@ -0,0 +1,93 @@
+import re
+from typing import Dict, List, Optional
+
+from langchain_core.documents import Document
+
+
+HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+PATH_SEPARATOR = " > "
+
+
+def _slug(title: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", title.lower()).strip("-") or "section"
+
+
+def split_markdown_sections(text: str) -> List[Dict[str, str]]:
+    """
+    Split markdown into sections at headings, tracking each section's heading path
+
+    Headings inside fenced code blocks are ignored.
+
+    Returns:
+        List of dicts with "section_id" (slugged heading path, unique),
+        "section_path" (e.g. "User Roles > 2. Officer (Municipal Officer)")
+        and "text"; text before the first heading has path "" and ID "preamble"
+    """
+    sections = []
+    stack: List[tuple] = []  # (level, title)
+    current_lines: List[str] = []
+    seen: Dict[str, int] = {}
+    in_fence = False
+
+    def flush():
+        body = "".join(current_lines)
+        if not body.strip():
+            return
+        path = PATH_SEPARATOR.join(title for _, title in stack)
+        section_id = "/".join(_slug(title) for _, title in stack) or "preamble"
+        seen[section_id] = seen.get(section_id, 0) + 1
+        if seen[section_id] > 1:
+            section_id = f"{section_id}-{seen[section_id]}"
+        sections.append({"section_id": section_id, "section_path": path, "text": body})
+
+    for line in text.splitlines(keepends=True):
+        if line.lstrip().startswith(("```", "~~~")):
+            in_fence = not in_fence
+        heading = None if in_fence else HEADING_PATTERN.match(line)
+        if heading:
+            flush()
+            level = len(heading.group(1))
+            while stack and stack[-1][0] >= level:
+                stack.pop()
+            stack.append((level, heading.group(2).strip()))
+            current_lines = []
+        current_lines.append(line)
+
+    flush()
+    return sections
+
+
+def split_markdown_documents(docs: List[Document]) -> List[Document]:
+    """Split markdown documents into one document per section with section_id and section_path metadata"""
+    sections = []
+    for doc in docs:
+        for section in split_markdown_sections(doc.page_content):
+            metadata = dict(doc.metadata, section_id=section["section_id"], section_path=section["section_path"])
+            sections.append(Document(page_content=section["text"], metadata=metadata))
+    return sections
+
+
+def section_matches(section_path: Optional[str], section_filter: Optional[str]) -> bool:
+    """
+    Check a chunk's section path against a filter
+
+    Filter levels are separated by ">" and must match path levels in order,
+    each as a case-insensitive substring, so "Officer" and
+    "User Roles > Officer" both match "User Roles > 2. Officer (Municipal Officer) > Workflow".
+    """
+    if not section_filter:
+        return True
+    if not section_path:
+        return False
+    # Split on the full separator so titles containing ">" stay one level
+    levels = [level.strip().lower() for level in section_path.split(PATH_SEPARATOR)]
+    position = 0
+    for wanted in (part.strip().lower() for part in section_filter.split(">")):
+        if not wanted:
+            continue
+        while position < len(levels) and wanted not in levels[position]:
+            position += 1
+        if position == len(levels):
+            return False
+        position += 1
+    return True
@@ -0,0 +1,304 @@
+import json
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, Any, Optional, List
+from config import (
+    OUTBOX_DB_PATH, OUTBOX_BATCH_SIZE, OUTBOX_FLUSH_INTERVAL, OUTBOX_MAX_BACKOFF, OUTBOX_MAX_ATTEMPTS,
+    OUTBOX_CLAIM_LEASE,
+)
+from services.firebase_service import firebase_service
+
+
+class TicketOutbox:
+    """
+    Durable local outbox for ticket writes, flushed to Firestore by a background worker.
+
+    Duplicate reports for a ticket that has not been flushed yet are queued
+    alongside it and applied once the ticket exists in Firestore; each report
+    carries a merge ID, so one applied twice (after a crash, or by two
+    processes sharing the outbox) is only counted once. Rows that
+    keep failing are dead-lettered after OUTBOX_MAX_ATTEMPTS attempts and
+    stay in the database for inspection.
+    """
+
+    def __init__(self, db_path: str = OUTBOX_DB_PATH):
+        self.db_path = db_path
+        self.batch_size = OUTBOX_BATCH_SIZE
+        self.flush_interval = OUTBOX_FLUSH_INTERVAL
+        self.max_backoff = OUTBOX_MAX_BACKOFF
+        self.max_attempts = OUTBOX_MAX_ATTEMPTS
+        self.claim_lease = OUTBOX_CLAIM_LEASE
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS ticket_outbox (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                doc_id TEXT NOT NULL UNIQUE,
+                payload TEXT NOT NULL,
+                enqueued_at REAL NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL,
+                last_error TEXT,
+                dead_lettered_at REAL
+            )
+            """
+        )
+        # Outboxes created before dead-lettering lack the column
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(ticket_outbox)")}
+        if "dead_lettered_at" not in columns:
+            self._conn.execute("ALTER TABLE ticket_outbox ADD COLUMN dead_lettered_at REAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS ticket_outbox_merges (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                doc_id TEXT NOT NULL,
+                report TEXT NOT NULL,
+                enqueued_at REAL NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL,
+                last_error TEXT,
+                dead_lettered_at REAL
+            )
+            """
+        )
+
+    def enqueue(self, ticket_data: Dict[str, Any]) -> str:
+        """
+        Durably record a ticket for writing to Firestore
+
+        Args:
+            ticket_data: Dictionary containing ticket information (JSON-serializable)
+
+        Returns:
+            Firestore document ID the ticket will be stored under
+        """
+        doc_id = firebase_service.new_ticket_id()
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO ticket_outbox (doc_id, payload, enqueued_at, next_attempt_at) VALUES (?, ?, ?, ?)",
+                (doc_id, json.dumps(ticket_data, default=str), now, now),
+            )
+        self._wake.set()
+        return doc_id
+
+    def merge_pending(self, doc_id: str, report: Dict[str, Any]) -> bool:
+        """
+        Queue a duplicate report for a ticket that is still in the outbox
+
+        The report is applied to the Firestore ticket after the ticket itself
+        has been written.
+
+        Args:
+            doc_id: Firestore document ID returned by enqueue
+            report: Summary of the duplicate report
+
+        Returns:
+            True if the ticket is pending and the report was queued, False if
+            the ticket is not in the outbox (it was already flushed)
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM ticket_outbox WHERE doc_id = ?", (doc_id,)).fetchone()
+            if row is None:
+                return False
+            self._conn.execute(
+                "INSERT INTO ticket_outbox_merges (doc_id, report, enqueued_at, next_attempt_at) VALUES (?, ?, ?, ?)",
+                (doc_id, json.dumps(dict(report, merge_id=uuid.uuid4().hex), default=str), now, now),
+            )
+        return True
+
+    def get_pending(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a ticket that is still waiting in the outbox
+
+        Args:
+            doc_id: Firestore document ID returned by enqueue, or the ticket's
+                "ticket_id" value
+
+        Returns:
+            Ticket data (with "id" set to the document ID and queued duplicate
+            reports counted) if pending, None otherwise
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT doc_id, payload, enqueued_at FROM ticket_outbox "
+                "WHERE doc_id = ? OR json_extract(payload, '$.ticket_id') = ? LIMIT 1",
+                (doc_id, doc_id),
+            ).fetchone()
+            if row is None:
+                return None
+            merged = self._conn.execute(
+                "SELECT COUNT(*) FROM ticket_outbox_merges WHERE doc_id = ?", (row[0],)
+            ).fetchone()[0]
+        ticket_data = dict(self._to_ticket(row[1], row[2]), id=row[0])
+        ticket_data["report_count"] = ticket_data.get("report_count", 1) + merged
+        return ticket_data
+
+    def pending_count(self) -> int:
+        """Get number of tickets not yet written to Firestore (excluding dead-lettered ones)"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM ticket_outbox WHERE dead_lettered_at IS NULL"
+            ).fetchone()[0]
+
+    def dead_letter_count(self) -> int:
+        """Get number of tickets and duplicate reports that gave up after OUTBOX_MAX_ATTEMPTS"""
+        with self._lock:
+            return sum(
+                self._conn.execute(f"SELECT COUNT(*) FROM {table} WHERE dead_lettered_at IS NOT NULL").fetchone()[0]
+                for table in ("ticket_outbox", "ticket_outbox_merges")
+            )
+
+    def flush_once(self) -> int:
+        """
+        Write one batch of due tickets to Firestore, then apply queued
+        duplicate reports to tickets that have been written
+
+        Returns:
+            Number of tickets written
+        """
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, doc_id, payload, enqueued_at, attempts FROM ticket_outbox "
+                "WHERE dead_lettered_at IS NULL AND next_attempt_at <= ? ORDER BY seq LIMIT ?",
+                (now, self.batch_size),
+            ).fetchall()
+
+        written = set()
+        if rows:
+            tickets = {doc_id: self._to_ticket(payload, enqueued_at) for _, doc_id, payload, enqueued_at, _ in rows}
+            result = firebase_service.save_tickets(tickets)
+            written = set(result["written"]) & tickets.keys()
+
+            with self._lock:
+                self._conn.executemany(
+                    "DELETE FROM ticket_outbox WHERE seq = ?",
+                    [(seq,) for seq, doc_id, _, _, _ in rows if doc_id in written],
+                )
+                self._record_failures(
+                    "ticket_outbox",
+                    [(seq, attempts, result["failed"].get(doc_id, "write not acknowledged"))
+                     for seq, doc_id, _, _, attempts in rows if doc_id not in written],
+                    now,
+                )
+
+            if written:
+                print(f"Outbox flushed {len(written)} tickets to Firestore")
+            if len(written) < len(rows):
+                print(f"Outbox flush failed for {len(rows) - len(written)} tickets, will retry")
+
+        self._flush_merges(now)
+        return len(written)
+
+    def _flush_merges(self, now: float) -> None:
+        """
+        Apply queued duplicate reports whose ticket is no longer waiting in the outbox
+
+        Due rows are claimed first by pushing next_attempt_at past the lease, so
+        another process flushing the same outbox skips them.
+        """
+        with self._lock:
+            merges = self._conn.execute(
+                "UPDATE ticket_outbox_merges SET next_attempt_at = ? WHERE seq IN ("
+                "SELECT seq FROM ticket_outbox_merges "
+                "WHERE dead_lettered_at IS NULL AND next_attempt_at <= ? "
+                "AND doc_id NOT IN (SELECT doc_id FROM ticket_outbox) ORDER BY seq LIMIT ?"
+                ") RETURNING seq, doc_id, report, enqueued_at, attempts",
+                (now + self.claim_lease, now, self.batch_size),
+            ).fetchall()
+
+        failures = []
+        for seq, doc_id, report, enqueued_at, attempts in sorted(merges):
+            report = dict(json.loads(report), reported_at=datetime.utcfromtimestamp(enqueued_at))
+            # Reports queued before merge IDs existed are applied as before
+            merge_id = report.pop("merge_id", None)
+            if firebase_service.add_duplicate_report(doc_id, report, merge_id):
+                with self._lock:
+                    self._conn.execute("DELETE FROM ticket_outbox_merges WHERE seq = ?", (seq,))
+            else:
+                failures.append((seq, attempts, "duplicate report not applied"))
+
+        if failures:
+            with self._lock:
+                self._record_failures("ticket_outbox_merges", failures, now)
+
+    def _record_failures(self, table: str, failures: List[tuple], now: float) -> None:
+        """Schedule retries with backoff, dead-lettering rows out of attempts (caller holds the lock)"""
+        for seq, attempts, error in failures:
+            attempts += 1
+            if attempts >= self.max_attempts:
+                self._conn.execute(
+                    f"UPDATE {table} SET attempts = ?, last_error = ?, dead_lettered_at = ? WHERE seq = ?",
+                    (attempts, error, now, seq),
+                )
+                print(f"Outbox row {seq} in {table} dead-lettered after {attempts} attempts: {error}")
+            else:
+                self._conn.execute(
+                    f"UPDATE {table} SET attempts = ?, next_attempt_at = ?, last_error = ? WHERE seq = ?",
+                    (attempts, now + self._backoff(attempts), error, seq),
+                )
+
+    def start(self) -> None:
+        """Start the background flush worker"""
+        if self._worker is not None and self._worker.is_alive():
+            return
+        self._stop.clear()
+        self._worker = threading.Thread(target=self._run, name="ticket-outbox", daemon=True)
+        self._worker.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Stop the background flush worker, draining what it can first
+
+        Blocks for up to timeout seconds; call it from a thread, not the event loop.
+        """
+        self._stop.set()
+        self._wake.set()
+        if self._worker is not None:
+            self._worker.join(timeout)
+            self._worker = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                # Keep draining while full batches are being written
+                while self.flush_once() == self.batch_size:
+                    pass
+            except Exception as e:
+                print(f"Outbox worker error: {e}")
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+        try:
+            self.flush_once()
+        except Exception as e:
+            print(f"Outbox final flush error: {e}")
+
+    def _backoff(self, attempts: int) -> float:
+        """Exponential backoff with jitter, capped at OUTBOX_MAX_BACKOFF"""
+        delay = min(self.max_backoff, self.flush_interval * (2 ** attempts))
+        return delay * random.uniform(0.5, 1.0)
+
+    @staticmethod
+    def _to_ticket(payload: str, enqueued_at: float) -> Dict[str, Any]:
+        """Rebuild ticket data, stamping the time the report was accepted"""
+        ticket_data = json.loads(payload)
+        accepted_at = datetime.utcfromtimestamp(enqueued_at)
+        ticket_data.setdefault("created_at", accepted_at)
+        ticket_data["updated_at"] = accepted_at
+        return ticket_data
+
+
+ticket_outbox = TicketOutbox()
@@ -0,0 +1,72 @@
+import copy
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls into one upstream operation.
+
+    The first caller for a key runs the function; callers arriving while it is
+    in flight wait and receive a copy of the same result (or exception).
+    Nothing is cached once the call completes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run fn(*args, **kwargs) unless an identical call is already in flight
+
+        Args:
+            key: Identifies identical calls (function name plus arguments)
+            fn: Function to run
+
+        Returns:
+            The function result; waiters receive a deep copy so they can mutate it
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        result = None
+        try:
+            result = fn(*args, **kwargs)
+            return result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                waiters = call.waiters
+            if waiters and call.error is None:
+                # Private snapshot, so the leader's caller can mutate its own result
+                call.result = copy.deepcopy(result)
+            call.done.set()
+
+    def in_flight(self) -> int:
+        """Get number of distinct calls currently in flight"""
+        return len(self._calls)
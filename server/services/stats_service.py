@@ -0,0 +1,139 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict, Any, Optional, List
+from config import (
+    ISSUE_TYPES,
+    TICKET_STATUSES,
+    TICKET_DEPARTMENTS,
+    STATS_CACHE_TTL,
+    STATS_CACHE_MAX_ENTRIES,
+    STATS_QUERY_WORKERS,
+    STATS_QUERY_TIMEOUT,
+)
+from services.firebase_service import firebase_service
+from services.ward_service import ward_service
+
+
+GROUP_FIELDS = ("status", "ward", "department", "issue_type")
+
+
+class StatsUnavailableError(Exception):
+    """A count aggregation failed or timed out, so no complete statistics can be returned"""
+
+
+class TicketStatsService:
+    """Service to compute grouped ticket counts with Firestore aggregation queries"""
+
+    def __init__(self):
+        self.cache_ttl = STATS_CACHE_TTL
+        self.cache_max_entries = STATS_CACHE_MAX_ENTRIES
+        self.query_timeout = STATS_QUERY_TIMEOUT
+        self._executor = ThreadPoolExecutor(max_workers=STATS_QUERY_WORKERS, thread_name_prefix="ticket-stats")
+        self._cache: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def group_values(self) -> Dict[str, List[str]]:
+        """Known values for each grouped field"""
+        issue_types = list(dict.fromkeys(ISSUE_TYPES + [t.lower() for t in ISSUE_TYPES]))
+        return {
+            "status": TICKET_STATUSES,
+            "ward": ward_service.get_all_wards() + ["Unknown"],
+            "department": TICKET_DEPARTMENTS,
+            "issue_type": issue_types,
+        }
+
+    def get_stats(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        use_cache: bool = True,
+        group_by: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Get ticket counts grouped by the requested fields.
+
+        Every count is a Firestore count() aggregation, billed per index entry
+        batch rather than per document, and all of them run concurrently. One
+        query is issued per known value of each requested field, so callers
+        should only ask for the groupings they display. Tickets whose value is
+        not in the known list are reported as "other".
+
+        Args:
+            filters: Optional equality filters applied to every count
+            use_cache: Serve a result computed within STATS_CACHE_TTL seconds
+            group_by: Fields to group by (subset of GROUP_FIELDS); defaults to status
+
+        Returns:
+            Dict with total, per-field grouped counts and generation time
+
+        Raises:
+            StatsUnavailableError: if any count fails or times out; partial
+                results are never returned or cached
+        """
+        filters = {k: v.strip() if isinstance(v, str) else v for k, v in (filters or {}).items()}
+        fields = [f for f in dict.fromkeys(group_by or ["status"]) if f not in filters]
+        unknown = [f for f in fields if f not in GROUP_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown group_by field(s): {', '.join(unknown)}")
+
+        cache_key = (tuple(sorted(filters.items())), tuple(sorted(fields)))
+        with self._lock:
+            cached = self._cache.get(cache_key)
+            if use_cache and cached and time.monotonic() - cached["computed_at"] < self.cache_ttl:
+                self._cache.move_to_end(cache_key)
+                return dict(cached["stats"], cached=True)
+
+        groups = self.group_values()
+        total_future = self._executor.submit(firebase_service.count_tickets, filters)
+        futures = {
+            field: {
+                value: self._executor.submit(firebase_service.count_tickets, {**filters, field: value})
+                for value in groups[field]
+            }
+            for field in fields
+        }
+
+        deadline = time.monotonic() + self.query_timeout
+        total = self._result(total_future, deadline)
+
+        grouped = {}
+        for field, value_futures in futures.items():
+            counts = {}
+            for value, future in value_futures.items():
+                count = self._result(future, deadline)
+                if count:
+                    counts[value] = count
+            other = total - sum(counts.values())
+            if other > 0:
+                counts["other"] = other
+            grouped[f"by_{field}"] = counts
+
+        stats = {
+            "total": total,
+            "filters": filters,
+            "group_by": fields,
+            **grouped,
+            "query_count": 1 + sum(len(v) for v in futures.values()),
+            "generated_at": time.time(),
+        }
+        with self._lock:
+            self._cache[cache_key] = {"stats": stats, "computed_at": time.monotonic()}
+            self._cache.move_to_end(cache_key)
+            while len(self._cache) > self.cache_max_entries:
+                self._cache.popitem(last=False)
+        return dict(stats, cached=False)
+
+    @staticmethod
+    def _result(future, deadline: float) -> int:
+        """Wait for one count, failing the whole request if it errors or runs past the deadline"""
+        try:
+            count = future.result(timeout=max(deadline - time.monotonic(), 0))
+        except FutureTimeoutError:
+            raise StatsUnavailableError("Ticket count timed out")
+        if count is None:
+            raise StatsUnavailableError("Could not count tickets")
+        return count
+
+
+stats_service = TicketStatsService()
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Iterable, Tuple
+from fastapi.encoders import jsonable_encoder
+from config import TICKET_CACHE_TTL, TICKET_CACHE_MAX_ENTRIES
+
+
+class TicketCacheService:
+    """Short-lived cache of serialized ticket responses keyed by ETag"""
+
+    def __init__(self):
+        self.ttl = TICKET_CACHE_TTL
+        self.max_entries = TICKET_CACHE_MAX_ENTRIES
+        self.max_bodies = 32
+        self._lock = threading.Lock()
+        # ticket_id -> {"etag", "body", "expires_at"}
+        self._tickets: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # etag -> serialized body, for list responses
+        self._bodies: "OrderedDict[str, bytes]" = OrderedDict()
+
+    @staticmethod
+    def compute_etag(versions: Iterable[Tuple[str, Any]], *extra: Any) -> str:
+        """
+        Build a strong ETag from (document ID, updated_at) pairs
+
+        Args:
+            versions: Pairs identifying each document version in the response
+            extra: Anything else that changes the response (e.g. filters)
+
+        Returns:
+            Quoted ETag value
+        """
+        digest = hashlib.sha1()
+        for part in extra:
+            digest.update(repr(part).encode("utf-8"))
+        for doc_id, updated_at in versions:
+            digest.update(f"{doc_id}\x1f{updated_at}\x1e".encode("utf-8"))
+        return f'"{digest.hexdigest()}"'
+
+    @staticmethod
+    def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+        """Check an If-None-Match header against an ETag"""
+        if not if_none_match:
+            return False
+        for candidate in if_none_match.split(","):
+            candidate = candidate.strip()
+            if candidate == "*":
+                return True
+            if candidate.startswith("W/"):
+                candidate = candidate[2:]
+            if candidate == etag:
+                return True
+        return False
+
+    @staticmethod
+    def serialize(data: Any) -> bytes:
+        """Serialize a response body the same way FastAPI would"""
+        return json.dumps(jsonable_encoder(data)).encode("utf-8")
+
+    def get_ticket(self, ticket_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a cached ticket response if still fresh
+
+        Returns:
+            Dict with "etag" and "body", or None
+        """
+        with self._lock:
+            entry = self._tickets.get(ticket_id)
+            if entry is None:
+                return None
+            if entry["expires_at"] <= time.monotonic():
+                del self._tickets[ticket_id]
+                return None
+            self._tickets.move_to_end(ticket_id)
+            return entry
+
+    def put_ticket(self, ticket_id: str, ticket_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Serialize and cache a ticket response
+
+        The ETag is a hash of the serialized body: fields such as report_count
+        (queued duplicate reports) and archived change without a new
+        updated_at.
+
+        Returns:
+            The cache entry (etag and body)
+        """
+        body = self.serialize(ticket_data)
+        entry = {
+            "etag": f'"{hashlib.sha1(body).hexdigest()}"',
+            "body": body,
+            "expires_at": time.monotonic() + self.ttl,
+        }
+        with self._lock:
+            self._tickets[ticket_id] = entry
+            self._tickets.move_to_end(ticket_id)
+            while len(self._tickets) > self.max_entries:
+                self._tickets.popitem(last=False)
+        return entry
+
+    def invalidate(self, ticket_id: str) -> None:
+        """Drop a cached ticket after it is written"""
+        with self._lock:
+            self._tickets.pop(ticket_id, None)
+
+    def get_body(self, etag: str, data_factory) -> bytes:
+        """
+        Get the serialized body for an ETag, serializing only on a miss
+
+        Args:
+            etag: ETag of the response
+            data_factory: Callable returning the response data to serialize
+        """
+        with self._lock:
+            body = self._bodies.get(etag)
+            if body is not None:
+                self._bodies.move_to_end(etag)
+                return body
+        body = self.serialize(data_factory())
+        with self._lock:
+            self._bodies[etag] = body
+            while len(self._bodies) > self.max_bodies:
+                self._bodies.popitem(last=False)
+        return body
+
+
+ticket_cache_service = TicketCacheService()
@@ -0,0 +1,210 @@
+import asyncio
+import json
+import threading
+import uuid
+from collections import deque
+from typing import Dict, Any, Optional, List, Set
+from config import STREAM_BUFFER_SIZE, STREAM_QUEUE_SIZE
+from services.firebase_service import firebase_service
+
+
+# Ticket fields subscribers can filter on; their previous values travel with each event
+FILTER_FIELDS = ("ward", "status")
+
+
+class TicketSubscriber:
+    """One SSE client: its filters and a bounded queue of pending events"""
+
+    def __init__(self, filters: Dict[str, str]):
+        self.filters = filters
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+        self.overflowed = False
+
+    def matches(self, event: Dict[str, Any]) -> bool:
+        return self._matches(event, event.get("ticket") or {})
+
+    def view(self, event: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        The event as this subscriber should see it
+
+        A ticket that moves out of the subscriber's ward/status filter is
+        delivered as "removed", so the client drops it from its view.
+
+        Returns:
+            The event, a "removed" copy of it, or None if it is not relevant
+        """
+        if self.matches(event):
+            return event
+        previous = event.get("previous")
+        if event["type"] == "modified" and previous and self._matches(event, previous):
+            return dict(event, type="removed")
+        return None
+
+    def _matches(self, event: Dict[str, Any], ticket: Dict[str, Any]) -> bool:
+        ticket_id = self.filters.get("ticket_id")
+        current = event.get("ticket") or {}
+        if ticket_id and ticket_id not in (event["id"], current.get("ticket_id")):
+            return False
+        for field in FILTER_FIELDS:
+            value = self.filters.get(field)
+            if value and ticket.get(field) != value:
+                return False
+        return True
+
+
+class TicketStreamService:
+    """
+    Fans out ticket changes from a single Firestore listener to many SSE subscribers.
+
+    The listener runs on a Firestore background thread; each snapshot is handed
+    to the event loop once and delivered to every matching subscriber's queue.
+    Recent events are kept in a ring buffer so clients can resume with Last-Event-ID.
+
+    Event IDs are "<epoch>-<sequence>", where the epoch is random per process:
+    sequences restart with the process and differ between workers, so an ID
+    from another epoch can only be answered with a reset.
+    """
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._watch = None
+        self._lock = threading.Lock()
+        self._baseline_received = False
+        self.epoch = uuid.uuid4().hex[:8]
+        self._next_id = 1
+        self._buffer: deque = deque(maxlen=STREAM_BUFFER_SIZE)
+        self._subscribers: Set[TicketSubscriber] = set()
+        # doc ID -> last seen filter fields, so a move out of a filter can be reported (listener thread only)
+        self._last_seen: Dict[str, Dict[str, Any]] = {}
+
+    def subscribe(self, filters: Dict[str, str], last_event_id: Optional[str] = None) -> TicketSubscriber:
+        """
+        Register a subscriber, replaying buffered events after last_event_id
+
+        A "reset" event is sent first when the events after last_event_id
+        cannot be replayed: they fell out of the buffer, or the ID was issued
+        by another process or before a restart.
+
+        Args:
+            filters: Optional ward/status/ticket_id filters
+            last_event_id: Last-Event-ID the client sent, if resuming
+
+        Returns:
+            The subscriber whose queue receives (event_id, event) tuples
+        """
+        self._ensure_listening()
+        subscriber = TicketSubscriber(filters)
+
+        if last_event_id:
+            resume_from = self.parse_event_id(last_event_id)
+            oldest = self._buffer[0][0] if self._buffer else self._next_id
+            if resume_from is None or not (oldest - 1 <= resume_from < self._next_id):
+                # The client missed events we cannot replay; it must refetch
+                subscriber.queue.put_nowait((self._next_id - 1, {"type": "reset"}))
+            else:
+                for event_id, event in list(self._buffer):
+                    view = subscriber.view(event) if event_id > resume_from else None
+                    if view is not None:
+                        self._offer(subscriber, event_id, view)
+                    if subscriber.overflowed:
+                        break
+
+        # A subscriber whose replay overflowed its queue is already dropped
+        if not subscriber.overflowed:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def parse_event_id(self, last_event_id: str) -> Optional[int]:
+        """
+        Get the sequence number of an event ID issued by this process
+
+        Returns:
+            The sequence number, or None if the ID is malformed or from another epoch
+        """
+        epoch, _, sequence = last_event_id.strip().partition("-")
+        if epoch != self.epoch or not sequence.isdigit():
+            return None
+        return int(sequence)
+
+    def unsubscribe(self, subscriber: TicketSubscriber) -> None:
+        """Remove a subscriber"""
+        self._subscribers.discard(subscriber)
+
+    def subscriber_count(self) -> int:
+        """Get number of connected subscribers"""
+        return len(self._subscribers)
+
+    def stop(self) -> None:
+        """Stop the Firestore listener"""
+        with self._lock:
+            if self._watch is not None:
+                self._watch.unsubscribe()
+                self._watch = None
+                self._baseline_received = False
+
+    def format_event(self, event_id: int, event: Dict[str, Any]) -> str:
+        """Serialize an event in text/event-stream format"""
+        data = {k: v for k, v in event.items() if k != "previous"}
+        return f"id: {self.epoch}-{event_id}\nevent: {event['type']}\ndata: {json.dumps(data, default=str)}\n\n"
+
+    def _ensure_listening(self) -> None:
+        with self._lock:
+            if self._watch is not None:
+                return
+            if firebase_service.db is None:
+                raise Exception("Firebase not initialized")
+            self._loop = asyncio.get_running_loop()
+            self._watch = firebase_service.db.collection("tickets").on_snapshot(self._on_snapshot)
+            print("Ticket change listener started")
+
+    def _on_snapshot(self, col_snapshot, changes, read_time) -> None:
+        """Firestore listener callback (runs on a Firestore thread)"""
+        if not self._baseline_received:
+            # The first snapshot lists every existing ticket; only stream later changes
+            self._baseline_received = True
+            for doc in col_snapshot:
+                self._last_seen[doc.id] = self._filter_fields(doc.to_dict() or {})
+            return
+
+        events = []
+        for change in changes:
+            doc_id = change.document.id
+            ticket = change.document.to_dict() or {}
+            change_type = change.type.name.lower()
+            previous = self._last_seen.pop(doc_id, None)
+            if change_type != "removed":
+                self._last_seen[doc_id] = self._filter_fields(ticket)
+            events.append({
+                "type": change_type,
+                "id": doc_id,
+                "ticket": ticket,
+                "previous": previous,
+            })
+        if events and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._publish, events)
+
+    def _publish(self, events: List[Dict[str, Any]]) -> None:
+        """Assign IDs, buffer and deliver events (runs on the event loop)"""
+        for event in events:
+            event_id = self._next_id
+            self._next_id += 1
+            self._buffer.append((event_id, event))
+            for subscriber in list(self._subscribers):
+                view = subscriber.view(event)
+                if view is not None:
+                    self._offer(subscriber, event_id, view)
+
+    @staticmethod
+    def _filter_fields(ticket: Dict[str, Any]) -> Dict[str, Any]:
+        return {field: ticket.get(field) for field in FILTER_FIELDS}
+
+    def _offer(self, subscriber: TicketSubscriber, event_id: int, event: Dict[str, Any]) -> None:
+        try:
+            subscriber.queue.put_nowait((event_id, event))
+        except asyncio.QueueFull:
+            # Slow client: drop it, it can reconnect and resume with Last-Event-ID
+            subscriber.overflowed = True
+            self._subscribers.discard(subscriber)
+
+
+ticket_stream_service = TicketStreamService()
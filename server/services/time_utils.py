@@ -0,0 +1,27 @@
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+
+def to_timestamp(value: Any) -> Optional[float]:
+    """
+    Convert a Firestore/ISO timestamp to epoch seconds
+
+    Args:
+        value: datetime (naive values are treated as UTC) or ISO 8601 string
+
+    Returns:
+        Epoch seconds, or None if the value is missing or unparseable
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if isinstance(value, datetime):
+        # Naive datetimes are written with datetime.utcnow()
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+    return None
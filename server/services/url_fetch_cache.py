@@ -0,0 +1,140 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import requests
+from langchain_community.document_transformers import Html2TextTransformer
+from langchain_core.documents import Document
+
+
+class UrlFetchCache:
+    """
+    Local cache of scraped pages, stored as cleaned markdown.
+
+    A page younger than max_staleness is served without touching the network.
+    Older pages are revalidated with If-None-Match / If-Modified-Since, so an
+    unchanged page costs a 304 and no HTML parsing. If the origin is
+    unreachable a cached copy is served stale rather than failing the request.
+    """
+
+    def __init__(self, cache_dir: str, max_staleness: int, timeout: float = 15.0):
+        self.cache_dir = cache_dir
+        self.max_staleness = max_staleness
+        self.timeout = timeout
+        self.hits = 0
+        self.revalidated = 0
+        self.fetched = 0
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._transformer = Html2TextTransformer()
+
+    def fetch(self, url: str, max_staleness: Optional[int] = None) -> Document:
+        """
+        Get a page as a markdown document
+
+        Args:
+            url: Page URL
+            max_staleness: Seconds a cached copy may be served without
+                revalidation; defaults to the cache setting, 0 always revalidates
+
+        Returns:
+            Document with the cleaned markdown and "source" and "format" metadata
+        """
+        max_age = self.max_staleness if max_staleness is None else max_staleness
+        entry = self._get_entry(url)
+
+        if entry and time.time() - entry["fetched_at"] <= max_age:
+            with self._lock:
+                self.hits += 1
+            return self._document(entry)
+
+        headers = {"User-Agent": os.getenv("USER_AGENT", "AI-Cloud-RAG-Service/1.0")}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        try:
+            response = requests.get(url, headers=headers, timeout=self.timeout)
+            if response.status_code == 304 and entry:
+                entry["fetched_at"] = time.time()
+                self._save(url, entry)
+                with self._lock:
+                    self.revalidated += 1
+                return self._document(entry)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            if entry:
+                print(f"⚠ Revalidating {url} failed ({e}); serving cached copy")
+                return self._document(entry)
+            raise
+
+        markdown = self._transformer.transform_documents(
+            [Document(page_content=response.text, metadata={"source": url})]
+        )[0].page_content
+        entry = {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched_at": time.time(),
+            "content_sha256": hashlib.sha256(markdown.encode("utf-8")).hexdigest(),
+            "markdown": markdown,
+        }
+        self._save(url, entry)
+        with self._lock:
+            self.fetched += 1
+        return self._document(entry)
+
+    def invalidate(self, url: str) -> None:
+        """Forget a cached page"""
+        with self._lock:
+            self._entries.pop(url, None)
+        path = self._path(url)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pages": len(self._entries),
+            "max_staleness_seconds": self.max_staleness,
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "fetched": self.fetched,
+        }
+
+    def _get_entry(self, url: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(url)
+        if entry is not None:
+            return entry
+
+        path = self._path(url)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        with self._lock:
+            self._entries[url] = entry
+        return entry
+
+    def _save(self, url: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[url] = entry
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self._path(url) + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, self._path(url))
+
+    def _path(self, url: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json")
+
+    @staticmethod
+    def _document(entry: Dict[str, Any]) -> Document:
+        return Document(page_content=entry["markdown"], metadata={"source": entry["url"], "format": "markdown"})
@@ -0,0 +1,160 @@
+import hashlib
+import json
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.faiss import dependable_faiss_import
+from langchain_core.documents import Document
+
+from services.bm25_index import BM25Index
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class VectorCollection:
+    """
+    A FAISS vector store whose chunks are tracked by document section.
+
+    upsert() compares each incoming section with the stored one by a hash of
+    its text and metadata and only embeds chunks that are new, deleting chunks
+    that no longer exist, so updating a large document costs time
+    proportional to the change.
+
+    Readers never see a half-applied upsert: changes are made to a copy of
+    the FAISS index, then the new (vectorstore, bm25) pair and section map
+    replace the old ones in a single assignment. Take snapshot() once per
+    query, not vectorstore and bm25 separately.
+    """
+
+    def __init__(self, vectorstore: Optional[FAISS] = None, sections: Optional[Dict[str, Dict[str, Any]]] = None):
+        bm25 = BM25Index.from_vectorstore(vectorstore) if vectorstore is not None else BM25Index([])
+        self._snapshot: Tuple[Optional[FAISS], BM25Index] = (vectorstore, bm25)
+        # section_id -> {"hash": content hash, "chunk_ids": [...]}
+        self.sections: Dict[str, Dict[str, Any]] = sections or {}
+        # Serializes writers; readers use snapshot() and never block
+        self.lock = threading.Lock()
+
+    @property
+    def vectorstore(self) -> Optional[FAISS]:
+        return self._snapshot[0]
+
+    @property
+    def bm25(self) -> BM25Index:
+        return self._snapshot[1]
+
+    def snapshot(self) -> Tuple[Optional[FAISS], BM25Index]:
+        """Get a consistent (vectorstore, bm25) pair that later upserts will not modify"""
+        return self._snapshot
+
+    def upsert(
+        self,
+        sections: List[Dict[str, Any]],
+        embeddings,
+        split_fn: Callable[[List[Document]], List[Document]],
+        delete_section_ids: Optional[List[str]] = None,
+        delete_missing: bool = False
+    ) -> Dict[str, int]:
+        """
+        Add or replace sections
+
+        Args:
+            sections: Dicts with "section_id", "text" and optional "metadata"
+            embeddings: Embeddings used for new chunks
+            split_fn: Splits a section document into chunks
+            delete_section_ids: Sections to remove
+            delete_missing: Remove stored sections absent from this upsert
+
+        Returns:
+            Counts of changed, unchanged and removed sections and of added and deleted chunks
+        """
+        with self.lock:
+            stats = {"changed_sections": 0, "unchanged_sections": 0, "removed_sections": 0,
+                     "added_chunks": 0, "deleted_chunks": 0}
+            add_docs: List[Document] = []
+            add_ids: List[str] = []
+            delete_ids: List[str] = []
+
+            current = dict(self.sections)
+            incoming = set()
+            for section in sections:
+                section_id = section["section_id"]
+                incoming.add(section_id)
+                metadata = dict(section.get("metadata") or {}, section_id=section_id)
+                content_hash = _text_hash(section["text"] + json.dumps(metadata, sort_keys=True, default=str))
+                existing = current.get(section_id)
+                if existing and existing["hash"] == content_hash:
+                    stats["unchanged_sections"] += 1
+                    continue
+
+                chunks = split_fn([Document(page_content=section["text"], metadata=metadata)])
+                chunk_ids = self._chunk_ids(section_id, chunks)
+
+                # Chunks whose text and metadata did not change keep their vectors
+                old_ids = set(existing["chunk_ids"]) if existing else set()
+                for chunk_id, chunk in zip(chunk_ids, chunks):
+                    if chunk_id not in old_ids:
+                        add_ids.append(chunk_id)
+                        add_docs.append(chunk)
+                delete_ids.extend(old_ids - set(chunk_ids))
+                current[section_id] = {"hash": content_hash, "chunk_ids": chunk_ids}
+                stats["changed_sections"] += 1
+
+            removed = set(delete_section_ids or [])
+            if delete_missing:
+                removed |= set(current) - incoming
+            for section_id in removed:
+                existing = current.pop(section_id, None)
+                if existing:
+                    delete_ids.extend(existing["chunk_ids"])
+                    stats["removed_sections"] += 1
+
+            vectorstore, bm25 = self._snapshot
+            if add_docs or (delete_ids and vectorstore is not None):
+                if vectorstore is None:
+                    vectorstore = FAISS.from_documents(add_docs, embeddings, ids=add_ids)
+                else:
+                    vectorstore = self._copy_vectorstore(vectorstore)
+                    if delete_ids:
+                        vectorstore.delete(delete_ids)
+                    if add_docs:
+                        vectorstore.add_documents(add_docs, ids=add_ids)
+                bm25 = BM25Index.from_vectorstore(vectorstore)
+
+            self._snapshot = (vectorstore, bm25)
+            self.sections = current
+            stats["added_chunks"] = len(add_docs)
+            stats["deleted_chunks"] = len(delete_ids)
+            return stats
+
+    def chunk_count(self) -> int:
+        return sum(len(section["chunk_ids"]) for section in self.sections.values())
+
+    @staticmethod
+    def _copy_vectorstore(vectorstore: FAISS) -> FAISS:
+        """Copy a FAISS store so it can be modified while queries keep using the original"""
+        faiss = dependable_faiss_import()
+        return FAISS(
+            embedding_function=vectorstore.embedding_function,
+            index=faiss.clone_index(vectorstore.index),
+            docstore=InMemoryDocstore(dict(vectorstore.docstore._dict)),
+            index_to_docstore_id=dict(vectorstore.index_to_docstore_id),
+            relevance_score_fn=vectorstore.override_relevance_score_fn,
+            normalize_L2=vectorstore._normalize_L2,
+            distance_strategy=vectorstore.distance_strategy,
+        )
+
+    @staticmethod
+    def _chunk_ids(section_id: str, chunks: List[Document]) -> List[str]:
+        """Deterministic chunk IDs from section, chunk text and metadata, so unchanged chunks keep their ID"""
+        ids = []
+        seen: Dict[str, int] = {}
+        for chunk in chunks:
+            fingerprint = chunk.page_content + json.dumps(chunk.metadata, sort_keys=True, default=str)
+            base = f"{section_id}:{_text_hash(fingerprint)[:16]}"
+            seen[base] = seen.get(base, 0) + 1
+            ids.append(base if seen[base] == 1 else f"{base}:{seen[base]}")
+        return ids
@@ -1,7 +1,71 @@
 import json
 import os
-from typing import Optional, Tuple
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Optional, Tuple
 from shapely.geometry import Point, Polygon
+from shapely.geometry.base import BaseGeometry
+from shapely.ops import unary_union
+from config import WARD_KML_FILE
+
+KML_NAMESPACES = {'kml': 'http://www.opengis.net/kml/2.2'}
+
+
+def _parse_kml_coordinates(text: str) -> List[Tuple[float, float]]:
+    """Parse a KML coordinates string into (longitude, latitude) pairs"""
+    points = []
+    for coord in (text or "").split():
+        parts = coord.split(',')
+        if len(parts) >= 2:
+            try:
+                points.append((float(parts[0]), float(parts[1])))
+            except ValueError:
+                continue
+    return points
+
+
+def load_ward_boundaries(kml_file: str) -> Dict[str, BaseGeometry]:
+    """
+    Load ward boundaries from a KML file.
+    
+    A placemark may hold several polygons (a MultiGeometry, e.g. a ward with
+    outlying islets); all of them are merged into one geometry, with inner
+    boundaries kept as holes.
+    
+    Args:
+        kml_file: Path to the KML file
+        
+    Returns:
+        Mapping of upper-case ward code to a shapely Polygon or MultiPolygon (longitude, latitude)
+    """
+    boundaries = {}
+    root = ET.parse(kml_file).getroot()
+    for placemark in root.findall('.//kml:Placemark', KML_NAMESPACES):
+        name_elem = placemark.find('kml:name', KML_NAMESPACES)
+        if name_elem is None or not name_elem.text:
+            continue
+        
+        polygons = []
+        for polygon_elem in placemark.findall('.//kml:Polygon', KML_NAMESPACES):
+            outer = _parse_kml_coordinates(polygon_elem.findtext(
+                'kml:outerBoundaryIs/kml:LinearRing/kml:coordinates', '', KML_NAMESPACES
+            ))
+            if len(outer) < 3:
+                continue
+            holes = [
+                ring for ring in (
+                    _parse_kml_coordinates(elem.text)
+                    for elem in polygon_elem.findall(
+                        'kml:innerBoundaryIs/kml:LinearRing/kml:coordinates', KML_NAMESPACES
+                    )
+                )
+                if len(ring) >= 3
+            ]
+            polygons.append(Polygon(outer, holes).buffer(0))
+        
+        if polygons:
+            boundaries[name_elem.text.strip().upper()] = unary_union(polygons)
+    return boundaries
+
 
 class WardService:
     """Service to determine ward based on latitude and longitude"""
@@ -99,6 +163,34 @@ class WardService:
         
         return nearest_ward, nearest_data
     
+    def get_ward_polygon(self, ward_code: str) -> Optional[BaseGeometry]:
+        """
+        Get the boundary of a ward from the ward KML file.
+        
+        Args:
+            ward_code: Ward code such as "K/E" (case-insensitive)
+            
+        Returns:
+            Shapely Polygon, or MultiPolygon for wards made of several parts
+            (longitude, latitude), or None if unknown
+        """
+        if self._ward_polygons is None:
+            self._load_ward_polygons()
+        return self._ward_polygons.get(ward_code.strip().upper())
+    
+    def _load_ward_polygons(self):
+        """Load full ward boundaries from the KML file"""
+        self._ward_polygons = {}
+        try:
+            if not os.path.exists(WARD_KML_FILE):
+                print(f"Ward KML file not found at {WARD_KML_FILE}")
+                return
+            
+            self._ward_polygons = load_ward_boundaries(WARD_KML_FILE)
+            print(f"Loaded {len(self._ward_polygons)} ward boundaries")
+        except Exception as e:
+            print(f"Error loading ward boundaries: {e}")
+    
     def get_all_wards(self) -> list:
         """Get list of all ward codes"""
         if not self._wards_data:
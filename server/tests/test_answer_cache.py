@@ -0,0 +1,78 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from services import answer_cache as answer_cache_module
+from services.answer_cache import AnswerCache
+
+
+def make_cache(**kwargs):
+    options = {"ttl": 60, "similarity_threshold": 0.95, "max_entries": 10}
+    options.update(kwargs)
+    return AnswerCache(**options)
+
+
+SCOPE = AnswerCache.scope("doc:abc", "Be brief", None, "hybrid")
+
+
+def test_normalized_question_hits_without_embedding():
+    cache = make_cache()
+    cache.put(SCOPE, "What is ward K/E?", {"answer": "Andheri East"}, ["kb.md"])
+
+    def embed(_):
+        raise AssertionError("exact hits must not embed the query")
+
+    entry, embedding = cache.lookup(SCOPE, "  what is ward k/e ", embed)
+    assert entry["result"] == {"answer": "Andheri East"}
+    assert embedding is None
+
+
+def test_similar_question_hits_and_returns_the_embedding():
+    cache = make_cache()
+    cache.put(SCOPE, "how do I report a pothole", "Use the app", [], query_embedding=[1.0, 0.0])
+    entry, embedding = cache.lookup(SCOPE, "reporting potholes", lambda _: [0.99, 0.05])
+    assert entry["result"] == "Use the app"
+    assert embedding == [0.99, 0.05]
+    assert cache.stats()["semantic_hits"] == 1
+
+
+def test_dissimilar_question_misses():
+    cache = make_cache()
+    cache.put(SCOPE, "how do I report a pothole", "Use the app", [], query_embedding=[1.0, 0.0])
+    entry, _ = cache.lookup(SCOPE, "who collects garbage", lambda _: [0.0, 1.0])
+    assert entry is None
+
+
+def test_scopes_are_isolated():
+    cache = make_cache()
+    cache.put(SCOPE, "q", "a", [])
+    other = AnswerCache.scope("doc:abc", "Be brief", None, "hybrid", section_filter="Officer")
+    assert cache.lookup(other, "q")[0] is None
+
+
+def test_expired_entries_are_dropped(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(answer_cache_module.time, "monotonic", lambda: now[0])
+    cache = make_cache(ttl=10)
+    cache.put(SCOPE, "q", "a", [])
+    now[0] += 11
+    assert cache.lookup(SCOPE, "q")[0] is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_size_limit_evicts_least_recently_used():
+    cache = make_cache(max_entries=2)
+    cache.put(SCOPE, "first", 1, [])
+    cache.put(SCOPE, "second", 2, [])
+    cache.lookup(SCOPE, "first")
+    cache.put(SCOPE, "third", 3, [])
+    assert cache.lookup(SCOPE, "second")[0] is None
+    assert cache.lookup(SCOPE, "first")[0]["result"] == 1
+
+
+def test_invalidate_source_removes_its_answers():
+    cache = make_cache()
+    cache.put(SCOPE, "q", "a", [])
+    cache.put(AnswerCache.scope("doc:other", "", None, "hybrid"), "q", "b", [])
+    assert cache.invalidate_source("doc:abc") == 1
+    assert cache.stats()["entries"] == 1
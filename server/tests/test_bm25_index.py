@@ -0,0 +1,57 @@
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.documents import Document
+
+from services.bm25_index import BM25Index, is_lexical_query, reciprocal_rank_fusion, tokenize
+
+
+def doc(text, **metadata):
+    return Document(page_content=text, metadata=metadata)
+
+
+def test_tokenize_keeps_compound_identifiers_and_their_parts():
+    terms = tokenize("Ward K/E has the ticket-123")
+    assert "k/e" in terms and "k" in terms and "e" in terms
+    assert "ticket-123" in terms and "123" in terms
+    assert "the" not in terms
+
+
+def test_is_lexical_query():
+    assert is_lexical_query("K/E")
+    assert is_lexical_query("TKT-1A2B3C4D status")
+    assert not is_lexical_query("how do officers close a ticket")
+
+
+def test_search_ranks_exact_identifier_first_and_skips_non_matches():
+    index = BM25Index([
+        doc("Ward K/W covers Andheri West"),
+        doc("Ward K/E covers Andheri East"),
+        doc("Garbage collection schedule"),
+    ])
+    results = index.search("K/E", k=3)
+    assert results[0][0].page_content == "Ward K/E covers Andheri East"
+    assert all("Garbage" not in d.page_content for d, _ in results)
+
+
+def test_search_respects_allowed_indices():
+    index = BM25Index([doc("pothole on main road", section="a"), doc("pothole near school", section="b")])
+    allowed = index.matching(lambda d: d.metadata["section"] == "b")
+    results = index.search("pothole", allowed=allowed)
+    assert [d.metadata["section"] for d, _ in results] == ["b"]
+
+
+def test_empty_index_returns_nothing():
+    assert BM25Index([]).search("anything") == []
+
+
+def test_reciprocal_rank_fusion_prefers_documents_ranked_by_both():
+    a, b, c = doc("a"), doc("b"), doc("c")
+    fused = reciprocal_rank_fusion([[a, b, c], [b, c, a]], k=2)
+    assert [d.page_content for d in fused] == ["b", "a"]
+
+
+def test_reciprocal_rank_fusion_deduplicates_by_content():
+    fused = reciprocal_rank_fusion([[doc("x")], [doc("x")]], k=5)
+    assert len(fused) == 1
@@ -0,0 +1,60 @@
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.documents import Document
+
+from services.context_builder import build_context, estimate_tokens
+
+
+SOURCE = "The municipal corporation divides the city into wards. " * 4
+
+
+def chunk(start, end, source="kb.md", **metadata):
+    return Document(page_content=SOURCE[start:end], metadata=dict(metadata, source=source, start_index=start))
+
+
+def test_overlapping_chunks_with_offsets_are_merged():
+    context, stats = build_context([chunk(0, 120), chunk(80, 220)])
+    assert context == SOURCE[0:220]
+    assert stats["chunks"] == 2
+    assert stats["blocks"] == 1
+    assert stats["tokens_saved"] > 0
+    assert stats["tokens_truncated"] == 0
+
+
+def test_chunks_from_different_sources_are_not_merged():
+    context, stats = build_context([chunk(0, 120, source="a.md"), chunk(80, 220, source="b.md")])
+    assert stats["blocks"] == 2
+
+
+def test_overlap_without_offsets_is_detected_from_text():
+    text = "Officers assign tickets to contractors after verifying the report on site. " * 2
+    left = Document(page_content=text[:100], metadata={"source": "x"})
+    right = Document(page_content=text[50:150], metadata={"source": "x"})
+    context, stats = build_context([left, right])
+    assert context == text[:150]
+    assert stats["blocks"] == 1
+
+
+def test_duplicate_chunks_are_dropped():
+    doc = Document(page_content="Same text", metadata={"source": "x"})
+    context, stats = build_context([doc, Document(page_content="Same text", metadata={"source": "y"})])
+    assert context == "Same text"
+
+
+def test_budget_keeps_ranking_order_and_drops_the_rest():
+    best = Document(page_content="a" * 400, metadata={"source": "1"})
+    second = Document(page_content="b" * 400, metadata={"source": "2"})
+    context, stats = build_context([best, second], token_budget=estimate_tokens("a" * 400) + 10)
+    assert context == "a" * 400
+    assert stats["dropped_blocks"] == 1
+    assert stats["context_tokens"] <= estimate_tokens("a" * 400) + 10
+
+
+def test_budget_truncation_is_not_counted_as_savings():
+    best = Document(page_content="a" * 400, metadata={"source": "1"})
+    second = Document(page_content="b" * 400, metadata={"source": "2"})
+    _, stats = build_context([best, second], token_budget=estimate_tokens("a" * 400) + 10)
+    assert stats["tokens_saved"] == 0
+    assert stats["tokens_truncated"] == stats["raw_tokens"] - stats["context_tokens"] > 0
@@ -0,0 +1,77 @@
+import pytest
+
+pytest.importorskip("firebase_admin")
+pytest.importorskip("dotenv")
+
+import backfill_geohash
+from services.firebase_service import FirebaseService, is_valid_document_id
+from services.geo_utils import geohash_fields
+
+
+@pytest.mark.parametrize("doc_id", ["abc123XYZ", "TKT-1A2B3C4D", "a.b"])
+def test_valid_document_ids(doc_id):
+    assert is_valid_document_id(doc_id)
+
+
+@pytest.mark.parametrize("doc_id", ["", "tickets/abc", ".", "..", "__reserved__", "x" * 1501])
+def test_invalid_document_ids(doc_id):
+    assert not is_valid_document_id(doc_id)
+
+
+class FakeDoc:
+    def __init__(self, doc_id, data):
+        self.id = doc_id
+        self._data = data
+
+    def to_dict(self):
+        return dict(self._data)
+
+
+class FakeTickets:
+    """Answers geohash "in" queries over a fixed set of tickets"""
+
+    def __init__(self, docs, field=None, values=None):
+        self.docs, self.field, self.values = docs, field, values
+
+    def where(self, field, op, value):
+        assert op == "in"
+        return FakeTickets(self.docs, field, value)
+
+    def stream(self):
+        return iter(d for d in self.docs if d.to_dict().get(self.field) in self.values)
+
+
+class FakeDb:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def collection(self, name):
+        return FakeTickets(self.docs)
+
+
+# A ticket from the web app: only location.lat / location.lng, plus geohash prefixes
+WEB_TICKET = {"location": {"lat": 19.0760, "lng": 72.8777}, **geohash_fields(19.0760, 72.8777)}
+SERVER_TICKET = {"latitude": 19.0765, "longitude": 72.8780, **geohash_fields(19.0765, 72.8780)}
+
+
+@pytest.fixture
+def service():
+    service = FirebaseService.__new__(FirebaseService)
+    service._db = FakeDb([FakeDoc("web", WEB_TICKET), FakeDoc("server", SERVER_TICKET)])
+    return service
+
+
+def test_bbox_query_includes_location_only_tickets(service):
+    tickets = service.query_tickets_in_bbox(19.07, 72.87, 19.08, 72.88)
+    assert sorted(t["id"] for t in tickets) == ["server", "web"]
+
+
+def test_near_query_measures_location_only_tickets(service):
+    tickets = service.query_tickets_near(19.0760, 72.8777, 1)
+    assert [t["id"] for t in tickets] == ["web", "server"]
+    assert tickets[0]["distance_km"] == 0
+
+
+def test_backfill_tags_location_only_tickets():
+    fields = backfill_geohash.add_geohash_fields({"location": {"lat": 19.0760, "lng": 72.8777}})
+    assert fields == geohash_fields(19.0760, 72.8777)
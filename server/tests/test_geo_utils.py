@@ -0,0 +1,56 @@
+from services.geo_utils import (
+    bbox_for_radius,
+    encode_geohash,
+    geohash_cell_count,
+    geohash_cells_for_bbox,
+    geohash_fields,
+    haversine_km,
+    ticket_coordinates,
+)
+
+
+def test_encode_geohash_known_value():
+    assert encode_geohash(57.64911, 10.40744, 11) == "u4pruydqqvj"
+
+
+def test_geohash_fields_are_prefixes_of_full_hash():
+    fields = geohash_fields(19.076, 72.8777)
+    assert len(fields["geohash"]) == 9
+    for precision in (4, 5, 6, 7):
+        assert fields[f"geohash_{precision}"] == fields["geohash"][:precision]
+
+
+def test_cells_for_bbox_cover_the_box():
+    south, west, north, east = 19.05, 72.82, 19.10, 72.90
+    precision, cells = geohash_cells_for_bbox(south, west, north, east)
+    assert len(cells) <= 30
+    for lat in (south, (south + north) / 2, north):
+        for lon in (west, (west + east) / 2, east):
+            assert encode_geohash(lat, lon, precision) in cells
+
+
+def test_cell_count_bounds_large_boxes():
+    assert geohash_cell_count(18.89, 72.77, 19.27, 72.99) < 10
+    assert geohash_cell_count(10, 70, 25, 80) > 2000
+
+
+def test_bbox_for_radius_contains_circle():
+    south, west, north, east = bbox_for_radius(19.0, 72.8, 5)
+    assert haversine_km(19.0, 72.8, north, 72.8) >= 4.99
+    assert haversine_km(19.0, 72.8, 19.0, east) >= 4.99
+    assert south < 19.0 < north and west < 72.8 < east
+
+
+def test_ticket_coordinates_reads_top_level_fields():
+    assert ticket_coordinates({"latitude": 19.07, "longitude": 72.87}) == (19.07, 72.87)
+
+
+def test_ticket_coordinates_falls_back_to_web_location():
+    assert ticket_coordinates({"location": {"lat": "19.07", "lng": 72.87}}) == (19.07, 72.87)
+
+
+def test_ticket_coordinates_rejects_missing_or_invalid_values():
+    assert ticket_coordinates({}) is None
+    assert ticket_coordinates({"location": "Andheri"}) is None
+    assert ticket_coordinates({"latitude": "abc", "longitude": 72.87}) is None
+    assert ticket_coordinates({"latitude": 91, "longitude": 72.87}) is None
@@ -0,0 +1,98 @@
+import asyncio
+import hashlib
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("dotenv")
+
+from fastapi import HTTPException
+
+from services.idempotency_service import IdempotencyService
+
+
+def image_fingerprint(image_bytes, latitude=19.07, longitude=72.87, description=None):
+    # Mirrors /validate-image: the upload is identified by its content, not its filename
+    return IdempotencyService.fingerprint(hashlib.sha256(image_bytes).hexdigest(), latitude, longitude, description)
+
+
+def test_fingerprint_depends_on_image_content_not_filename():
+    assert image_fingerprint(b"photo-1") == image_fingerprint(b"photo-1")
+    assert image_fingerprint(b"photo-1") != image_fingerprint(b"photo-2")
+    assert image_fingerprint(b"photo-1") != image_fingerprint(b"photo-1", latitude=19.08)
+
+
+def test_retry_replays_the_first_response():
+    service = IdempotencyService()
+    calls = []
+
+    async def handler():
+        calls.append(1)
+        return {"ticket_id": "abc"}
+
+    async def run():
+        first = await service.run("validate-image", "key-1", image_fingerprint(b"x"), handler)
+        second = await service.run("validate-image", "key-1", image_fingerprint(b"x"), handler)
+        return first, second
+
+    (first, replayed_first), (second, replayed_second) = asyncio.run(run())
+    assert first == second == {"ticket_id": "abc"}
+    assert (replayed_first, replayed_second) == (False, True)
+    assert len(calls) == 1
+
+
+def test_key_reused_with_a_different_image_is_rejected():
+    service = IdempotencyService()
+
+    async def handler():
+        return {"ticket_id": "abc"}
+
+    async def run():
+        await service.run("validate-image", "key-1", image_fingerprint(b"x"), handler)
+        await service.run("validate-image", "key-1", image_fingerprint(b"y"), handler)
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(run())
+    assert exc.value.status_code == 422
+
+
+def test_failed_attempts_are_not_stored():
+    service = IdempotencyService()
+    attempts = []
+
+    async def handler():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("transient")
+        return "ok"
+
+    async def run():
+        with pytest.raises(RuntimeError):
+            await service.run("create-manual", "key-1", "fp", handler)
+        return await service.run("create-manual", "key-1", "fp", handler)
+
+    assert asyncio.run(run()) == ("ok", False)
+
+
+def test_failed_validation_is_re_executed_on_retry():
+    service = IdempotencyService()
+    attempts = []
+
+    async def handler():
+        attempts.append(1)
+        if len(attempts) == 1:
+            # ai_service reports outages as a result, not an exception
+            return {"detected": False, "ticket_id": None, "error": "Connection error"}
+        return {"detected": True, "ticket_id": "abc", "error": None}
+
+    async def run():
+        first = await service.run("validate-image", "key-1", image_fingerprint(b"x"), handler)
+        second = await service.run("validate-image", "key-1", image_fingerprint(b"x"), handler)
+        return first, second
+
+    (first, _), (second, replayed) = asyncio.run(run())
+    assert first["error"] == "Connection error"
+    assert second["ticket_id"] == "abc"
+    assert replayed is False
+    assert len(attempts) == 2
+    assert service.store_size() == 1
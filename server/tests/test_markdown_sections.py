@@ -0,0 +1,79 @@
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.documents import Document
+
+from services.markdown_sections import section_matches, split_markdown_documents, split_markdown_sections
+
+
+MARKDOWN = """Intro text.
+
+# User Roles
+
+## 2. Officer (Municipal Officer)
+
+Officers verify tickets.
+
+```
+# not a heading
+```
+
+### Workflow
+
+Assign, then close.
+
+# User Roles
+
+Repeated title.
+"""
+
+
+def test_sections_track_heading_paths_and_skip_fenced_headings():
+    sections = split_markdown_sections(MARKDOWN)
+    paths = [s["section_path"] for s in sections]
+    assert paths == [
+        "",
+        "User Roles",
+        "User Roles > 2. Officer (Municipal Officer)",
+        "User Roles > 2. Officer (Municipal Officer) > Workflow",
+        "User Roles",
+    ]
+    assert sections[0]["section_id"] == "preamble"
+    assert "# not a heading" in sections[2]["text"]
+
+
+def test_repeated_headings_get_unique_ids():
+    ids = [s["section_id"] for s in split_markdown_sections(MARKDOWN)]
+    assert len(ids) == len(set(ids))
+    assert "user-roles-2" in ids
+
+
+def test_documents_carry_section_metadata():
+    docs = split_markdown_documents([Document(page_content=MARKDOWN, metadata={"source": "kb.md"})])
+    assert all(d.metadata["source"] == "kb.md" for d in docs)
+    assert docs[3].metadata["section_path"].endswith("> Workflow")
+
+
+@pytest.mark.parametrize("section_filter, expected", [
+    (None, True),
+    ("Officer", True),
+    ("user roles > officer", True),
+    ("User Roles > Workflow", True),
+    ("Workflow > Officer", False),
+    ("Contractor", False),
+])
+def test_section_matches(section_filter, expected):
+    path = "User Roles > 2. Officer (Municipal Officer) > Workflow"
+    assert section_matches(path, section_filter) is expected
+
+
+def test_titles_containing_angle_brackets_stay_one_level():
+    path = "Limits > Tickets with count>10"
+    assert section_matches(path, "Limits > count")
+    assert not section_matches(path, "Limits > Tickets > 10")
+
+
+def test_missing_path_only_matches_without_filter():
+    assert section_matches("", None)
+    assert not section_matches("", "Officer")
@@ -0,0 +1,95 @@
+import pytest
+
+pytest.importorskip("firebase_admin")
+pytest.importorskip("dotenv")
+
+import migration_runner
+from migration_runner import Migration, MigrationRunner
+
+
+class FakeDoc:
+    def __init__(self, doc_id, data):
+        self.id = doc_id
+        self._data = data
+
+    def to_dict(self):
+        return dict(self._data)
+
+    def get(self):
+        return self
+
+
+class FakeQuery:
+    def __init__(self, docs, limit=None, after=None):
+        self.docs, self._limit, self._after = docs, limit, after
+
+    def order_by(self, field):
+        return self
+
+    def limit(self, count):
+        return FakeQuery(self.docs, count, self._after)
+
+    def start_after(self, doc):
+        return FakeQuery(self.docs, self._limit, doc.id)
+
+    def stream(self):
+        docs = [d for d in self.docs if self._after is None or d.id > self._after]
+        return iter(docs[:self._limit])
+
+    def document(self, doc_id):
+        return next(d for d in self.docs if d.id == doc_id)
+
+    def count(self):
+        raise RuntimeError("no aggregation in fake")
+
+
+class FakeDb:
+    def __init__(self, collections):
+        self.collections = collections
+
+    def collection(self, name):
+        return FakeQuery(self.collections[name])
+
+
+@pytest.fixture
+def fake_firestore(monkeypatch, tmp_path):
+    docs = [FakeDoc(f"d{i:02d}", {"n": i}) for i in range(10)]
+    db = FakeDb({"wards": docs})
+    writes = []
+
+    def update_documents_bulk(collection, updates, flush_size=500):
+        writes.append((collection, sorted(updates)))
+        if fake_firestore_fail and updates and max(updates) >= fake_firestore_fail[0]:
+            raise RuntimeError("interrupted")
+        return {"written": list(updates), "failed": {}}
+
+    fake_firestore_fail = []
+    monkeypatch.setattr(type(migration_runner.firebase_service), "db", property(lambda self: db))
+    monkeypatch.setattr(migration_runner.firebase_service, "update_documents_bulk", update_documents_bulk)
+    monkeypatch.setattr(migration_runner, "CHECKPOINT_DIR", str(tmp_path))
+    return writes, fake_firestore_fail
+
+
+def _migration():
+    return Migration(name="double", collection="wards", transform=lambda d: {"n": d["n"] * 2})
+
+
+def test_writes_go_to_the_migrated_collection(fake_firestore):
+    writes, _ = fake_firestore
+    summary = MigrationRunner(_migration(), page_size=4, workers=1).run()
+    assert {collection for collection, _ in writes} == {"wards"}
+    assert summary["scanned"] == 10 and summary["written"] == 10
+
+
+def test_resume_does_not_double_count(fake_firestore):
+    writes, fail_from = fake_firestore
+    fail_from.append("d04")
+    runner = MigrationRunner(_migration(), page_size=4, workers=1)
+    with pytest.raises(RuntimeError):
+        runner.run()
+
+    fail_from.clear()
+    summary = MigrationRunner(_migration(), page_size=4, workers=1).run()
+    assert summary["scanned"] == 10
+    assert summary["changed"] == 10
+    assert summary["field_diffs"] == {"n": 10}
@@ -0,0 +1,56 @@
+import pytest
+
+pytest.importorskip("firebase_admin")
+pytest.importorskip("dotenv")
+
+from services import outbox_service
+from services.outbox_service import TicketOutbox
+
+
+def queue_merge(outbox, doc_id, report):
+    """Queue a duplicate report for a ticket that has already been flushed"""
+    outbox._conn.execute(
+        "INSERT INTO ticket_outbox (doc_id, payload, enqueued_at, next_attempt_at) VALUES (?, '{}', 0, 1e12)",
+        (doc_id,),
+    )
+    assert outbox.merge_pending(doc_id, report)
+    outbox._conn.execute("DELETE FROM ticket_outbox WHERE doc_id = ?", (doc_id,))
+
+
+def test_claimed_merges_are_not_applied_by_another_process(tmp_path, monkeypatch):
+    path = str(tmp_path / "outbox.db")
+    first, second = TicketOutbox(path), TicketOutbox(path)
+    queue_merge(first, "ticket-1", {"source": "web-form"})
+    applied = []
+
+    def add_duplicate_report(doc_id, report, merge_id=None):
+        applied.append((doc_id, merge_id))
+        # The other process flushes while this report is being applied
+        second.flush_once()
+        return True
+
+    monkeypatch.setattr(outbox_service.firebase_service, "add_duplicate_report", add_duplicate_report)
+    first.flush_once()
+
+    assert len(applied) == 1
+    assert applied[0][1]
+    assert first._conn.execute("SELECT COUNT(*) FROM ticket_outbox_merges").fetchone()[0] == 0
+
+
+def test_retried_merge_keeps_its_merge_id(tmp_path, monkeypatch):
+    outbox = TicketOutbox(str(tmp_path / "outbox.db"))
+    outbox.flush_interval = 0
+    queue_merge(outbox, "ticket-1", {"source": "web-form"})
+    merge_ids = []
+
+    def add_duplicate_report(doc_id, report, merge_id=None):
+        merge_ids.append(merge_id)
+        assert "merge_id" not in report
+        return len(merge_ids) > 1
+
+    monkeypatch.setattr(outbox_service.firebase_service, "add_duplicate_report", add_duplicate_report)
+    outbox.flush_once()
+    outbox._conn.execute("UPDATE ticket_outbox_merges SET next_attempt_at = 0")
+    outbox.flush_once()
+
+    assert len(merge_ids) == 2 and merge_ids[0] == merge_ids[1]
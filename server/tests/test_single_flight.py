@@ -0,0 +1,56 @@
+import threading
+import time
+
+import pytest
+
+from services.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {"tickets": [1, 2]}
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("k", fetch)))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(flight.do("k", fetch))) for _ in range(3)]
+    for t in followers:
+        t.start()
+    # Followers register as waiters before the leader finishes
+    while flight._calls["k"].waiters < 3:
+        time.sleep(0.001)
+    release.set()
+    for t in [leader] + followers:
+        t.join(5)
+
+    assert len(calls) == 1
+    assert results == [{"tickets": [1, 2]}] * 4
+    # Every caller gets its own copy
+    assert len({id(r) for r in results}) == 4
+    assert flight.in_flight() == 0
+
+
+def test_errors_reach_waiters_and_are_not_cached():
+    flight = SingleFlight()
+
+    def fail():
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError):
+        flight.do("k", fail)
+    assert flight.do("k", lambda: "ok") == "ok"
+
+
+def test_different_keys_run_separately():
+    flight = SingleFlight()
+    assert flight.do("a", lambda: 1) == 1
+    assert flight.do("b", lambda: 2) == 2
@@ -0,0 +1,53 @@
+import pytest
+
+pytest.importorskip("firebase_admin")
+pytest.importorskip("dotenv")
+
+from services import stats_service as stats_module
+from services.stats_service import StatsUnavailableError, TicketStatsService
+
+
+@pytest.fixture
+def counts(monkeypatch):
+    calls = []
+
+    def count_tickets(filters=None):
+        calls.append(dict(filters or {}))
+        if filters and filters.get("status") == "broken":
+            return None
+        return {"open": 3, "closed": 2}.get((filters or {}).get("status"), 0) if filters else 5
+
+    monkeypatch.setattr(stats_module.firebase_service, "count_tickets", count_tickets)
+    monkeypatch.setattr(stats_module, "TICKET_STATUSES", ["open", "closed"])
+    return calls
+
+
+def test_only_requested_dimensions_are_counted(counts, monkeypatch):
+    service = TicketStatsService()
+    monkeypatch.setattr(service, "group_values", lambda: {"status": ["open", "closed"], "ward": ["A"] * 25})
+    stats = service.get_stats(group_by=["status"])
+    assert stats["by_status"] == {"open": 3, "closed": 2}
+    assert stats["query_count"] == 3
+    assert len(counts) == 3
+
+
+def test_failed_count_raises_and_is_not_cached(counts, monkeypatch):
+    service = TicketStatsService()
+    monkeypatch.setattr(service, "group_values", lambda: {"status": ["open", "broken"]})
+    with pytest.raises(StatsUnavailableError):
+        service.get_stats(group_by=["status"])
+    assert not service._cache
+
+
+def test_cache_is_bounded(counts, monkeypatch):
+    service = TicketStatsService()
+    service.cache_max_entries = 2
+    monkeypatch.setattr(service, "group_values", lambda: {"status": ["open"]})
+    for ward in ("A", "B", "C"):
+        service.get_stats({"ward": ward}, group_by=["status"])
+    assert len(service._cache) == 2
+
+
+def test_unknown_group_field_is_rejected(counts):
+    with pytest.raises(ValueError):
+        TicketStatsService().get_stats(group_by=["colour"])
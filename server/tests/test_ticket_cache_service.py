@@ -0,0 +1,23 @@
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("dotenv")
+
+from services.ticket_cache_service import TicketCacheService
+
+TICKET = {"ticket_id": "TKT-1", "updated_at": "2026-01-01T00:00:00", "report_count": 1, "archived": False}
+
+
+def test_ticket_etag_changes_with_report_count_and_archived_flag():
+    cache = TicketCacheService()
+    etag = cache.put_ticket("abc", TICKET)["etag"]
+    assert cache.put_ticket("abc", dict(TICKET))["etag"] == etag
+    assert cache.put_ticket("abc", dict(TICKET, report_count=2))["etag"] != etag
+    assert cache.put_ticket("abc", dict(TICKET, archived=True))["etag"] != etag
+
+
+def test_ticket_etag_matches_if_none_match():
+    cache = TicketCacheService()
+    etag = cache.put_ticket("abc", TICKET)["etag"]
+    assert cache.etag_matches(f"W/{etag}", etag)
+    assert not cache.etag_matches('"other"', etag)
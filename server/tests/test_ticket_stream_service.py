@@ -0,0 +1,68 @@
+import pytest
+
+pytest.importorskip("firebase_admin")
+pytest.importorskip("dotenv")
+
+from services import ticket_stream_service as ticket_stream_module
+from services.ticket_stream_service import TicketStreamService, TicketSubscriber
+
+
+def _event(event_type, status, previous_status=None):
+    return {
+        "type": event_type,
+        "id": "doc1",
+        "ticket": {"ticket_id": "TKT-1", "status": status, "ward": "K/E"},
+        "previous": {"status": previous_status, "ward": "K/E"} if previous_status else None,
+    }
+
+
+def _service():
+    service = TicketStreamService()
+    service._watch = object()  # Pretend the Firestore listener is running
+    service._publish([_event("added", "open"), _event("modified", "assigned", "open")])
+    return service
+
+
+def _drain(subscriber):
+    items = []
+    while not subscriber.queue.empty():
+        items.append(subscriber.queue.get_nowait())
+    return items
+
+
+def test_move_out_of_status_filter_is_removed():
+    subscriber = TicketSubscriber({"status": "open"})
+    assert subscriber.view(_event("modified", "assigned", "open"))["type"] == "removed"
+    assert subscriber.view(_event("modified", "closed", "assigned")) is None
+    assert subscriber.view(_event("modified", "open", "assigned"))["type"] == "modified"
+
+
+def test_resume_replays_events_after_last_id():
+    service = _service()
+    subscriber = service.subscribe({}, f"{service.epoch}-1")
+    assert [(event_id, event["type"]) for event_id, event in _drain(subscriber)] == [(2, "modified")]
+
+
+def test_resume_past_next_id_resets():
+    service = _service()
+    subscriber = service.subscribe({}, f"{service.epoch}-50")
+    assert [event["type"] for _, event in _drain(subscriber)] == ["reset"]
+
+
+def test_resume_from_other_epoch_resets():
+    service = _service()
+    subscriber = service.subscribe({}, "deadbeef-1")
+    assert [event["type"] for _, event in _drain(subscriber)] == ["reset"]
+
+
+def test_formatted_event_id_carries_epoch():
+    service = _service()
+    assert service.format_event(7, _event("added", "open")).startswith(f"id: {service.epoch}-7\n")
+
+
+def test_subscriber_overflowing_during_replay_is_not_registered(monkeypatch):
+    monkeypatch.setattr(ticket_stream_module, "STREAM_QUEUE_SIZE", 1)
+    service = _service()
+    subscriber = service.subscribe({}, f"{service.epoch}-0")
+    assert subscriber.overflowed
+    assert service.subscriber_count() == 0
@@ -0,0 +1,52 @@
+import pytest
+
+pytest.importorskip("shapely")
+pytest.importorskip("dotenv")
+
+from shapely.geometry import Point
+
+from services.ward_service import load_ward_boundaries
+
+
+def _ring(west, south, east, north):
+    return f"{west},{south},0 {east},{south},0 {east},{north},0 {west},{north},0 {west},{south},0"
+
+
+def _write_kml(tmp_path, placemarks):
+    body = "".join(f"<Placemark><name>{name}</name>{geometry}</Placemark>" for name, geometry in placemarks)
+    path = tmp_path / "wards.kml"
+    path.write_text(
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        f'<kml xmlns="http://www.opengis.net/kml/2.2"><Document>{body}</Document></kml>'
+    )
+    return str(path)
+
+
+def _polygon(outer, inner=None):
+    holes = f"<innerBoundaryIs><LinearRing><coordinates>{inner}</coordinates></LinearRing></innerBoundaryIs>" if inner else ""
+    return f"<Polygon><outerBoundaryIs><LinearRing><coordinates>{outer}</coordinates></LinearRing></outerBoundaryIs>{holes}</Polygon>"
+
+
+def test_multigeometry_keeps_every_ring(tmp_path):
+    islet = _polygon(_ring(72.780, 19.140, 72.784, 19.144))
+    body = _polygon(_ring(72.81, 19.136, 72.895, 19.18))
+    path = _write_kml(tmp_path, [("P/S", f"<MultiGeometry>{islet}{body}</MultiGeometry>")])
+
+    boundary = load_ward_boundaries(path)["P/S"]
+
+    assert boundary.geom_type == "MultiPolygon"
+    assert boundary.covers(Point(72.85, 19.16))
+    assert boundary.covers(Point(72.782, 19.142))
+    west, south, east, north = boundary.bounds
+    assert (west, east) == (72.780, 72.895)
+
+
+def test_inner_boundary_is_a_hole(tmp_path):
+    ward = _polygon(_ring(72.80, 19.00, 72.90, 19.10), inner=_ring(72.84, 19.04, 72.86, 19.06))
+    path = _write_kml(tmp_path, [("k/e", ward)])
+
+    boundary = load_ward_boundaries(path)["K/E"]
+
+    assert boundary.geom_type == "Polygon"
+    assert not boundary.covers(Point(72.85, 19.05))
+    assert boundary.covers(Point(72.81, 19.01))
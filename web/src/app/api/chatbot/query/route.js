@@ -1,8 +1,6 @@
 import { NextResponse } from 'next/server';
-import fs from 'fs';
-import path from 'path';
 
-const RAG_SERVICE_URL = 'http://localhost:8002/upload-and-query';
+const RAG_SERVICE_URL = 'http://localhost:8002/knowledge-base/query';
 
 export async function POST(request) {
   try {
@@ -19,23 +17,6 @@ export async function POST(request) {
       }, { status: 400 });
     }
 
-    // Read the knowledge base file
-    const knowledgeBasePath = path.join(process.cwd(), '..', 'knowledge_base.md');
-    
-    console.log('Knowledge base path:', knowledgeBasePath);
-    console.log('File exists:', fs.existsSync(knowledgeBasePath));
-    
-    if (!fs.existsSync(knowledgeBasePath)) {
-      console.error('ERROR: Knowledge base not found at:', knowledgeBasePath);
-      return NextResponse.json({
-        success: false,
-        error: 'Knowledge base file not found at: ' + knowledgeBasePath
-      }, { status: 500 });
-    }
-
-    const knowledgeBaseContent = fs.readFileSync(knowledgeBasePath, 'utf-8');
-    console.log('Knowledge base loaded. Size:', knowledgeBaseContent.length, 'characters');
-
     const systemPrompt = `You are an expert AI assistant for CASE (Citizen Assistance & Service Enhancement), a municipal infrastructure management platform.
 
 **Primary Responsibilities**:
@@ -64,43 +45,18 @@ export async function POST(request) {
 
 Reference the knowledge base strictly. Do not invent features or workflows.`;
 
-    // Create boundary for multipart form data
-    const boundary = '----WebKitFormBoundary' + Math.random().toString(36).substring(2);
-    
-    console.log('Building multipart form data with boundary:', boundary);
-    
-    // Build multipart form data manually
-    let body = '';
-    
-    // Add file field
-    body += `--${boundary}\r\n`;
-    body += `Content-Disposition: form-data; name="file"; filename="knowledge_base.md"\r\n`;
-    body += `Content-Type: text/markdown\r\n\r\n`;
-    body += knowledgeBaseContent + '\r\n';
-    
-    // Add query field
-    body += `--${boundary}\r\n`;
-    body += `Content-Disposition: form-data; name="query"\r\n\r\n`;
-    body += query + '\r\n';
-    
-    // Add system_prompt field
-    body += `--${boundary}\r\n`;
-    body += `Content-Disposition: form-data; name="system_prompt"\r\n\r\n`;
-    body += systemPrompt + '\r\n';
-    
-    // End boundary
-    body += `--${boundary}--\r\n`;
-
-    console.log('Form data built. Total size:', body.length, 'bytes');
     console.log('Sending request to RAG service at:', RAG_SERVICE_URL);
 
     // Send to RAG service
     const response = await fetch(RAG_SERVICE_URL, {
       method: 'POST',
       headers: {
-        'Content-Type': `multipart/form-data; boundary=${boundary}`
+        'Content-Type': 'application/json'
       },
-      body: body
+      body: JSON.stringify({
+        query,
+        system_prompt: systemPrompt
+      })
     });
 
     console.log('RAG service responded with status:', response.status);
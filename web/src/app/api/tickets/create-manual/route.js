@@ -2,6 +2,7 @@ import { NextResponse } from 'next/server';
 import { collection, addDoc, updateDoc, doc, query, where, getDocs } from 'firebase/firestore';
 import { db } from '@/lib/firebase';
 import { sendBulkWardOfficerEmails } from '@/lib/emailService';
+import { geohashFields } from '@/lib/geohash';
 
 export async function POST(request) {
   try {
@@ -22,6 +23,11 @@ export async function POST(request) {
     const ticketsRef = collection(db, 'tickets');
     const docRef = await addDoc(ticketsRef, {
       ...ticketData,
+      // Same geohash prefixes the API server stores, so spatial queries find web tickets
+      ...geohashFields(
+        ticketData.latitude ?? ticketData.location?.lat,
+        ticketData.longitude ?? ticketData.location?.lng
+      ),
       status: 'pending',
       is_active: true,
       created_at: new Date().toISOString(),
@@ -0,0 +1,60 @@
+// Geohash encoding, mirroring server/services/geo_utils.py.
+// Tickets carry "geohash" plus "geohash_<precision>" prefixes so the API
+// server's bounding-box queries (/api/tickets/within) can find them.
+
+const GEOHASH_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz';
+export const GEOHASH_PRECISIONS = [4, 5, 6, 7];
+const GEOHASH_FULL_PRECISION = 9;
+
+/**
+ * Encode a coordinate as a geohash string
+ */
+export const encodeGeohash = (latitude, longitude, precision = GEOHASH_FULL_PRECISION) => {
+  const latRange = [-90.0, 90.0];
+  const lonRange = [-180.0, 180.0];
+  let hash = '';
+  let bits = 0;
+  let bitCount = 0;
+  let even = true; // Geohash interleaves bits starting with longitude
+
+  while (hash.length < precision) {
+    const range = even ? lonRange : latRange;
+    const value = even ? longitude : latitude;
+    const mid = (range[0] + range[1]) / 2;
+    if (value >= mid) {
+      bits = (bits << 1) | 1;
+      range[0] = mid;
+    } else {
+      bits = bits << 1;
+      range[1] = mid;
+    }
+    even = !even;
+    bitCount += 1;
+    if (bitCount === 5) {
+      hash += GEOHASH_BASE32[bits];
+      bits = 0;
+      bitCount = 0;
+    }
+  }
+
+  return hash;
+};
+
+/**
+ * Geohash fields stored on a ticket document, or {} without valid coordinates
+ */
+export const geohashFields = (latitude, longitude) => {
+  const lat = Number(latitude);
+  const lon = Number(longitude);
+  if (latitude == null || longitude == null || !Number.isFinite(lat) || !Number.isFinite(lon)
+      || lat < -90 || lat > 90 || lon < -180 || lon > 180) {
+    return {};
+  }
+
+  const full = encodeGeohash(lat, lon, GEOHASH_FULL_PRECISION);
+  const fields = { geohash: full };
+  GEOHASH_PRECISIONS.forEach((precision) => {
+    fields[`geohash_${precision}`] = full.slice(0, precision);
+  });
+  return fields;
+};